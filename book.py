@@ -0,0 +1,107 @@
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import mmap
+import random
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+import chess
+from chess.polyglot import Entry, ENTRY_STRUCT, zobrist_hash
+
+
+class BookReader(object):
+
+    """Polyglot book mapped to memory with a sorted key index for the lookups."""
+
+    def __init__(self, file_name: str):
+        super(BookReader, self).__init__()
+        self.file_name = file_name
+        self.mmap = None
+        self.keys = array('Q')
+        try:
+            with open(file_name, 'rb') as file:
+                self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):  # missing or empty book
+            return
+        # the keys are the first (big endian) quad word of each 16 byte entry
+        self.keys = array('Q', memoryview(self.mmap).cast('Q')[::ENTRY_STRUCT.size // 8])
+        if sys.byteorder == 'little':
+            self.keys.byteswap()
+
+    def __len__(self):
+        return len(self.keys)
+
+    @lru_cache(maxsize=1024)
+    def _get_entries(self, key: int):
+        """Return the entries (weight>0) of the position key and their cumulative weights."""
+        low, high = bisect_left(self.keys, key), bisect_right(self.keys, key)
+        entries = [Entry(*ENTRY_STRUCT.unpack_from(self.mmap, index * ENTRY_STRUCT.size))
+                   for index in range(low, high)]
+        entries = [entry for entry in entries if entry.weight > 0]
+        return entries, list(accumulate(entry.weight for entry in entries))
+
+    def find_all(self, board: chess.Board, exclude_moves=()):
+        """Return the legal entries of the position without the excluded moves."""
+        entries, _ = self._get_entries(zobrist_hash(board))
+        return [entry for entry in entries if self._is_allowed(entry, board, exclude_moves)]
+
+    @staticmethod
+    def _is_allowed(entry: Entry, board: chess.Board, exclude_moves):
+        move = entry.move(chess960=board.chess960)
+        return move not in exclude_moves and board.is_legal(move)
+
+    def weighted_choice(self, board: chess.Board, exclude_moves=(), random=random):
+        """Return a random entry of the position (distributed by the weights) - raise IndexError if none found."""
+        entries, cum_weights = self._get_entries(zobrist_hash(board))
+        skipped = [index for index, entry in enumerate(entries) if not self._is_allowed(entry, board, exclude_moves)]
+        total = (cum_weights[-1] if cum_weights else 0) - sum(entries[index].weight for index in skipped)
+        if total <= 0:
+            raise IndexError()
+        choice = random.randint(0, total - 1)
+        for index in skipped:  # map the choice over the (ascending) skipped weight ranges
+            if choice < cum_weights[index] - entries[index].weight:
+                break
+            choice += entries[index].weight
+        return entries[bisect_right(cum_weights, choice)]
+
+    def close(self):
+        """Close the memory map."""
+        self._get_entries.cache_clear()
+        if self.mmap is not None:
+            self.mmap.close()
+            self.mmap = None
+
+
+class OpeningBooks(object):
+
+    """All books of the library - mapped once at startup, so a book switch is just a lookup."""
+
+    def __init__(self, library: list):
+        super(OpeningBooks, self).__init__()
+        self.readers = {book['file']: BookReader(book['file']) for book in library}
+        logging.debug('mapped %i books with %i entries', len(self.readers), sum(map(len, self.readers.values())))
+
+    def get(self, file_name: str):
+        """Return the reader of the book file."""
+        if file_name not in self.readers:
+            self.readers[file_name] = BookReader(file_name)
+        return self.readers[file_name]
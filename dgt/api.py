@@ -15,11 +15,15 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
+import chess
+
 
 class BaseClass(object):
 
     """Used for creating event, message, dgt classes."""
 
+    _argnames = ()
+
     def __init__(self, classtype):
         self._type = classtype
 
@@ -27,7 +31,60 @@ class BaseClass(object):
         return self._type
 
     def __hash__(self):
-        return hash(str(self.__class__) + ": " + str(self.__dict__))
+        attrs = {key: value for key, value in self.__dict__.items() if key != '_frozen'}
+        return hash(str(self.__class__) + ": " + str(attrs))
+
+    def __setattr__(self, key, value):
+        if self.is_frozen():
+            raise AttributeError('{} is frozen - use copy() to change {}'.format(self._type, key))
+        super(BaseClass, self).__setattr__(key, value)
+
+    def __copy__(self):
+        return self.copy()
+
+    def __reduce__(self):
+        # the factory classes arent module attributes, so pickle must find them by their type
+        return _rebuild, (self._type, self.__dict__.copy())
+
+    def is_frozen(self):
+        """Return if this instance is read-only."""
+        return self.__dict__.get('_frozen', False)
+
+    def freeze(self):
+        """Make this instance (and the api instances it carries) read-only, so it can be shared between threads."""
+        # a carried board is replaced by one snapshot copy, since the sender keeps changing its own board. All
+        # receivers share this snapshot, so they must only read it - push/pop based queries like is_game_over()
+        # or is_repetition() temporarily change the move stack and must run on a private copy.
+        if not self.is_frozen():
+            for key, value in self.__dict__.items():
+                if isinstance(value, BaseClass):
+                    value.freeze()
+                elif isinstance(value, chess.BaseBoard):
+                    self.__dict__[key] = value.copy()
+            self.__dict__['_frozen'] = True
+        return self
+
+    def copy(self, **changes):
+        """Return a writable shallow copy with the given attributes changed."""
+        new = self.__class__.__new__(self.__class__)
+        new.__dict__.update(self.__dict__)
+        new.__dict__.pop('_frozen', None)
+        for key, value in changes.items():
+            if key not in self._argnames:
+                raise TypeError("argument {} not valid for {}".format(key, self.__class__.__name__))
+            setattr(new, key, value)
+        return new
+
+
+def _rebuild(classtype: str, state: dict):
+    """Return an api instance (including its frozen state) from a pickled one."""
+    newclass = _factory_classes[classtype]
+    instance = newclass.__new__(newclass)
+    instance.__dict__.update(state)
+    return instance
+
+
+_factory_classes = {}
 
 
 def ClassFactory(name, argnames, BaseClass=BaseClass):
@@ -40,7 +97,8 @@ def ClassFactory(name, argnames, BaseClass=BaseClass):
             setattr(self, key, value)
         BaseClass.__init__(self, name)
 
-    newclass = type(name, (BaseClass,), {"__init__": __init__})
+    newclass = type(name, (BaseClass,), {"__init__": __init__, "_argnames": tuple(argnames)})
+    _factory_classes[name] = newclass
     return newclass
 
 
@@ -15,18 +15,93 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-import struct
 import logging
 import subprocess
-from threading import Timer, Lock
+from threading import Timer, Lock, Condition, Event
 from fcntl import fcntl, F_GETFL, F_SETFL
 from os import O_NONBLOCK, read, path, listdir
 from serial import Serial, SerialException, STOPBITS_ONE, PARITY_NONE, EIGHTBITS
 import time
+from functools import lru_cache
 
 from dgt.util import DgtAck, DgtClk, DgtCmd, DgtMsg, ClockIcons, ClockSide, enum
 from dgt.api import Message, Dgt
-from utilities import RepeatedTimer, DisplayMsg, hms_time
+from utilities import RepeatedTimer, ScheduledTimer, DisplayMsg, hms_time
+
+# board dump piece codes => chars of the debug board (the upper nibble is ignored)
+_DUMP_TO_DEBUG = bytes.maketrans(bytes(range(256)), bytes(b'.PRNBKQprnbkq$%&'[code & 0x0f] for code in range(256)))
+# board dump piece codes => fen chars, every empty (or special piece) square becomes a "1"
+_DUMP_TO_FEN = bytes.maketrans(bytes(range(256)), bytes(b'.PRNBKQprnbkq'[code] if 0 < code < 0x0d else ord('1')
+                                                        for code in range(256)))
+
+CLOCK_ACK_TIMEOUT = 2  # secs to wait for a clock ACK before resending the clock command
+BOARD_COMMAND_PACE = 0.1  # secs the board needs to process a (non clock) command
+
+# all bytes without bit 7 set (only message ids have it) - for finding a message id with bytes.translate
+_LOW_BYTES = bytes(range(0x80))
+
+
+@lru_cache(maxsize=256)
+def _dump_to_fen(dump: bytes):
+    """Return the (NOT flipped) board fen of a board dump - the same dumps repeat a lot during sliding."""
+    squares = dump.translate(_DUMP_TO_FEN).decode()
+    fen = '/'.join(squares[i:i + 8] for i in range(0, 64, 8))
+    for empty in range(8, 1, -1):
+        fen = fen.replace('1' * empty, str(empty))
+    return fen
+
+
+# chars => 7-segment codes of the XL clock
+_CHAR_TO_XL = {
+    '0': 0x3f, '1': 0x06, '2': 0x5b, '3': 0x4f, '4': 0x66, '5': 0x6d, '6': 0x7d, '7': 0x07, '8': 0x7f,
+    '9': 0x6f, 'a': 0x5f, 'b': 0x7c, 'c': 0x58, 'd': 0x5e, 'e': 0x7b, 'f': 0x71, 'g': 0x3d, 'h': 0x74,
+    'i': 0x10, 'j': 0x1e, 'k': 0x75, 'l': 0x38, 'm': 0x55, 'n': 0x54, 'o': 0x5c, 'p': 0x73, 'q': 0x67,
+    'r': 0x50, 's': 0x6d, 't': 0x78, 'u': 0x3e, 'v': 0x2a, 'w': 0x7e, 'x': 0x64, 'y': 0x6e, 'z': 0x5b,
+    ' ': 0x00, '-': 0x40, '/': 0x52, '|': 0x36, '\\': 0x64, '?': 0x53, '@': 0x65, '=': 0x48, '_': 0x08
+}
+
+
+@lru_cache(maxsize=256)
+def _encode_command(message: tuple):
+    """Return the bytes of a command made of ints, enums and (7-segment) strings."""
+    command = bytearray()
+    for item in message:
+        if isinstance(item, int):
+            command.append(item)
+        elif isinstance(item, enum.Enum):
+            command.append(item.value)
+        elif isinstance(item, str):
+            command.extend(_CHAR_TO_XL[character] for character in item.lower())
+        else:
+            raise TypeError(type(item))
+    return bytes(command)
+
+
+def _icons_to_xl(icons: ClockIcons):
+    if icons == ClockIcons.DOT:
+        return 0x01
+    if icons == ClockIcons.COLON:
+        return 0x02
+    return 0x00
+
+
+@lru_cache(maxsize=256)
+def clock_text_command(clock: str, text: str, beep: int, left_icons=ClockIcons.NONE, right_icons=ClockIcons.NONE):
+    """Return the command (bytes) displaying the text on a "xl", "3k" or "rev" (Pi enabled Rev2) clock."""
+    if clock == 'xl':
+        text = text.ljust(6)
+        icn = (_icons_to_xl(right_icons) & 0x07) | (_icons_to_xl(left_icons) << 3) & 0x38
+        return _encode_command((DgtCmd.DGT_CLOCK_MESSAGE, 0x0b, DgtClk.DGT_CMD_CLOCK_START_MESSAGE,
+                                DgtClk.DGT_CMD_CLOCK_DISPLAY,
+                                text[2], text[1], text[0], text[5], text[4], text[3], icn, beep,
+                                DgtClk.DGT_CMD_CLOCK_END_MESSAGE))
+    if clock == '3k':
+        return _encode_command((DgtCmd.DGT_CLOCK_MESSAGE, 0x0c, DgtClk.DGT_CMD_CLOCK_START_MESSAGE,
+                                DgtClk.DGT_CMD_CLOCK_ASCII) + tuple(bytes(text.ljust(8), 'utf-8')[:8]) +
+                               (beep, DgtClk.DGT_CMD_CLOCK_END_MESSAGE))
+    return _encode_command((DgtCmd.DGT_CLOCK_MESSAGE, 0x0f, DgtClk.DGT_CMD_CLOCK_START_MESSAGE,
+                            DgtClk.DGT_CMD_REV2_ASCII) + tuple(bytes(text.ljust(11), 'utf-8')[:11]) +
+                           (beep, DgtClk.DGT_CMD_CLOCK_END_MESSAGE))
 
 
 class DgtBoard(object):
@@ -47,11 +122,17 @@ class DgtBoard(object):
         self.field_factor = field_factor % 10
 
         self.serial = None
+        self.serial_ready = Event()  # set while a serial connection is open
         self.lock = Lock()  # lock the serial write
+        self.board_pace = 0  # monotonic time the board can take the next command
         self.incoming_board_thread = None
+        self.read_buffer = bytearray()  # received serial bytes, not yet parsed to a board message
+        self.skip_bytes = 0  # bytes of a falsely requested EE_MOVES result still to ignore
+        self.skip_time = 0
         self.lever_pos = None
         # the next three are only used for "not dgtpi" mode
-        self.clock_lock = False  # serial connected clock is locked
+        self.clock_lock = False  # serial connected clock is locked (time of the last clock command)
+        self.clock_ack = Condition()  # notified when the clock ACK arrives (clock_lock released)
         self.last_clock_command = []  # Used for resend last (failed) clock command
         self.enable_ser_clock = None  # None = "unknown status" False="only board found" True="clock also found"
         self.watchdog_timer = RepeatedTimer(1, self._watchdog)
@@ -82,7 +163,8 @@ class DgtBoard(object):
         """Board position hasnt changed for some time."""
         logging.debug('board position now stable => ask for complete board')
         self.field_timer_running = False
-        self.write_command([DgtCmd.DGT_SEND_BRD])  # Ask for the board when a piece moved
+        # a timer_scheduler worker - dont wait for a closed port, the reconnect asks for the board anyway
+        self.write_command([DgtCmd.DGT_SEND_BRD], block=False)  # Ask for the board when a piece moved
 
     def stop_field_timer(self):
         """Stop the field timer cause another field change been send."""
@@ -98,72 +180,64 @@ class DgtBoard(object):
         else:
             wait = (0.5 if self.channel == 'BT' else 0.25) + 0.03 * self.field_factor  # BT's scanning in half speed
         logging.debug('board position changed => wait %.2fsecs for a stable result low_time: %s', wait, self.low_time)
-        self.field_timer = Timer(wait, self.expired_field_timer)
+        self.field_timer = ScheduledTimer(wait, self.expired_field_timer)
         self.field_timer.start()
         self.field_timer_running = True
 
-    def write_command(self, message: list):
-        """Write the message list to the dgt board."""
-        mes = message[3] if message[0].value == DgtCmd.DGT_CLOCK_MESSAGE.value else message[0]
-        if not mes == DgtCmd.DGT_RETURN_SERIALNR:
-            logging.debug('(ser) board put [%s] length: %i', mes, len(message))
-            if mes.value == DgtClk.DGT_CMD_CLOCK_ASCII.value:
-                logging.debug('sending text [%s] to (ser) clock', ''.join([chr(elem) for elem in message[4:12]]))
-            if mes.value == DgtClk.DGT_CMD_REV2_ASCII.value:
-                logging.debug('sending text [%s] to (rev) clock', ''.join([chr(elem) for elem in message[4:15]]))
-
-        array = []
-        char_to_xl = {
-            '0': 0x3f, '1': 0x06, '2': 0x5b, '3': 0x4f, '4': 0x66, '5': 0x6d, '6': 0x7d, '7': 0x07, '8': 0x7f,
-            '9': 0x6f, 'a': 0x5f, 'b': 0x7c, 'c': 0x58, 'd': 0x5e, 'e': 0x7b, 'f': 0x71, 'g': 0x3d, 'h': 0x74,
-            'i': 0x10, 'j': 0x1e, 'k': 0x75, 'l': 0x38, 'm': 0x55, 'n': 0x54, 'o': 0x5c, 'p': 0x73, 'q': 0x67,
-            'r': 0x50, 's': 0x6d, 't': 0x78, 'u': 0x3e, 'v': 0x2a, 'w': 0x7e, 'x': 0x64, 'y': 0x6e, 'z': 0x5b,
-            ' ': 0x00, '-': 0x40, '/': 0x52, '|': 0x36, '\\': 0x64, '?': 0x53, '@': 0x65, '=': 0x48, '_': 0x08
-        }
-        for item in message:
-            if isinstance(item, int):
-                array.append(item)
-            elif isinstance(item, enum.Enum):
-                array.append(item.value)
-            elif isinstance(item, str):
-                for character in item:
-                    array.append(char_to_xl[character.lower()])
-            else:
-                logging.error('type not supported [%s]', type(item))
+    def write_command(self, message, block=True):
+        """Write the message list (or an already encoded command) to the dgt board - False if not written."""
+        if isinstance(message, bytes):
+            command = message
+        else:
+            try:
+                command = _encode_command(tuple(message))
+            except TypeError as exc:
+                logging.error('type not supported [%s]', exc)
+                return False
+            except ValueError:
+                logging.error('invalid bytes sent %s', message)
                 return False
+        is_clock = command[0] == DgtCmd.DGT_CLOCK_MESSAGE.value
+        if is_clock or command[0] != DgtCmd.DGT_RETURN_SERIALNR.value:
+            mes = DgtClk(command[3]) if is_clock else DgtCmd(command[0])
+            logging.debug('(ser) board put [%s] length: %i', mes, len(command))
+            if is_clock and command[3] == DgtClk.DGT_CMD_CLOCK_ASCII.value:
+                logging.debug('sending text [%s] to (ser) clock', command[4:12].decode('latin-1'))
+            if is_clock and command[3] == DgtClk.DGT_CMD_REV2_ASCII.value:
+                logging.debug('sending text [%s] to (rev) clock', command[4:15].decode('latin-1'))
 
         while True:
             if self.serial:
                 with self.lock:
+                    pace = self.board_pace - time.monotonic()
+                    if pace > 0:
+                        time.sleep(pace)  # give the board some time to process the former command
                     try:
-                        self.serial.write(bytearray(array))
+                        self.serial.write(command)
+                        if not is_clock:
+                            self.board_pace = time.monotonic() + BOARD_COMMAND_PACE
                         break
-                    except ValueError:
-                        logging.error('invalid bytes sent %s', message)
-                        return False
                     except SerialException as write_expection:
                         logging.error(write_expection)
-                        self.serial.close()
-                        self.serial = None
+                        self._close_serial()
                     except IOError as write_expection:
                         logging.error(write_expection)
-                        self.serial.close()
-                        self.serial = None
-            if mes == DgtCmd.DGT_RETURN_SERIALNR:
+                        self._close_serial()
+            if command[0] == DgtCmd.DGT_RETURN_SERIALNR.value:
                 break
-            time.sleep(0.1)
-
-        if message[0] == DgtCmd.DGT_SET_LEDS:
-            logging.debug('(rev) leds turned %s', 'on' if message[2] else 'off')
-        if message[0] == DgtCmd.DGT_CLOCK_MESSAGE:
-            self.last_clock_command = message
+            if not block:
+                return False  # the serial port is down - dont wait for it
+            self.serial_ready.wait()
+
+        if command[0] == DgtCmd.DGT_SET_LEDS.value:
+            logging.debug('(rev) leds turned %s', 'on' if command[2] else 'off')
+        if is_clock:
+            self.last_clock_command = command
             if self.clock_lock:
                 logging.warning('(ser) clock is already locked. Maybe a "resend"?')
             else:
                 logging.debug('(ser) clock is locked now')
             self.clock_lock = time.time()
-        else:
-            time.sleep(0.1)  # give the board some time to process the command
         return True
 
     def _process_board_message(self, message_id: int, message: tuple, message_length: int):
@@ -219,9 +293,9 @@ class DgtBoard(object):
                 else:
                     logging.debug('(ser) clock ACK okay [%s]', DgtAck(ack1))
                     if self.last_clock_command:
-                        cmd = self.last_clock_command[3]  # type: DgtClk
-                        if cmd.value != ack1 and ack1 < 0x80:
-                            logging.warning('(ser) clock ACK [%s] out of sync - last: [%s]', DgtAck(ack1), cmd)
+                        cmd = self.last_clock_command[3]
+                        if cmd != ack1 and ack1 < 0x80:
+                            logging.warning('(ser) clock ACK [%s] out of sync - last: [%s]', DgtAck(ack1), DgtClk(cmd))
                 # @todo these lines are better as what is done on DgtHw but it doesnt work
                 # if ack1 == DgtAck.DGT_ACK_CLOCK_SETNRUN.value:
                 #     logging.info('(ser) clock out of set time now')
@@ -258,7 +332,8 @@ class DgtBoard(object):
                     sub = ack2 & 0x0f
                     logging.debug('(ser) clock version %0.2f', float(str(main) + '.' + str(sub)))
                     if self.bconn_text:
-                        self.bconn_text.devs = {'ser'}  # Now send the (delayed) message to serial clock
+                        # Now send the (delayed) message to serial clock
+                        self.bconn_text = self.bconn_text.copy(devs={'ser'})
                         dev = 'ser'
                     else:
                         dev = 'err'
@@ -321,37 +396,15 @@ class DgtBoard(object):
                 logging.debug('(ser) clock null message ignored')
             if self.clock_lock:
                 logging.debug('(ser) clock unlocked after %.3f secs', time.time() - self.clock_lock)
-                self.clock_lock = False
+                self._unlock_clock()
 
         elif message_id == DgtMsg.DGT_MSG_BOARD_DUMP:
             if message_length != 64:
                 logging.warning('illegal length in data')
-            piece_to_char = {
-                0x01: 'P', 0x02: 'R', 0x03: 'N', 0x04: 'B', 0x05: 'K', 0x06: 'Q',
-                0x07: 'p', 0x08: 'r', 0x09: 'n', 0x0a: 'b', 0x0b: 'k', 0x0c: 'q',
-                0x0d: '$', 0x0e: '%', 0x0f: '&', 0x00: '.'
-            }
-            board = ''
-            for character in message:
-                board += piece_to_char[character & 0x0f]
+            dump = bytes(message)
+            board = dump.translate(_DUMP_TO_DEBUG).decode()
             logging.debug('\n' + '\n'.join(board[0 + i:8 + i] for i in range(0, len(board), 8)))  # Show debug board
-            # Create fen from board
-            fen = ''
-            empty = 0
-            for square in range(0, 64):
-                if message[square] != 0 and message[square] < 0x0d:  # @todo for the moment ignore the special pieces
-                    if empty > 0:
-                        fen += str(empty)
-                        empty = 0
-                    fen += piece_to_char[message[square] & 0x0f]
-                else:
-                    empty += 1
-                if (square + 1) % 8 == 0:
-                    if empty > 0:
-                        fen += str(empty)
-                        empty = 0
-                    if square < 63:
-                        fen += '/'
+            fen = _dump_to_fen(dump)
 
             # Attention! This fen is NOT flipped
             logging.debug('raw fen [%s]', fen)
@@ -384,86 +437,101 @@ class DgtBoard(object):
         else:  # Default
             logging.warning('message not handled [%s]', DgtMsg(message_id))
 
-    def _read_serial(self, bytes_toread=1):
+    def _read_serial(self):
+        """Read all waiting bytes - if there are none, wait (serial timeout) for the first one."""
         try:
-            return self.serial.read(bytes_toread)
-        except SerialException:
+            return self.serial.read(max(1, self.serial.in_waiting))
+        except (SerialException, IOError):
             pass
         except AttributeError:  # serial is None (race condition)
             pass
         return b''
 
-    def _read_board_message(self, head: bytes):
-        message = ()
-        header_len = 3
-        header = head + self._read_serial(header_len - 1)
-        try:
-            header = struct.unpack('>BBB', header)
-        except struct.error:
-            logging.warning('timeout in header reading')
-            return message
-        message_id = header[0]
-        message_length = counter = (header[1] << 7) + header[2] - header_len
-        if message_length <= 0 or message_length > 64:
-            if message_id == 0x8f and message_length == 0x1f00:  # @todo find out why this can happen
-                logging.warning('falsely DGT_SEND_EE_MOVES send before => receive and ignore EE_MOVES result')
-                self.watchdog_timer.stop()  # this serial read gonna take around 8secs
-                now = time.time()
-                while counter > 0:
-                    ee_moves = self._read_serial(counter)
-                    logging.info('EE_MOVES 0x%x bytes read - inWaiting: 0x%x', len(ee_moves), self.serial.inWaiting())
-                    counter -= len(ee_moves)
-                    if time.time() - now > 15:
-                        logging.warning('EE_MOVES needed over 15secs => ignore not readed 0x%x bytes now', counter)
-                        break
-                self.watchdog_timer.start()
-            else:
-                logging.warning('illegal length in message header 0x%x length: %i', message_id, message_length)
-            return message
-
-        try:
-            if not message_id == DgtMsg.DGT_MSG_SERIALNR:
-                logging.debug('(ser) board get [%s] length: %i', DgtMsg(message_id), message_length)
-        except ValueError:
-            logging.warning('illegal id in message header 0x%x length: %i', message_id, message_length)
-            return message
-
-        while counter:
-            byte = self._read_serial()
-            try:
-                if byte:
-                    data = struct.unpack('>B', byte)
-                    counter -= 1
-                    if data[0] & 0x80:
-                        logging.warning('illegal data in message 0x%x found', message_id)
-                        logging.warning('ignore collected message data %s', message)
-                        return self._read_board_message(byte)
-                    message += data
+    def _skip_ee_moves(self):
+        count = min(self.skip_bytes, len(self.read_buffer))
+        del self.read_buffer[:count]
+        self.skip_bytes -= count
+        if not self.skip_bytes:
+            logging.info('EE_MOVES read after %.1f secs', time.time() - self.skip_time)
+        elif time.time() - self.skip_time > 15:
+            logging.warning('EE_MOVES needed over 15secs => ignore not readed 0x%x bytes now', self.skip_bytes)
+            self.skip_bytes = 0
+        if not self.skip_bytes:
+            self.watchdog_timer.start()
+
+    def _parse_board_messages(self):
+        """Process the complete board messages inside the read buffer and remove them from it."""
+        buffer = self.read_buffer
+        while buffer:
+            if self.skip_bytes:
+                self._skip_ee_moves()
+                continue
+            high_bytes = buffer.translate(None, _LOW_BYTES)  # a message starts with a message id (bit 7 set)
+            if not high_bytes:
+                buffer.clear()
+                break
+            del buffer[:buffer.index(high_bytes[0])]
+            if len(buffer) < 3:
+                break
+            if buffer[1] & 0x80 or buffer[2] & 0x80:
+                # a partial header, cut off by the next message id => resync at that one
+                logging.warning('incomplete message header 0x%x found', buffer[0])
+                del buffer[:1 if buffer[1] & 0x80 else 2]
+                continue
+            message_id = buffer[0]
+            message_length = (buffer[1] << 7) + buffer[2] - 3
+            if message_length <= 0 or message_length > 64:
+                if message_id == 0x8f and message_length == 0x1f00:  # @todo find out why this can happen
+                    logging.warning('falsely DGT_SEND_EE_MOVES send before => receive and ignore EE_MOVES result')
+                    self.watchdog_timer.stop()  # this serial read gonna take around 8secs
+                    self.skip_bytes = message_length
+                    self.skip_time = time.time()
                 else:
-                    logging.warning('timeout in data reading')
-            except struct.error:
-                logging.warning('struct error => maybe a reconnected board?')
-
-        self._process_board_message(message_id, message, message_length)
-        return message
+                    logging.warning('illegal length in message header 0x%x length: %i', message_id, message_length)
+                del buffer[:3]
+                continue
+            try:
+                if not message_id == DgtMsg.DGT_MSG_SERIALNR:
+                    logging.debug('(ser) board get [%s] length: %i', DgtMsg(message_id), message_length)
+            except ValueError:
+                logging.warning('illegal id in message header 0x%x length: %i', message_id, message_length)
+                del buffer[:3]
+                continue
+            data = buffer[3:3 + message_length]
+            high_bytes = data.translate(None, _LOW_BYTES)
+            if high_bytes:
+                logging.warning('illegal data in message 0x%x found', message_id)
+                logging.warning('ignore collected message data %s', tuple(data[:data.index(high_bytes[0])]))
+                del buffer[:3 + data.index(high_bytes[0])]
+                continue
+            if len(data) < message_length:
+                break  # wait for the rest of the message
+            del buffer[:3 + message_length]
+            self._process_board_message(message_id, tuple(data), message_length)
 
     def _process_incoming_board_forever(self):
         counter = 0
         logging.info('incoming_board ready')
         while True:
-            byte = b''
+            data = b''
             if self.serial:
-                byte = self._read_serial()
+                data = self._read_serial()
             else:
                 self._setup_serial_port()
                 if self.serial:
                     logging.debug('sleeping for 0.5 secs. Afterwards startup the (ser) board')
                     time.sleep(0.5)
                     counter = 0
+                    self.read_buffer.clear()
                     self._startup_serial_board()
-            if byte and byte[0] & 0x80:
-                self._read_board_message(head=byte)
+            if data:
+                self.read_buffer += data
+                self._parse_board_messages()
             else:
+                if self.skip_bytes:
+                    self._skip_ee_moves()
+                elif self.read_buffer:
+                    logging.warning('timeout in data reading')
                 counter = (counter + 1) % 10
                 if counter == 0 and not self.watchdog_timer.is_running():
                     self._watchdog()  # issue 150 - check for alive connection, so write something to the board
@@ -475,7 +543,7 @@ class DgtBoard(object):
 
     def startup_serial_clock(self):
         """Ask the clock for its version."""
-        self.clock_lock = False
+        self._unlock_clock()
         self.enable_ser_clock = False
         command = [DgtCmd.DGT_CLOCK_MESSAGE, 0x03, DgtClk.DGT_CMD_CLOCK_START_MESSAGE,
                    DgtClk.DGT_CMD_CLOCK_VERSION, DgtClk.DGT_CMD_CLOCK_END_MESSAGE]
@@ -487,11 +555,7 @@ class DgtBoard(object):
 
     def _watchdog(self):
         if self.clock_lock and not self.is_pi:
-            if time.time() - self.clock_lock > 2:
-                logging.warning('(ser) clock is locked over 2secs')
-                logging.debug('resending locked (ser) clock message [%s]', self.last_clock_command)
-                self.clock_lock = False
-                self.write_command(self.last_clock_command)
+            self._resend_clock_command(block=False)  # runs on a timer_scheduler worker - dont wait for the port
         self.write_command([DgtCmd.DGT_RETURN_SERIALNR])  # ask for this AFTER cause of - maybe - old board hardware
 
     def _open_bluetooth(self):
@@ -649,8 +713,14 @@ class DgtBoard(object):
             self.serial = Serial(device, stopbits=STOPBITS_ONE, parity=PARITY_NONE, bytesize=EIGHTBITS, timeout=0.5)
         except SerialException:
             return False
+        self.serial_ready.set()
         return True
 
+    def _close_serial(self):
+        self.serial_ready.clear()
+        self.serial.close()
+        self.serial = None
+
     def _setup_serial_port(self):
         def _success(device: str):
             self.device = device
@@ -686,56 +756,59 @@ class DgtBoard(object):
         return False
 
     # dgtHw functions start
+    def _unlock_clock(self):
+        with self.clock_ack:
+            self.clock_lock = False
+            self.clock_ack.notify_all()
+
+    def _resend_clock_command(self, block=True):
+        """Resend the clock command once its ACK is overdue - give up if that happened already."""
+        with self.clock_ack:
+            if not self.clock_lock or time.time() - self.clock_lock < CLOCK_ACK_TIMEOUT:
+                return  # ACK arrived or resent by another thread meanwhile
+            logging.warning('(ser) clock is locked over %isecs', CLOCK_ACK_TIMEOUT)
+            command = self.last_clock_command
+            if not command:
+                logging.warning('(ser) clock still not answering => unlock it')
+                self.clock_lock = False
+                self.clock_ack.notify_all()
+                return
+            self.clock_lock = time.time()  # dont let other threads send (or resend) in between
+        logging.debug('resending locked (ser) clock message [%s]', command)
+        if self.write_command(command, block):
+            self.last_clock_command = []  # only resend once
+
     def _wait_for_clock(self, func: str):
         has_to_wait = False
-        counter = 0
-        while self.clock_lock:
-            if not has_to_wait:
-                has_to_wait = True
-                logging.debug('(ser) clock is locked => waiting to serve: %s', func)
-            time.sleep(0.1)
-            counter = (counter + 1) % 30
-            if counter == 0:
-                logging.warning('(ser) clock is locked over 3secs')
+        while True:
+            with self.clock_ack:
+                if not self.clock_lock:
+                    break
+                if not has_to_wait:
+                    has_to_wait = True
+                    logging.debug('(ser) clock is locked => waiting to serve: %s', func)
+                timeout = self.clock_lock + CLOCK_ACK_TIMEOUT - time.time()
+                if timeout > 0:
+                    self.clock_ack.wait(timeout)
+                    continue
+            self._resend_clock_command()
         if has_to_wait:
             logging.debug('(ser) clock is released now')
 
     def set_text_rp(self, text: str, beep: int):
         """Display a text on a Pi enabled Rev2."""
         self._wait_for_clock('SetTextRp()')
-        res = self.write_command([DgtCmd.DGT_CLOCK_MESSAGE, 0x0f, DgtClk.DGT_CMD_CLOCK_START_MESSAGE,
-                                  DgtClk.DGT_CMD_REV2_ASCII,
-                                  text[0], text[1], text[2], text[3], text[4], text[5], text[6], text[7],
-                                  text[8], text[9], text[10], beep,
-                                  DgtClk.DGT_CMD_CLOCK_END_MESSAGE])
-        return res
+        return self.write_command(clock_text_command('rev', text, beep))
 
     def set_text_3k(self, text: str, beep: int):
         """Display a text on a 3000 Clock."""
         self._wait_for_clock('SetText3K()')
-        res = self.write_command([DgtCmd.DGT_CLOCK_MESSAGE, 0x0c, DgtClk.DGT_CMD_CLOCK_START_MESSAGE,
-                                  DgtClk.DGT_CMD_CLOCK_ASCII,
-                                  text[0], text[1], text[2], text[3], text[4], text[5], text[6], text[7], beep,
-                                  DgtClk.DGT_CMD_CLOCK_END_MESSAGE])
-        return res
+        return self.write_command(clock_text_command('3k', text, beep))
 
     def set_text_xl(self, text: str, beep: int, left_icons=ClockIcons.NONE, right_icons=ClockIcons.NONE):
         """Display a text on a XL clock."""
-        def _transfer(icons: ClockIcons):
-            result = 0
-            if icons == ClockIcons.DOT:
-                result = 0x01
-            if icons == ClockIcons.COLON:
-                result = 0x02
-            return result
-
         self._wait_for_clock('SetTextXL()')
-        icn = (_transfer(right_icons) & 0x07) | (_transfer(left_icons) << 3) & 0x38
-        res = self.write_command([DgtCmd.DGT_CLOCK_MESSAGE, 0x0b, DgtClk.DGT_CMD_CLOCK_START_MESSAGE,
-                                  DgtClk.DGT_CMD_CLOCK_DISPLAY,
-                                  text[2], text[1], text[0], text[5], text[4], text[3], icn, beep,
-                                  DgtClk.DGT_CMD_CLOCK_END_MESSAGE])
-        return res
+        return self.write_command(clock_text_command('xl', text, beep, left_icons, right_icons))
 
     def set_and_run(self, lr: int, lh: int, lm: int, ls: int, rr: int, rh: int, rm: int, rs: int):
         """Set the clock with times and let it run."""
@@ -16,31 +16,131 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 from math import floor
+from functools import lru_cache
 import logging
 import copy
 import queue
 import threading
 
 import chess
-from utilities import DisplayMsg, Observable, DispatchDgt, write_picochess_ini
+from utilities import DisplayMsg, Observable, DispatchDgt, HandlerRegistry, write_picochess_ini, bus_monitor
 from dgt.translate import DgtTranslate
 from dgt.menu import DgtMenu
-from dgt.util import ClockSide, ClockIcons, BeepLevel, Mode, GameResult, TimeMode, PlayMode
+from dgt.util import ClockSide, ClockIcons, BeepLevel, Mode, GameResult, TimeMode, PlayMode, MapFen
 from dgt.api import Dgt, Event, Message
 from timecontrol import TimeControl
 
 
+# special board positions - see MapFen
+_LEVEL_MAP = ('rnbqkbnr/pppppppp/8/q7/8/8/PPPPPPPP/RNBQKBNR',
+              'rnbqkbnr/pppppppp/8/1q6/8/8/PPPPPPPP/RNBQKBNR',
+              'rnbqkbnr/pppppppp/8/2q5/8/8/PPPPPPPP/RNBQKBNR',
+              'rnbqkbnr/pppppppp/8/3q4/8/8/PPPPPPPP/RNBQKBNR',
+              'rnbqkbnr/pppppppp/8/4q3/8/8/PPPPPPPP/RNBQKBNR',
+              'rnbqkbnr/pppppppp/8/5q2/8/8/PPPPPPPP/RNBQKBNR',
+              'rnbqkbnr/pppppppp/8/6q1/8/8/PPPPPPPP/RNBQKBNR',
+              'rnbqkbnr/pppppppp/8/7q/8/8/PPPPPPPP/RNBQKBNR')
+
+_BOOK_MAP = ('rnbqkbnr/pppppppp/8/8/8/q7/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/8/1q6/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/8/2q5/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/8/3q4/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/8/4q3/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/8/5q2/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/8/6q1/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/8/7q/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/q7/8/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/1q6/8/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/2q5/8/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/3q4/8/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/4q3/8/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/5q2/8/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/6q1/8/PPPPPPPP/RNBQKBNR',
+             'rnbqkbnr/pppppppp/8/8/7q/8/PPPPPPPP/RNBQKBNR')
+
+_ENGINE_MAP = ('rnbqkbnr/pppppppp/q7/8/8/8/PPPPPPPP/RNBQKBNR',
+               'rnbqkbnr/pppppppp/1q6/8/8/8/PPPPPPPP/RNBQKBNR',
+               'rnbqkbnr/pppppppp/2q5/8/8/8/PPPPPPPP/RNBQKBNR',
+               'rnbqkbnr/pppppppp/3q4/8/8/8/PPPPPPPP/RNBQKBNR',
+               'rnbqkbnr/pppppppp/4q3/8/8/8/PPPPPPPP/RNBQKBNR',
+               'rnbqkbnr/pppppppp/5q2/8/8/8/PPPPPPPP/RNBQKBNR',
+               'rnbqkbnr/pppppppp/6q1/8/8/8/PPPPPPPP/RNBQKBNR',
+               'rnbqkbnr/pppppppp/7q/8/8/8/PPPPPPPP/RNBQKBNR')
+
+_SHUTDOWN_MAP = ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQQBNR',
+                 'RNBQQBNR/PPPPPPPP/8/8/8/8/pppppppp/rnbkqbnr',
+                 '8/8/8/8/8/8/8/3QQ3',
+                 '3QQ3/8/8/8/8/8/8/8')
+
+_REBOOT_MAP = ('rnbqqbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR',
+               'RNBKQBNR/PPPPPPPP/8/8/8/8/pppppppp/rnbqqbnr',
+               '8/8/8/8/8/8/8/3qq3',
+               '3qq3/8/8/8/8/8/8/8')
+
+_MODE_MAP = {'rnbqkbnr/pppppppp/8/Q7/8/8/PPPPPPPP/RNBQKBNR': Mode.NORMAL,
+             'rnbqkbnr/pppppppp/8/1Q6/8/8/PPPPPPPP/RNBQKBNR': Mode.BRAIN,
+             'rnbqkbnr/pppppppp/8/2Q5/8/8/PPPPPPPP/RNBQKBNR': Mode.ANALYSIS,
+             'rnbqkbnr/pppppppp/8/3Q4/8/8/PPPPPPPP/RNBQKBNR': Mode.KIBITZ,
+             'rnbqkbnr/pppppppp/8/4Q3/8/8/PPPPPPPP/RNBQKBNR': Mode.OBSERVE,
+             'rnbqkbnr/pppppppp/8/5Q2/8/8/PPPPPPPP/RNBQKBNR': Mode.PONDER,
+             'rnbqkbnr/pppppppp/8/7Q/8/8/PPPPPPPP/RNBQKBNR': Mode.REMOTE}
+
+_DRAWRESIGN_MAP = {'8/8/8/3k4/4K3/8/8/8': GameResult.WIN_WHITE,
+                   '8/8/8/3K4/4k3/8/8/8': GameResult.WIN_WHITE,
+                   '8/8/8/4k3/3K4/8/8/8': GameResult.WIN_BLACK,
+                   '8/8/8/4K3/3k4/8/8/8': GameResult.WIN_BLACK,
+                   '8/8/8/3kK3/8/8/8/8': GameResult.DRAW,
+                   '8/8/8/3Kk3/8/8/8/8': GameResult.DRAW,
+                   '8/8/8/8/3kK3/8/8/8': GameResult.DRAW,
+                   '8/8/8/8/3Kk3/8/8/8': GameResult.DRAW}
+
+# all chess960 start positions (518 = standard chess) seen from white and (reversed fen) from black
+_START_FENS = {chess.Board.from_chess960_pos(pos).board_fen(): pos for pos in range(960)}
+_START_FENS_REVERSED = {fen[::-1]: pos for fen, pos in _START_FENS.items()}
+
+
+def _build_map_fens():
+    map_fens = {}  # board fen => (MapFen, map index or value)
+    for map_type, fens in ((MapFen.LEVEL, _LEVEL_MAP), (MapFen.BOOK, _BOOK_MAP), (MapFen.ENGINE, _ENGINE_MAP),
+                           (MapFen.SHUTDOWN, _SHUTDOWN_MAP), (MapFen.REBOOT, _REBOOT_MAP)):
+        for index, fen in enumerate(fens):
+            map_fens[fen] = (map_type, index)
+    for fen, mode in _MODE_MAP.items():
+        map_fens[fen] = (MapFen.MODE, mode)
+    return map_fens
+
+
+_MAP_FENS = _build_map_fens()
+
+
+@lru_cache(maxsize=256)
+def _classify_fen(fen: str):
+    """Return (MapFen, value) for a special board fen or (None, None) for a normal position."""
+    if fen in _MAP_FENS:
+        return _MAP_FENS[fen]
+    ranks = fen.split('/')
+    if len(ranks) == 8:
+        drawresign_fen = '8/8/8/' + ranks[3] + '/' + ranks[4] + '/8/8/8'  # only the kings at the board center count
+        if drawresign_fen in _DRAWRESIGN_MAP:
+            return MapFen.DRAWRESIGN, _DRAWRESIGN_MAP[drawresign_fen]
+    if fen in _START_FENS:
+        return MapFen.NEW_GAME, _START_FENS[fen]
+    return None, None
+
+
 class DgtDisplay(DisplayMsg, threading.Thread):
 
     """Dispatcher for Messages towards DGT hardware or back to the event system (picochess)."""
 
+    handlers = HandlerRegistry()  # Message class => _process_xxx() method
+
     def __init__(self, dgttranslate: DgtTranslate, dgtmenu: DgtMenu, time_control: TimeControl):
         super(DgtDisplay, self).__init__()
+        self.subscribe(self.handlers.api_classes())
         self.dgttranslate = dgttranslate
         self.dgtmenu = dgtmenu
         self.time_control = time_control
 
-        self.drawresign_fen = None
         self.show_move_or_value = 0
         self.leds_are_on = False
 
@@ -212,6 +312,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             self.play_turn = None
             Observable.fire(Event.SWITCH_SIDES())
 
+    @handlers.handles(Message.DGT_BUTTON)
     def _process_button(self, message):
         button = int(message.button)
         if not self.dgtmenu.get_engine_restart():
@@ -233,74 +334,10 @@ class DgtDisplay(DisplayMsg, threading.Thread):
                 self._process_lever(right_side_down=False, dev=message.dev)
 
     def _process_fen(self, fen, raw):
-        level_map = ('rnbqkbnr/pppppppp/8/q7/8/8/PPPPPPPP/RNBQKBNR',
-                     'rnbqkbnr/pppppppp/8/1q6/8/8/PPPPPPPP/RNBQKBNR',
-                     'rnbqkbnr/pppppppp/8/2q5/8/8/PPPPPPPP/RNBQKBNR',
-                     'rnbqkbnr/pppppppp/8/3q4/8/8/PPPPPPPP/RNBQKBNR',
-                     'rnbqkbnr/pppppppp/8/4q3/8/8/PPPPPPPP/RNBQKBNR',
-                     'rnbqkbnr/pppppppp/8/5q2/8/8/PPPPPPPP/RNBQKBNR',
-                     'rnbqkbnr/pppppppp/8/6q1/8/8/PPPPPPPP/RNBQKBNR',
-                     'rnbqkbnr/pppppppp/8/7q/8/8/PPPPPPPP/RNBQKBNR')
-
-        book_map = ('rnbqkbnr/pppppppp/8/8/8/q7/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/8/1q6/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/8/2q5/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/8/3q4/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/8/4q3/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/8/5q2/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/8/6q1/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/8/7q/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/q7/8/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/1q6/8/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/2q5/8/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/3q4/8/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/4q3/8/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/5q2/8/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/6q1/8/PPPPPPPP/RNBQKBNR',
-                    'rnbqkbnr/pppppppp/8/8/7q/8/PPPPPPPP/RNBQKBNR')
-
-        engine_map = ('rnbqkbnr/pppppppp/q7/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'rnbqkbnr/pppppppp/1q6/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'rnbqkbnr/pppppppp/2q5/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'rnbqkbnr/pppppppp/3q4/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'rnbqkbnr/pppppppp/4q3/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'rnbqkbnr/pppppppp/5q2/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'rnbqkbnr/pppppppp/6q1/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'rnbqkbnr/pppppppp/7q/8/8/8/PPPPPPPP/RNBQKBNR')
-
-        shutdown_map = ('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQQBNR',
-                        'RNBQQBNR/PPPPPPPP/8/8/8/8/pppppppp/rnbkqbnr',
-                        '8/8/8/8/8/8/8/3QQ3',
-                        '3QQ3/8/8/8/8/8/8/8')
-
-        reboot_map = ('rnbqqbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR',
-                      'RNBKQBNR/PPPPPPPP/8/8/8/8/pppppppp/rnbqqbnr',
-                      '8/8/8/8/8/8/8/3qq3',
-                      '3qq3/8/8/8/8/8/8/8')
-
-        mode_map = {'rnbqkbnr/pppppppp/8/Q7/8/8/PPPPPPPP/RNBQKBNR': Mode.NORMAL,
-                    'rnbqkbnr/pppppppp/8/1Q6/8/8/PPPPPPPP/RNBQKBNR': Mode.BRAIN,
-                    'rnbqkbnr/pppppppp/8/2Q5/8/8/PPPPPPPP/RNBQKBNR': Mode.ANALYSIS,
-                    'rnbqkbnr/pppppppp/8/3Q4/8/8/PPPPPPPP/RNBQKBNR': Mode.KIBITZ,
-                    'rnbqkbnr/pppppppp/8/4Q3/8/8/PPPPPPPP/RNBQKBNR': Mode.OBSERVE,
-                    'rnbqkbnr/pppppppp/8/5Q2/8/8/PPPPPPPP/RNBQKBNR': Mode.PONDER,
-                    'rnbqkbnr/pppppppp/8/7Q/8/8/PPPPPPPP/RNBQKBNR': Mode.REMOTE}
-
-        drawresign_map = {'8/8/8/3k4/4K3/8/8/8': GameResult.WIN_WHITE,
-                          '8/8/8/3K4/4k3/8/8/8': GameResult.WIN_WHITE,
-                          '8/8/8/4k3/3K4/8/8/8': GameResult.WIN_BLACK,
-                          '8/8/8/4K3/3k4/8/8/8': GameResult.WIN_BLACK,
-                          '8/8/8/3kK3/8/8/8/8': GameResult.DRAW,
-                          '8/8/8/3Kk3/8/8/8/8': GameResult.DRAW,
-                          '8/8/8/8/3kK3/8/8/8': GameResult.DRAW,
-                          '8/8/8/8/3Kk3/8/8/8': GameResult.DRAW}
-
-        bit_board = chess.Board(fen + ' w - - 0 1')  # try a standard board and check for any starting pos
-        if bit_board.chess960_pos(ignore_castling=True):
+        if fen in _START_FENS:  # check for any starting pos
             logging.debug('flipping the board - W infront')
             self.dgtmenu.set_position_reverse_flipboard(False)
-        bit_board = chess.Board(fen[::-1] + ' w - - 0 1')  # try a revered board and check for any starting pos
-        if bit_board.chess960_pos(ignore_castling=True):
+        if fen in _START_FENS_REVERSED:  # check for any starting pos on a reversed board
             logging.debug('flipping the board - B infront')
             self.dgtmenu.set_position_reverse_flipboard(True)
         if self.dgtmenu.get_flip_board() and raw:  # Flip the board if needed
@@ -311,14 +348,14 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             logging.debug('ignore same fen')
             return
         self.dgtmenu.set_dgt_fen(fen)
-        self.drawresign_fen = self._drawresign()
+        map_type, map_value = _classify_fen(fen)
         # Fire the appropriate event
-        if fen in level_map:
+        if map_type == MapFen.LEVEL:
             eng = self.dgtmenu.get_engine()
             level_dict = eng['level_dict']
             if level_dict:
                 inc = len(level_dict) / 7
-                level = min(floor(inc * level_map.index(fen)), len(level_dict) - 1)  # type: int
+                level = min(floor(inc * map_value), len(level_dict) - 1)  # type: int
                 self.dgtmenu.set_engine_level(level)
                 msg = sorted(level_dict)[level]
                 text = self.dgttranslate.text('M10_level', msg)
@@ -329,30 +366,25 @@ class DgtDisplay(DisplayMsg, threading.Thread):
                 Observable.fire(Event.LEVEL(options=level_dict[msg], level_text=text, level_name=msg))
             else:
                 logging.debug('engine doesnt support levels')
-        elif fen in book_map:
-            book_index = book_map.index(fen)
+        elif map_type == MapFen.BOOK:
+            book_index = map_value
             try:
                 book = self.dgtmenu.all_books[book_index]
                 self.dgtmenu.set_book(book_index)
                 logging.debug('map: Opening book [%s]', book['file'])
-                text = book['text']
-                text.beep = self.dgttranslate.bl(BeepLevel.MAP)
-                text.maxtime = 1
-                text.wait = self._exit_menu()
+                text = book['text'].copy(beep=self.dgttranslate.bl(BeepLevel.MAP), maxtime=1, wait=self._exit_menu())
                 Observable.fire(Event.SET_OPENING_BOOK(book=book, book_text=text, show_ok=False))
             except IndexError:
                 pass
-        elif fen in engine_map:
+        elif map_type == MapFen.ENGINE:
             if self.dgtmenu.installed_engines:
                 try:
-                    self.dgtmenu.set_engine_index(engine_map.index(fen))
+                    self.dgtmenu.set_engine_index(map_value)
                     eng = self.dgtmenu.get_engine()
                     level_dict = eng['level_dict']
                     logging.debug('map: Engine name [%s]', eng['name'])
-                    eng_text = eng['text']
-                    eng_text.beep = self.dgttranslate.bl(BeepLevel.MAP)
-                    eng_text.maxtime = 1
-                    eng_text.wait = self._exit_menu()
+                    eng_text = eng['text'].copy(beep=self.dgttranslate.bl(BeepLevel.MAP), maxtime=1,
+                                                wait=self._exit_menu())
                     if level_dict:
                         len_level = len(level_dict)
                         if self.dgtmenu.get_engine_level() is None or len_level <= self.dgtmenu.get_engine_level():
@@ -372,19 +404,19 @@ class DgtDisplay(DisplayMsg, threading.Thread):
                     pass
             else:
                 DispatchDgt.fire(self.dgttranslate.text('Y10_erroreng'))
-        elif fen in mode_map:
-            logging.debug('map: Interaction mode [%s]', mode_map[fen])
-            if mode_map[fen] == Mode.REMOTE and not self.dgtmenu.inside_room:
+        elif map_type == MapFen.MODE:
+            logging.debug('map: Interaction mode [%s]', map_value)
+            if map_value == Mode.REMOTE and not self.dgtmenu.inside_room:
                 DispatchDgt.fire(self.dgttranslate.text('Y10_errorroom'))
-            elif mode_map[fen] == Mode.BRAIN and not self.dgtmenu.get_engine_has_ponder():
+            elif map_value == Mode.BRAIN and not self.dgtmenu.get_engine_has_ponder():
                 DispatchDgt.fire(self.dgttranslate.text('Y10_erroreng'))
             else:
-                self.dgtmenu.set_mode(mode_map[fen])
-                text = self.dgttranslate.text(mode_map[fen].value)
+                self.dgtmenu.set_mode(map_value)
+                text = self.dgttranslate.text(map_value.value)
                 text.beep = self.dgttranslate.bl(BeepLevel.MAP)
                 text.maxtime = 1  # wait 1sec not forever
                 text.wait = self._exit_menu()
-                Observable.fire(Event.SET_INTERACTION_MODE(mode=mode_map[fen], mode_text=text, show_ok=False))
+                Observable.fire(Event.SET_INTERACTION_MODE(mode=map_value, mode_text=text, show_ok=False))
 
         elif fen in self.dgtmenu.tc_fixed_map:
             logging.debug('map: Time control fixed')
@@ -410,29 +442,27 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             text.wait = self._exit_menu()
             timectrl = self.dgtmenu.tc_fisch_map[fen]  # type: TimeControl
             Observable.fire(Event.SET_TIME_CONTROL(tc_init=timectrl.get_parameters(), time_text=text, show_ok=False))
-        elif fen in shutdown_map:
+        elif map_type == MapFen.SHUTDOWN:
             logging.debug('map: shutdown')
             self._power_off()
-        elif fen in reboot_map:
+        elif map_type == MapFen.REBOOT:
             logging.debug('map: reboot')
             self._reboot()
-        elif self.drawresign_fen in drawresign_map:
+        elif map_type == MapFen.DRAWRESIGN:
             if not self._inside_main_menu():
                 logging.debug('map: drawresign')
-                Observable.fire(Event.DRAWRESIGN(result=drawresign_map[self.drawresign_fen]))
-        else:
-            bit_board = chess.Board(fen + ' w - - 0 1')
-            pos960 = bit_board.chess960_pos(ignore_castling=True)
-            if pos960 is not None:
-                if pos960 == 518 or self.dgtmenu.get_engine_has_960():
-                    logging.debug('map: New game')
-                    Observable.fire(Event.NEW_GAME(pos960=pos960))
-                else:
-                    # self._reset_moves_and_score()
-                    DispatchDgt.fire(self.dgttranslate.text('Y10_error960'))
+                Observable.fire(Event.DRAWRESIGN(result=map_value))
+        elif map_type == MapFen.NEW_GAME:
+            if map_value == 518 or self.dgtmenu.get_engine_has_960():
+                logging.debug('map: New game')
+                Observable.fire(Event.NEW_GAME(pos960=map_value))
             else:
-                Observable.fire(Event.FEN(fen=fen))
+                # self._reset_moves_and_score()
+                DispatchDgt.fire(self.dgttranslate.text('Y10_error960'))
+        else:
+            Observable.fire(Event.FEN(fen=fen))
 
+    @handlers.handles(Message.ENGINE_READY)
     def _process_engine_ready(self, message):
         for index in range(0, len(self.dgtmenu.installed_engines)):
             if self.dgtmenu.installed_engines[index]['file'] == message.eng['file']:
@@ -443,6 +473,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             DispatchDgt.fire(message.eng_text)
         self.dgtmenu.set_engine_restart(False)
 
+    @handlers.handles(Message.ENGINE_STARTUP)
     def _process_engine_startup(self, message):
         self.dgtmenu.installed_engines = message.installed_engines
         for index in range(0, len(self.dgtmenu.installed_engines)):
@@ -461,6 +492,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             DispatchDgt.fire(Dgt.LIGHT_CLEAR(devs={'ser', 'web'}))
             self.leds_are_on = False
 
+    @handlers.handles(Message.START_NEW_GAME)
     def _process_start_new_game(self, message):
         self.force_leds_off()
         self._reset_moves_and_score()
@@ -472,6 +504,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
         if self.dgtmenu.get_mode() in (Mode.NORMAL, Mode.BRAIN, Mode.OBSERVE, Mode.REMOTE):
             self._set_clock()
 
+    @handlers.handles(Message.COMPUTER_MOVE)
     def _process_computer_move(self, message):
         self.force_leds_off(log=True)  # can happen in case of a book move
         move = message.move
@@ -511,7 +544,8 @@ class DgtDisplay(DisplayMsg, threading.Thread):
         if not self.low_time and not self.dgtmenu.get_confirm():  # only display if the user has >60sec on his clock
             DispatchDgt.fire(self.dgttranslate.text(text_key))
 
-    def _process_computer_move_done(self):
+    @handlers.handles(Message.COMPUTER_MOVE_DONE)
+    def _process_computer_move_done(self, message):
         self.force_leds_off()
         self.last_move = self.play_move
         self.last_fen = self.play_fen
@@ -525,6 +559,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             self.time_control.reset()
             self._set_clock()
 
+    @handlers.handles(Message.USER_MOVE_DONE)
     def _process_user_move_done(self, message):
         self.force_leds_off(log=True)  # can happen in case of a sliding move
         self.last_move = message.move
@@ -536,6 +571,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
         self._exit_menu()
         self._display_confirm('K05_okuser')
 
+    @handlers.handles(Message.REVIEW_MOVE_DONE)
     def _process_review_move_done(self, message):
         self.force_leds_off(log=True)  # can happen in case of a sliding move
         self.last_move = message.move
@@ -544,6 +580,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
         self._exit_menu()
         self._display_confirm('K05_okmove')
 
+    @handlers.handles(Message.TIME_CONTROL)
     def _process_time_control(self, message):
         wait = not self.dgtmenu.get_confirm() or not message.show_ok
         if wait:
@@ -551,6 +588,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
         self.time_control = TimeControl(**message.tc_init)
         self._set_clock()
 
+    @handlers.handles(Message.NEW_SCORE)
     def _process_new_score(self, message):
         if message.mate is None:
             score = int(message.score)
@@ -565,6 +603,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             text.wait = True
             DispatchDgt.fire(text)
 
+    @handlers.handles(Message.NEW_PV)
     def _process_new_pv(self, message):
         self.hint_move = message.pv[0]
         self.hint_fen = message.game.fen()
@@ -578,6 +617,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
                                     long=self.dgttranslate.notation)
             DispatchDgt.fire(disp)
 
+    @handlers.handles(Message.STARTUP_INFO)
     def _process_startup_info(self, message):
         self.play_mode = message.info['play_mode']
         self.dgtmenu.set_mode(message.info['interaction_mode'])
@@ -624,12 +664,14 @@ class DgtDisplay(DisplayMsg, threading.Thread):
                 self.dgtmenu.tc_fisch_list.append(timectrl.get_list_text())
                 self.dgtmenu.set_time_fisch(index)
 
+    @handlers.handles(Message.CLOCK_START)
     def _process_clock_start(self, message):
         self.time_control = TimeControl(**message.tc_init)
         side = ClockSide.LEFT if (message.turn == chess.WHITE) != self.dgtmenu.get_flip_board() else ClockSide.RIGHT
         self._set_clock(side=side, devs=message.devs)
 
-    def _process_dgt_serial_nr(self):
+    @handlers.handles(Message.DGT_SERIAL_NR)
+    def _process_dgt_serial_nr(self, message):
         # logging.debug('Serial number {}'.format(message.number))  # actually used for watchdog (once a second)
         if self.dgtmenu.get_mode() == Mode.PONDER and not self._inside_main_menu():
             if self.show_move_or_value >= self.dgtmenu.get_ponderinterval():
@@ -648,10 +690,6 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             DispatchDgt.fire(text)
             self.show_move_or_value = (self.show_move_or_value + 1) % (self.dgtmenu.get_ponderinterval() * 2)
 
-    def _drawresign(self):
-        _, _, _, rnk_5, rnk_4, _, _, _ = self.dgtmenu.get_dgt_fen().split('/')
-        return '8/8/8/' + rnk_5 + '/' + rnk_4 + '/8/8/8'
-
     def _exit_display(self, devs=None):
         if devs is None:  # prevent W0102 error
             devs = {'ser', 'i2c', 'web'}
@@ -666,203 +704,183 @@ class DgtDisplay(DisplayMsg, threading.Thread):
             if self._inside_main_menu():
                 text = self.dgtmenu.get_current_text()
             if text:
-                text.wait = True  # in case of "bad pos" message send before
+                text = text.copy(wait=True)  # in case of "bad pos" message send before
             else:
                 text = Dgt.DISPLAY_TIME(force=True, wait=True, devs=devs)
         DispatchDgt.fire(text)
 
-    def _process_message(self, message):
-        if False:  # switch-case
-            pass
-
-        elif isinstance(message, Message.ENGINE_READY):
-            self._process_engine_ready(message)
-
-        elif isinstance(message, Message.ENGINE_STARTUP):
-            self._process_engine_startup(message)
-
-        elif isinstance(message, Message.ENGINE_FAIL):
-            DispatchDgt.fire(self.dgttranslate.text('Y10_erroreng'))
-            self.dgtmenu.set_engine_restart(False)
-
-        elif isinstance(message, Message.COMPUTER_MOVE):
-            self._process_computer_move(message)
-
-        elif isinstance(message, Message.START_NEW_GAME):
-            self._process_start_new_game(message)
-
-        elif isinstance(message, Message.COMPUTER_MOVE_DONE):
-            self._process_computer_move_done()
-
-        elif isinstance(message, Message.USER_MOVE_DONE):
-            self._process_user_move_done(message)
-
-        elif isinstance(message, Message.REVIEW_MOVE_DONE):
-            self._process_review_move_done(message)
-
-        elif isinstance(message, Message.ALTERNATIVE_MOVE):
-            self.force_leds_off()
-            self.play_mode = message.play_mode
-            DispatchDgt.fire(self.dgttranslate.text('B05_altmove'))
-
-        elif isinstance(message, Message.LEVEL):
-            if not self.dgtmenu.get_engine_restart():
-                DispatchDgt.fire(message.level_text)
-
-        elif isinstance(message, Message.TIME_CONTROL):
-            self._process_time_control(message)
-
-        elif isinstance(message, Message.OPENING_BOOK):
-            if not self.dgtmenu.get_confirm() or not message.show_ok:
-                DispatchDgt.fire(message.book_text)
-
-        elif isinstance(message, Message.TAKE_BACK):
-            self.force_leds_off()
-            self._reset_moves_and_score()
-            DispatchDgt.fire(self.dgttranslate.text('C10_takeback'))
-            DispatchDgt.fire(Dgt.DISPLAY_TIME(force=True, wait=True, devs={'ser', 'i2c', 'web'}))
-
-        elif isinstance(message, Message.GAME_ENDS):
-            if not self.dgtmenu.get_engine_restart():  # filter out the shutdown/reboot process
-                text = self.dgttranslate.text(message.result.value)
-                text.beep = self.dgttranslate.bl(BeepLevel.CONFIG)
-                text.maxtime = 0.5
-                DispatchDgt.fire(text)
-                if self.dgtmenu.get_mode() == Mode.PONDER:
-                    self._reset_moves_and_score()
-                    text.beep = False
-                    text.maxtime = 1
-                    self.score = text
-
-        elif isinstance(message, Message.INTERACTION_MODE):
-            if not self.dgtmenu.get_confirm() or not message.show_ok:
-                DispatchDgt.fire(message.mode_text)
-
-        elif isinstance(message, Message.PLAY_MODE):
-            self.play_mode = message.play_mode
-            DispatchDgt.fire(message.play_mode_text)
-
-        elif isinstance(message, Message.NEW_SCORE):
-            self._process_new_score(message)
-
-        elif isinstance(message, Message.BOOK_MOVE):
-            self.score = self.dgttranslate.text('N10_score', None)
-            DispatchDgt.fire(self.dgttranslate.text('N10_bookmove'))
-
-        elif isinstance(message, Message.NEW_PV):
-            self._process_new_pv(message)
+    @handlers.handles(Message.ENGINE_FAIL)
+    def _process_engine_fail(self, message):
+        DispatchDgt.fire(self.dgttranslate.text('Y10_erroreng'))
+        self.dgtmenu.set_engine_restart(False)
 
-        elif isinstance(message, Message.NEW_DEPTH):
-            self.depth = message.depth
+    @handlers.handles(Message.ALTERNATIVE_MOVE)
+    def _process_alternative_move(self, message):
+        self.force_leds_off()
+        self.play_mode = message.play_mode
+        DispatchDgt.fire(self.dgttranslate.text('B05_altmove'))
 
-        elif isinstance(message, Message.IP_INFO):
-            self.dgtmenu.int_ip = message.info['int_ip']
-            self.dgtmenu.ext_ip = message.info['ext_ip']
+    @handlers.handles(Message.LEVEL)
+    def _process_level(self, message):
+        if not self.dgtmenu.get_engine_restart():
+            DispatchDgt.fire(message.level_text)
 
-        elif isinstance(message, Message.STARTUP_INFO):
-            self._process_startup_info(message)
+    @handlers.handles(Message.OPENING_BOOK)
+    def _process_opening_book(self, message):
+        if not self.dgtmenu.get_confirm() or not message.show_ok:
+            DispatchDgt.fire(message.book_text)
 
-        elif isinstance(message, Message.SEARCH_STARTED):
-            logging.debug('search started')
+    @handlers.handles(Message.TAKE_BACK)
+    def _process_take_back(self, message):
+        self.force_leds_off()
+        self._reset_moves_and_score()
+        DispatchDgt.fire(self.dgttranslate.text('C10_takeback'))
+        DispatchDgt.fire(Dgt.DISPLAY_TIME(force=True, wait=True, devs={'ser', 'i2c', 'web'}))
+
+    @handlers.handles(Message.GAME_ENDS)
+    def _process_game_ends(self, message):
+        if not self.dgtmenu.get_engine_restart():  # filter out the shutdown/reboot process
+            text = self.dgttranslate.text(message.result.value)
+            text.beep = self.dgttranslate.bl(BeepLevel.CONFIG)
+            text.maxtime = 0.5
+            DispatchDgt.fire(text)
+            if self.dgtmenu.get_mode() == Mode.PONDER:
+                self._reset_moves_and_score()
+                self.score = text.copy(beep=False, maxtime=1)
 
-        elif isinstance(message, Message.SEARCH_STOPPED):
-            logging.debug('search stopped')
+    @handlers.handles(Message.INTERACTION_MODE)
+    def _process_interaction_mode(self, message):
+        if not self.dgtmenu.get_confirm() or not message.show_ok:
+            DispatchDgt.fire(message.mode_text)
 
-        elif isinstance(message, Message.CLOCK_START):
-            self._process_clock_start(message)
+    @handlers.handles(Message.PLAY_MODE)
+    def _process_play_mode(self, message):
+        self.play_mode = message.play_mode
+        DispatchDgt.fire(message.play_mode_text)
 
-        elif isinstance(message, Message.CLOCK_STOP):
-            DispatchDgt.fire(Dgt.CLOCK_STOP(devs=message.devs, wait=True))
+    @handlers.handles(Message.BOOK_MOVE)
+    def _process_book_move(self, message):
+        self.score = self.dgttranslate.text('N10_score', None)
+        DispatchDgt.fire(self.dgttranslate.text('N10_bookmove'))
 
-        elif isinstance(message, Message.DGT_BUTTON):
-            self._process_button(message)
+    @handlers.handles(Message.NEW_DEPTH)
+    def _process_new_depth(self, message):
+        self.depth = message.depth
 
-        elif isinstance(message, Message.DGT_FEN):
-            if self.dgtmenu.inside_updt_menu():
-                logging.debug('inside update menu => ignore fen %s', message.fen)
-            else:
-                self._process_fen(message.fen, message.raw)
+    @handlers.handles(Message.IP_INFO)
+    def _process_ip_info(self, message):
+        self.dgtmenu.int_ip = message.info['int_ip']
+        self.dgtmenu.ext_ip = message.info['ext_ip']
 
-        elif isinstance(message, Message.DGT_CLOCK_VERSION):
-            DispatchDgt.fire(Dgt.CLOCK_VERSION(main=message.main, sub=message.sub, devs={message.dev}))
-            text = self.dgttranslate.text('Y21_picochess', devs={message.dev})
-            text.rd = ClockIcons.DOT
-            DispatchDgt.fire(text)
+    @handlers.handles(Message.SEARCH_STARTED)
+    def _process_search_started(self, message):
+        logging.debug('search started')
 
-            if message.dev == 'ser':  # send the "board connected message" to serial clock
-                DispatchDgt.fire(message.text)
-            self._set_clock(devs={message.dev})
-            self._exit_display(devs={message.dev})
-
-        elif isinstance(message, Message.DGT_CLOCK_TIME):
-            time_white = message.time_left
-            time_black = message.time_right
-            if self.dgtmenu.get_flip_board():
-                time_white, time_black = time_black, time_white
-            Observable.fire(Event.CLOCK_TIME(time_white=time_white, time_black=time_black, connect=message.connect,
-                                             dev=message.dev))
-
-        elif isinstance(message, Message.CLOCK_TIME):
-            self.low_time = message.low_time
-            if self.low_time:
-                logging.debug('time too low, disable confirm - w: %i, b: %i', message.time_white, message.time_black)
-
-        elif isinstance(message, Message.DGT_SERIAL_NR):
-            self._process_dgt_serial_nr()
-
-        elif isinstance(message, Message.DGT_JACK_CONNECTED_ERROR):  # only working in case of 2 clocks connected!
-            DispatchDgt.fire(self.dgttranslate.text('Y00_errorjack'))
-
-        elif isinstance(message, Message.DGT_EBOARD_VERSION):
-            if self.dgtmenu.inside_updt_menu():
-                logging.debug('inside update menu => board channel not displayed')
-            else:
-                DispatchDgt.fire(message.text)
-                self._exit_display(devs={'i2c', 'web'})  # ser is done, when clock found
+    @handlers.handles(Message.SEARCH_STOPPED)
+    def _process_search_stopped(self, message):
+        logging.debug('search stopped')
 
-        elif isinstance(message, Message.DGT_NO_EBOARD_ERROR):
-            if self.dgtmenu.inside_updt_menu() or self.dgtmenu.inside_main_menu():
-                logging.debug('inside menu => board error not displayed')
-            else:
-                DispatchDgt.fire(message.text)
+    @handlers.handles(Message.CLOCK_STOP)
+    def _process_clock_stop(self, message):
+        DispatchDgt.fire(Dgt.CLOCK_STOP(devs=message.devs, wait=True))
 
-        elif isinstance(message, Message.DGT_NO_CLOCK_ERROR):
-            pass
+    @handlers.handles(Message.DGT_FEN)
+    def _process_dgt_fen(self, message):
+        if self.dgtmenu.inside_updt_menu():
+            logging.debug('inside update menu => ignore fen %s', message.fen)
+        else:
+            self._process_fen(message.fen, message.raw)
 
-        elif isinstance(message, Message.SWITCH_SIDES):
-            self.play_move = chess.Move.null()
-            self.play_fen = None
-            self.play_turn = None
+    @handlers.handles(Message.DGT_CLOCK_VERSION)
+    def _process_dgt_clock_version(self, message):
+        DispatchDgt.fire(Dgt.CLOCK_VERSION(main=message.main, sub=message.sub, devs={message.dev}))
+        text = self.dgttranslate.text('Y21_picochess', devs={message.dev})
+        text.rd = ClockIcons.DOT
+        DispatchDgt.fire(text)
 
-            self.hint_move = chess.Move.null()
-            self.hint_fen = None
-            self.hint_turn = None
-            self.force_leds_off()
-            logging.debug('user ignored move %s', message.move)
+        if message.dev == 'ser':  # send the "board connected message" to serial clock
+            DispatchDgt.fire(message.text)
+        self._set_clock(devs={message.dev})
+        self._exit_display(devs={message.dev})
+
+    @handlers.handles(Message.DGT_CLOCK_TIME)
+    def _process_dgt_clock_time(self, message):
+        time_white = message.time_left
+        time_black = message.time_right
+        if self.dgtmenu.get_flip_board():
+            time_white, time_black = time_black, time_white
+        Observable.fire(Event.CLOCK_TIME(time_white=time_white, time_black=time_black, connect=message.connect,
+                                         dev=message.dev))
+
+    @handlers.handles(Message.CLOCK_TIME)
+    def _process_clock_time(self, message):
+        self.low_time = message.low_time
+        if self.low_time:
+            logging.debug('time too low, disable confirm - w: %i, b: %i', message.time_white, message.time_black)
+
+    @handlers.handles(Message.DGT_JACK_CONNECTED_ERROR)
+    def _process_dgt_jack_connected_error(self, message):  # only working in case of 2 clocks connected!
+        DispatchDgt.fire(self.dgttranslate.text('Y00_errorjack'))
+
+    @handlers.handles(Message.DGT_EBOARD_VERSION)
+    def _process_dgt_eboard_version(self, message):
+        if self.dgtmenu.inside_updt_menu():
+            logging.debug('inside update menu => board channel not displayed')
+        else:
+            DispatchDgt.fire(message.text)
+            self._exit_display(devs={'i2c', 'web'})  # ser is done, when clock found
 
-        elif isinstance(message, Message.EXIT_MENU):
-            self._exit_display()
+    @handlers.handles(Message.DGT_NO_EBOARD_ERROR)
+    def _process_dgt_no_eboard_error(self, message):
+        if self.dgtmenu.inside_updt_menu() or self.dgtmenu.inside_main_menu():
+            logging.debug('inside menu => board error not displayed')
+        else:
+            DispatchDgt.fire(message.text)
 
-        elif isinstance(message, Message.WRONG_FEN):
-            DispatchDgt.fire(self.dgttranslate.text('C10_setpieces'))
+    @handlers.handles(Message.DGT_NO_CLOCK_ERROR)
+    def _process_dgt_no_clock_error(self, message):
+        pass
 
-        elif isinstance(message, Message.UPDATE_PICO):
-            DispatchDgt.fire(self.dgttranslate.text('Y00_update'))
+    @handlers.handles(Message.SWITCH_SIDES)
+    def _process_switch_sides(self, message):
+        self.play_move = chess.Move.null()
+        self.play_fen = None
+        self.play_turn = None
 
-        elif isinstance(message, Message.BATTERY):
-            if message.percent == 0x7f:
-                percent = ' NA'
-            elif message.percent > 99:
-                percent = ' 99'
-            else:
-                percent = str(message.percent)
-            self.dgtmenu.battery = percent
+        self.hint_move = chess.Move.null()
+        self.hint_fen = None
+        self.hint_turn = None
+        self.force_leds_off()
+        logging.debug('user ignored move %s', message.move)
+
+    @handlers.handles(Message.EXIT_MENU)
+    def _process_exit_menu(self, message):
+        self._exit_display()
+
+    @handlers.handles(Message.WRONG_FEN)
+    def _process_wrong_fen(self, message):
+        DispatchDgt.fire(self.dgttranslate.text('C10_setpieces'))
+
+    @handlers.handles(Message.UPDATE_PICO)
+    def _process_update_pico(self, message):
+        DispatchDgt.fire(self.dgttranslate.text('Y00_update'))
+
+    @handlers.handles(Message.BATTERY)
+    def _process_battery(self, message):
+        if message.percent == 0x7f:
+            percent = ' NA'
+        elif message.percent > 99:
+            percent = ' 99'
+        else:
+            percent = str(message.percent)
+        self.dgtmenu.battery = percent
 
-        elif isinstance(message, Message.REMOTE_ROOM):
-            self.dgtmenu.inside_room = message.inside
+    @handlers.handles(Message.REMOTE_ROOM)
+    def _process_remote_room(self, message):
+        self.dgtmenu.inside_room = message.inside
 
-        else:  # Default
-            pass
+    def _process_message(self, message):
+        self.handlers.dispatch(message, self)
 
     def run(self):
         """Call by threading.Thread start() function."""
@@ -873,6 +891,7 @@ class DgtDisplay(DisplayMsg, threading.Thread):
                 message = self.msg_queue.get()
                 if not isinstance(message, Message.DGT_SERIAL_NR):
                     logging.debug('received message from msg_queue: %s', message)
-                self._process_message(message)
+                with bus_monitor.measure(self.__class__.__name__, message, self.msg_queue.last_put_time):
+                    self._process_message(message)
             except queue.Empty:
                 pass
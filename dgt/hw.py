@@ -35,7 +35,6 @@ class DgtHw(DgtIface):
         self.lib_lock = Lock()
 
     def _display_on_dgt_xl(self, text: str, beep=False, left_icons=ClockIcons.NONE, right_icons=ClockIcons.NONE):
-        text = text.ljust(6)
         if len(text) > 6:
             logging.warning('(ser) clock message too long [%s]', text)
         logging.debug('[%s]', text)
@@ -46,11 +45,9 @@ class DgtHw(DgtIface):
             return res
 
     def _display_on_dgt_3000(self, text: str, beep=False):
-        text = text.ljust(8)
         if len(text) > 8:
             logging.warning('(ser) clock message too long [%s]', text)
         logging.debug('[%s]', text)
-        text = bytes(text, 'utf-8')
         with self.lib_lock:
             res = self.dgtboard.set_text_3k(text, 0x03 if beep else 0x00)
             if not res:
@@ -58,11 +55,9 @@ class DgtHw(DgtIface):
             return res
 
     def _display_on_rev2_pi(self, text: str, beep=False):
-        text = text.ljust(11)
         if len(text) > 11:
             logging.warning('(rev) clock message too long [%s]', text)
         logging.debug('[%s]', text)
-        text = bytes(text, 'utf-8')
         with self.lib_lock:
             res = self.dgtboard.set_text_rp(text, 0x03 if beep else 0x00)
             if not res:
@@ -20,7 +20,7 @@ import queue
 from threading import Thread
 
 from chess import Board
-from utilities import hms_time, DisplayDgt, DispatchDgt
+from utilities import hms_time, DisplayDgt, DispatchDgt, bus_monitor
 from dgt.util import ClockIcons, ClockSide
 from dgt.api import Dgt
 from dgt.translate import DgtTranslate
@@ -161,8 +161,9 @@ class DgtIface(DisplayDgt, Thread):
         logging.debug('(%s) handle DgtApi: %s ended', ','.join(message.devs), message)
         return self.case_res
 
-    def _create_task(self, msg):
-        res = self._process_message(msg)
+    def _create_task(self, msg, put_time: float):
+        with bus_monitor.measure(self.__class__.__name__, msg, put_time):
+            res = self._process_message(msg)
         if not res:
             logging.warning('DgtApi command %s failed result: %s', msg, res)
 
@@ -173,6 +174,6 @@ class DgtIface(DisplayDgt, Thread):
             # Check if we have something to display
             try:
                 message = self.dgt_queue.get()
-                self._create_task(message)
+                self._create_task(message, self.dgt_queue.last_put_time)
             except queue.Empty:
                 pass
@@ -466,9 +466,7 @@ class DgtMenu(object):
         return text
 
     def _get_current_book_name(self):
-        text = self.all_books[self.menu_book]['text']
-        text.beep = self.dgttranslate.bl(BeepLevel.BUTTON)
-        return text
+        return self.all_books[self.menu_book]['text'].copy(beep=self.dgttranslate.bl(BeepLevel.BUTTON))
 
     def enter_book_name_menu(self):
         """Set the menu state."""
@@ -482,9 +480,7 @@ class DgtMenu(object):
         return text
 
     def _get_current_engine_name(self):
-        text = self.installed_engines[self.menu_engine_name]['text']
-        text.beep = self.dgttranslate.bl(BeepLevel.BUTTON)
-        return text
+        return self.installed_engines[self.menu_engine_name]['text'].copy(beep=self.dgttranslate.bl(BeepLevel.BUTTON))
 
     def enter_eng_name_menu(self):
         """Set the menu state."""
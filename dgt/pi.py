@@ -21,7 +21,7 @@ from threading import Lock, Timer
 from ctypes import cdll, c_byte, create_string_buffer, pointer
 from platform import machine
 
-from utilities import DisplayMsg, hms_time
+from utilities import DisplayMsg, ScheduledTimer, hms_time
 from dgt.api import Message
 from dgt.util import ClockIcons, ClockSide
 from dgt.translate import DgtTranslate
@@ -257,7 +257,8 @@ class DgtPi(DgtIface):
             return False
         else:
             self.side_running = side
-            Timer(0.9, self.out_settime).start()  # delay abit cause the clock needs time to update its time result
+            # delay abit cause the clock needs time to update its time result
+            ScheduledTimer(0.9, self.out_settime).start()
             return True
 
     def out_settime(self):
@@ -75,6 +75,8 @@ class DgtTranslate(object):
         """Return standard text for clock display."""
         if devs is None:  # prevent W0102 error
             devs = {'ser', 'i2c', 'web'}
+        else:
+            devs = set(devs)  # the text is shared read-only later on - dont keep the caller's set
 
         entxt = detxt = nltxt = frtxt = estxt = ittxt = None  # error case
 
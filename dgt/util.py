@@ -491,6 +491,42 @@ class BeepLevel(MyEnum):
     OKAY = 0x08  # All Events from "ok" (confirm) messages
 
 
+@enum.unique
+class MapFen(MyEnum):
+
+    """Board positions which are a command (mostly a queen placed at start pos) instead of a game position."""
+
+    LEVEL = 'map_level'
+    BOOK = 'map_book'
+    ENGINE = 'map_engine'
+    MODE = 'map_mode'
+    SHUTDOWN = 'map_shutdown'
+    REBOOT = 'map_reboot'
+    DRAWRESIGN = 'map_drawresign'
+    NEW_GAME = 'map_newgame'
+
+
+@enum.unique
+class EventLane(enum.IntEnum):
+
+    """Priority lanes of the event queue (lower value gets served first)."""
+
+    USER = 0  # User input (board, clock buttons, menu, web)
+    CLOCK = 1  # Clock times and flag fall
+    ENGINE = 2  # Engine results (best move, search start/stop)
+    INFO = 3  # Engine infos (pv, score, depth)
+
+
+@enum.unique
+class EngineState(MyEnum):
+
+    """Search state of the uci engine."""
+
+    IDLE = 'engine_idle'  # waiting for a go command
+    THINKING = 'engine_thinking'  # searching a move
+    PONDERING = 'engine_pondering'  # searching in ponder (or infinite analysis) mode
+
+
 @enum.unique
 class ClockSide(MyEnum):
 
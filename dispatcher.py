@@ -17,10 +17,9 @@
 
 import logging
 import queue
-from threading import Timer, Thread, Lock
-from copy import deepcopy
+from threading import Thread, Lock
 
-from utilities import DisplayDgt, DispatchDgt, dispatch_queue
+from utilities import DisplayDgt, DispatchDgt, ScheduledTimer, dispatch_queue, bus_monitor
 from dgt.api import Dgt, DgtApi
 from dgt.menu import DgtMenu
 
@@ -128,15 +127,16 @@ class Dispatcher(DispatchDgt, Thread):
                             logging.debug('(%s) inside update menu => board connect not displayed', dev)
                             return
                 if message.maxtime > 0.1:  # filter out "all the time" show and "eBoard error" messages
-                    self.maxtimer[dev] = Timer(message.maxtime * self.time_factor, self._stopped_maxtimer, [dev])
+                    self.maxtimer[dev] = ScheduledTimer(message.maxtime * self.time_factor, self._stopped_maxtimer,
+                                                        [dev])
                     self.maxtimer[dev].start()
                     logging.debug('(%s) showing %s for %.1f secs', dev, message, message.maxtime * self.time_factor)
                     self.maxtimer_running[dev] = True
             if repr(message) == DgtApi.CLOCK_START and self.dgtmenu.inside_updt_menu():
                 logging.debug('(%s) inside update menu => clock not started', dev)
                 return
-            message.devs = {dev}  # on new system, we only have ONE device each message - force this!
-            DisplayDgt.show(message)
+            # on new system, we only have ONE device each message - force this!
+            DisplayDgt.show(message.copy(devs={dev}))
         else:
             logging.debug('(%s) hash ignore DgtApi: %s', dev, message)
 
@@ -157,33 +157,34 @@ class Dispatcher(DispatchDgt, Thread):
                 msg = dispatch_queue.get()
                 logging.debug('received command from dispatch_queue: %s devs: %s', msg, ','.join(msg.devs))
 
-                for dev in msg.devs & self.devices:
-                    message = deepcopy(msg)
-                    if self.maxtimer_running[dev]:
-                        if hasattr(message, 'wait'):
-                            if message.wait:
-                                self.tasks[dev].append(message)
-                                logging.debug('(%s) tasks delayed: %s', dev, self.tasks[dev])
-                                continue
+                with bus_monitor.measure(self.__class__.__name__, msg, dispatch_queue.last_put_time):
+                    for dev in msg.devs & self.devices:
+                        message = msg
+                        if self.maxtimer_running[dev]:
+                            if hasattr(message, 'wait'):
+                                if message.wait:
+                                    self.tasks[dev].append(message)
+                                    logging.debug('(%s) tasks delayed: %s', dev, self.tasks[dev])
+                                    continue
+                                else:
+                                    logging.debug('ignore former maxtime - dev: %s', dev)
+                                    self.stop_maxtimer(dev)
+                                    if self.tasks[dev]:
+                                        logging.debug('delete following (%s) tasks: %s', dev, self.tasks[dev])
+                                        while self.tasks[dev]:  # but do the last CLOCK_START()
+                                            command = self.tasks[dev].pop()
+                                            if repr(command) == DgtApi.CLOCK_START:  # clock might be in set mode
+                                                logging.debug('processing (last) delayed clock start command')
+                                                with self.process_lock[dev]:
+                                                    self._process_message(command, dev)
+                                                break
+                                        self.tasks[dev] = []
                             else:
-                                logging.debug('ignore former maxtime - dev: %s', dev)
-                                self.stop_maxtimer(dev)
-                                if self.tasks[dev]:
-                                    logging.debug('delete following (%s) tasks: %s', dev, self.tasks[dev])
-                                    while self.tasks[dev]:  # but do the last CLOCK_START()
-                                        command = self.tasks[dev].pop()
-                                        if repr(command) == DgtApi.CLOCK_START:  # clock might be in set mode
-                                            logging.debug('processing (last) delayed clock start command')
-                                            with self.process_lock[dev]:
-                                                self._process_message(command, dev)
-                                            break
-                                    self.tasks[dev] = []
+                                logging.debug('command doesnt change the clock display => (%s) max timer ignored', dev)
                         else:
-                            logging.debug('command doesnt change the clock display => (%s) max timer ignored', dev)
-                    else:
-                        logging.debug('(%s) max timer not running => processing command: %s', dev, message)
+                            logging.debug('(%s) max timer not running => processing command: %s', dev, message)
 
-                    with self.process_lock[dev]:
-                        self._process_message(message, dev)
+                        with self.process_lock[dev]:
+                            self._process_message(message, dev)
             except queue.Empty:
                 pass
@@ -0,0 +1,107 @@
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import pickle
+import time
+from threading import Thread, Lock
+
+from utilities import evt_queue, bus_monitor, bus_recorders
+from dgt.api import Event, EventApi
+
+
+class Journal(object):
+
+    """Append every event, message and dgt command (with its monotonic time) to a file."""
+
+    def __init__(self, file_name: str):
+        super(Journal, self).__init__()
+        self.file = open(file_name, 'ab')
+        self.lock = Lock()
+        self.start_time = time.monotonic()
+
+    def record(self, channel: str, obj):
+        """Write the (already frozen) api object of the channel (evt, msg, dgt) to the journal."""
+        with self.lock:
+            pickle.dump((time.monotonic() - self.start_time, channel, obj), self.file, pickle.HIGHEST_PROTOCOL)
+            self.file.flush()
+
+    def start(self):
+        """Start recording the bus traffic."""
+        logging.debug('recording journal to %s', self.file.name)
+        bus_recorders.append(self)
+
+
+def read_journal(file_name: str):
+    """Return the (secs, channel, api object) records of a journal file."""
+    with open(file_name, 'rb') as file:
+        while True:
+            try:
+                yield pickle.load(file)
+            except EOFError:
+                break
+            except (pickle.UnpicklingError, AttributeError, ImportError) as exc:
+                logging.warning('journal %s is corrupt: %s', file_name, exc)
+                break
+
+
+class JournalReplay(Thread):
+
+    """Feed the recorded input events of a journal back into the evt_queue."""
+
+    # these events are created again by the (running) engine & time control - they are not replayed
+    generated = (Event.BEST_MOVE, Event.START_SEARCH, Event.STOP_SEARCH, Event.NEW_PV, Event.NEW_SCORE,
+                 Event.NEW_DEPTH, Event.OUT_OF_TIME)
+
+    def __init__(self, file_name: str, max_speed=False, sync_timeout=60):
+        super(JournalReplay, self).__init__(daemon=True)
+        self.file_name = file_name
+        self.max_speed = max_speed
+        self.sync_timeout = sync_timeout
+
+    def _wait_for_best_moves(self, count: int):
+        """Wait till the event loop handled the same number of best moves as recorded so far."""
+        end_time = time.monotonic() + self.sync_timeout
+        while bus_monitor.get_count('picochess', EventApi.BEST_MOVE) < count:
+            if time.monotonic() > end_time:
+                logging.warning('replay: engine didnt send best move #%i in time', count)
+                return
+            time.sleep(0.05)
+
+    def run(self):
+        """Call by threading.Thread start() function."""
+        logging.info('replaying journal %s max_speed: %s', self.file_name, self.max_speed)
+        best_moves = replayed = 0
+        base_time = None
+        for secs, channel, event in read_journal(self.file_name):
+            if channel != 'evt':
+                continue
+            if isinstance(event, self.generated):
+                if isinstance(event, Event.BEST_MOVE):
+                    best_moves += 1
+                continue
+            self._wait_for_best_moves(best_moves)
+            if self.max_speed:
+                evt_queue.join()  # the event loop has nothing more to do
+            else:
+                now = time.monotonic()
+                if base_time is None or base_time + secs < now:  # first event or behind (engine) schedule
+                    base_time = now - secs
+                time.sleep(base_time + secs - now)
+            evt_queue.put(event)
+            replayed += 1
+        logging.info('journal replay finished - %i events replayed', replayed)
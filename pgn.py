@@ -32,7 +32,7 @@ import requests
 
 import chess
 import chess.pgn
-from utilities import DisplayMsg
+from utilities import DisplayMsg, HandlerRegistry, bus_monitor
 from dgt.api import Message
 from dgt.util import GameResult, PlayMode, Mode
 
@@ -147,8 +147,11 @@ class PgnDisplay(DisplayMsg, threading.Thread):
 
     """Deal with DisplayMessages related to pgn."""
 
+    handlers = HandlerRegistry()  # Message class => _process_xxx() method
+
     def __init__(self, file_name: str, emailer: Emailer):
         super(PgnDisplay, self).__init__()
+        self.subscribe(self.handlers.api_classes())
         self.file_name = file_name
         self.emailer = emailer
 
@@ -164,7 +167,7 @@ class PgnDisplay(DisplayMsg, threading.Thread):
 
     def _save_and_email_pgn(self, message):
         logging.debug('Saving game to [%s]', self.file_name)
-        pgn_game = chess.pgn.Game().from_board(message.game)
+        pgn_game = chess.pgn.Game().from_board(message.game.copy())  # the message is shared with other displays
 
         # Headers
         pgn_game.headers['Event'] = 'PicoChess game'
@@ -210,57 +213,62 @@ class PgnDisplay(DisplayMsg, threading.Thread):
         file.close()
         self.emailer.send('Game PGN', str(pgn_game), self.file_name)
 
-    def _process_message(self, message):
-        if False:  # switch-case
-            pass
-
-        elif isinstance(message, Message.SYSTEM_INFO):
-            self.engine_name = message.info['engine_name']
+    @handlers.handles(Message.SYSTEM_INFO)
+    def _process_system_info(self, message):
+        self.engine_name = message.info['engine_name']
+        self.old_engine = self.engine_name
+        self.user_name = message.info['user_name']
+        self.user_elo = message.info['user_elo']
+
+    @handlers.handles(Message.IP_INFO)
+    def _process_ip_info(self, message):
+        self.location = message.info['location']
+
+    @handlers.handles(Message.STARTUP_INFO)
+    def _process_startup_info(self, message):
+        self.level_text = message.info['level_text']
+        self.level_name = message.info['level_name']
+
+    @handlers.handles(Message.LEVEL)
+    def _process_level(self, message):
+        self.level_text = message.level_text
+        self.level_name = message.level_name
+
+    @handlers.handles(Message.INTERACTION_MODE)
+    def _process_interaction_mode(self, message):
+        if message.mode == Mode.REMOTE:
             self.old_engine = self.engine_name
-            self.user_name = message.info['user_name']
-            self.user_elo = message.info['user_elo']
-
-        elif isinstance(message, Message.IP_INFO):
-            self.location = message.info['location']
-
-        elif isinstance(message, Message.STARTUP_INFO):
-            self.level_text = message.info['level_text']
-            self.level_name = message.info['level_name']
-
-        elif isinstance(message, Message.LEVEL):
-            self.level_text = message.level_text
-            self.level_name = message.level_name
-
-        elif isinstance(message, Message.INTERACTION_MODE):
-            if message.mode == Mode.REMOTE:
-                self.old_engine = self.engine_name
-                self.engine_name = 'Remote Player'
-            else:
-                self.engine_name = self.old_engine
-
-        elif isinstance(message, Message.ENGINE_STARTUP):
-            for index in range(0, len(message.installed_engines)):
-                eng = message.installed_engines[index]
-                if eng['file'] == message.file:
-                    self.engine_elo = eng['elo']
-                    break
-
-        elif isinstance(message, Message.ENGINE_READY):
-            self.old_engine = self.engine_name = message.engine_name
-            self.engine_elo = message.eng['elo']
-            if not message.has_levels:
-                self.level_text = None
-                self.level_name = ''
-
-        elif isinstance(message, Message.GAME_ENDS):
-            if message.game.move_stack:
-                self._save_and_email_pgn(message)
-
-        elif isinstance(message, Message.START_NEW_GAME):
-            self.startime = datetime.datetime.now().strftime('%H:%M:%S')
+            self.engine_name = 'Remote Player'
+        else:
+            self.engine_name = self.old_engine
+
+    @handlers.handles(Message.ENGINE_STARTUP)
+    def _process_engine_startup(self, message):
+        for index in range(0, len(message.installed_engines)):
+            eng = message.installed_engines[index]
+            if eng['file'] == message.file:
+                self.engine_elo = eng['elo']
+                break
+
+    @handlers.handles(Message.ENGINE_READY)
+    def _process_engine_ready(self, message):
+        self.old_engine = self.engine_name = message.engine_name
+        self.engine_elo = message.eng['elo']
+        if not message.has_levels:
+            self.level_text = None
+            self.level_name = ''
+
+    @handlers.handles(Message.GAME_ENDS)
+    def _process_game_ends(self, message):
+        if message.game.move_stack:
+            self._save_and_email_pgn(message)
+
+    @handlers.handles(Message.START_NEW_GAME)
+    def _process_start_new_game(self, message):
+        self.startime = datetime.datetime.now().strftime('%H:%M:%S')
 
-        else:  # Default
-            pass
+    def _process_message(self, message):
+        self.handlers.dispatch(message, self)
 
     def run(self):
         """Call by threading.Thread start() function."""
@@ -269,6 +277,7 @@ class PgnDisplay(DisplayMsg, threading.Thread):
             # Check if we have something to display
             try:
                 message = self.msg_queue.get()
-                self._process_message(message)
+                with bus_monitor.measure(self.__class__.__name__, message, self.msg_queue.last_put_time):
+                    self._process_message(message)
             except queue.Empty:
                 pass
@@ -19,9 +19,9 @@
 
 import sys
 import os
-import threading
 import copy
 import gc
+import threading
 import logging
 from logging.handlers import RotatingFileHandler
 import time
@@ -30,18 +30,23 @@ import configargparse
 from platform import machine
 
 from uci.engine import UciShell, UciEngine
+from uci.analysis import AnalysisCache
+from tablebase import Syzygy
+from book import OpeningBooks
 from uci.read import read_engine_ini
+from uci.pool import EnginePool
 import chess
-import chess.polyglot
 import chess.uci
 
-from timecontrol import TimeControl
+from timecontrol import TimeControl, TimeBudget
 from utilities import get_location, update_picochess, get_opening_books, shutdown, reboot, checkout_tag
-from utilities import Observable, DisplayMsg, version, evt_queue, write_picochess_ini, hms_time, RepeatedTimer
+from utilities import Observable, DisplayMsg, HandlerRegistry, version, evt_queue, evt_coalescer, write_picochess_ini
+from utilities import hms_time, RepeatedTimer, ScheduledTimer, bus_monitor
 from pgn import Emailer, PgnDisplay
 from server import WebServer
 from talker.picotalker import PicoTalkerDisplay
 from dispatcher import Dispatcher
+from journal import Journal, JournalReplay
 
 from dgt.api import Message, Event
 from dgt.util import GameResult, TimeMode, Mode, PlayMode
@@ -94,6 +99,57 @@ class AlternativeMover:
         self.excludemoves = set()
 
 
+class PositionIndex:
+
+    """Keep the plies of each board position of the game, so a former position is found without replaying the game."""
+
+    def __init__(self, game: chess.Board):
+        self.fens = []  # board fen of each ply
+        self.plies = {}  # board fen => plies (ascending) having this position
+        self.reset(game)
+
+    def _add(self, fen: str):
+        self.plies.setdefault(fen, []).append(len(self.fens))
+        self.fens.append(fen)
+
+    def reset(self, game: chess.Board):
+        """Rebuild the index for a new (or changed) game."""
+        self.fens = []
+        self.plies = {}
+        game_copy = game.copy()
+        moves = []
+        while game_copy.move_stack:
+            moves.append(game_copy.pop())
+        self._add(game_copy.board_fen())
+        for move in reversed(moves):
+            game_copy.push(move)
+            self._add(game_copy.board_fen())
+
+    def push(self, game: chess.Board, move: chess.Move):
+        """Push the move on the game and index the new position."""
+        game.push(move)
+        self._add(game.board_fen())
+
+    def pop(self, game: chess.Board):
+        """Pop the last move from the game and forget its position."""
+        fen = self.fens.pop()
+        plies = self.plies[fen]
+        plies.pop()
+        if not plies:
+            del self.plies[fen]
+        return game.pop()
+
+    def get_ply(self, game: chess.Board, fen: str):
+        """Get the latest former ply of the game with this board fen or None."""
+        if len(self.fens) != len(game.move_stack) + 1 or self.fens[-1] != game.board_fen():
+            logging.warning('position index out of sync with game - rebuilding it')
+            self.reset(game)
+        for ply in reversed(self.plies.get(fen, [])):
+            if ply < len(game.move_stack):
+                return ply
+        return None
+
+
 def main():
     """Main function."""
     def display_ip_info():
@@ -124,21 +180,21 @@ def main():
         """Start the fen timer in case an unhandled fen string been received from board."""
         nonlocal fen_timer_running
         nonlocal fen_timer
-        fen_timer = threading.Timer(3, expired_fen_timer)
+        fen_timer = ScheduledTimer(3, expired_fen_timer)
         fen_timer.start()
         fen_timer_running = True
 
     def compute_legal_fens(game_copy: chess.Board):
         """
-        Compute a list of legal FENs for the given game.
+        Compute the legal FENs for the given game.
 
         :param game_copy: The game
-        :return: A list of legal FENs
+        :return: A dict of legal (board) FENs with the move leading to it
         """
-        fens = []
+        fens = {}
         for move in game_copy.legal_moves:
             game_copy.push(move)
-            fens.append(game_copy.board_fen())
+            fens.setdefault(game_copy.board_fen(), move)
             game_copy.pop()
         return fens
 
@@ -149,24 +205,50 @@ def main():
         If a move is found in the opening book, fire an event in a few seconds.
         """
         DisplayMsg.show(msg)
+        if time_budget:
+            time_budget.start_turn()
         start_clock()
         book_res = searchmoves.book(bookreader, game.copy())
         if book_res:
             Observable.fire(Event.BEST_MOVE(move=book_res.bestmove, ponder=book_res.ponder, inbook=True))
         else:
-            while not engine.is_waiting():
-                time.sleep(0.05)
+            # a reduced engine level shouldnt turn into perfect endgame play
+            use_tb = args.syzygy and not engine.has_limited_level()
+            tb_move = syzygy.best_move(game, searchmoves.all(game)) if use_tb else None
+            if tb_move:
+                game_copy = game.copy()
+                game_copy.push(tb_move)
+                play_known_move(tb_move, syzygy.best_move(game_copy), 'tablebase')
+                return
+            cached = engine.get_analysis(game) if args.analysis_cache_depth else None
+            if cached and cached['depth'] >= args.analysis_cache_depth and cached['bestmove'] in searchmoves.all(game):
+                play_known_move(cached['bestmove'], cached['ponder'], 'cached (depth {})'.format(cached['depth']))
+                return
+            if not engine.wait_idle(timeout=1):
                 logging.warning('engine is still not waiting')
+                engine.wait_idle()
             uci_dict = timec.uci()
             uci_dict['searchmoves'] = searchmoves.all(game)
             engine.position(copy.deepcopy(game))
             engine.go(uci_dict)
 
+    def play_known_move(move: chess.Move, ponder, source: str):
+        """Play the (tablebase or cached) move without an engine search."""
+        logging.info('%s move %s - search skipped', source, move)
+        if time_budget:
+            time_budget.stop_turn(None)  # no engine search to measure
+        Observable.fire(Event.BEST_MOVE(move=move, ponder=ponder, inbook=False))
+
     def analyse(game: chess.Board, msg: Message):
         """Start a new ponder search on the current game."""
         DisplayMsg.show(msg)
         engine.position(copy.deepcopy(game))
         engine.ponder()
+        cached = engine.get_analysis(game)
+        if cached:  # show the former result till the engine catches up
+            Observable.fire(Event.NEW_DEPTH(depth=cached['depth']))
+            Observable.fire(Event.NEW_SCORE(score=cached['score'], mate=cached['mate']))
+            Observable.fire(Event.NEW_PV(pv=cached['pv']))
 
     def observe(game: chess.Board, msg: Message):
         """Start a new ponder search on the current game."""
@@ -205,16 +287,15 @@ def main():
     def stop_search():
         """Stop current search."""
         engine.stop()
-        while not engine.is_waiting():
-            time.sleep(0.05)
+        if not engine.wait_idle(timeout=1):
             logging.warning('engine is still not waiting')
+            engine.wait_idle()
 
     def stop_clock():
         """Stop the clock."""
         if interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.OBSERVE, Mode.REMOTE):
             time_control.stop_internal()
             DisplayMsg.show(Message.CLOCK_STOP(devs={'ser', 'i2c', 'web'}))
-            time.sleep(0.4)  # @todo give some time to clock to really do it. Find a better solution!
         else:
             logging.warning('wrong function call [stop]! mode: %s', interaction_mode)
 
@@ -224,7 +305,6 @@ def main():
             time_control.start_internal(game.turn)
             tc_init = time_control.get_parameters()
             DisplayMsg.show(Message.CLOCK_START(turn=game.turn, tc_init=tc_init, devs={'ser', 'i2c', 'web'}))
-            time.sleep(0.4)  # @todo give some time to clock to really do it. Find a better solution!
         else:
             logging.warning('wrong function call [start]! mode: %s', interaction_mode)
 
@@ -247,6 +327,8 @@ def main():
             result = GameResult.FIVEFOLD_REPETITION
         if game.is_checkmate():
             result = GameResult.MATE
+        if result is None and syzygy and args.syzygy_adjudicate and syzygy.probe_wdl(game) == 0:
+            result = GameResult.DRAW  # tablebase draw
 
         if result is None:
             return False
@@ -280,7 +362,7 @@ def main():
             done_move = chess.Move.null()
             fen = game.fen()
             turn = game.turn
-            game.push(move)
+            positions.push(game, move)
             searchmoves.reset()
             if interaction_mode in (Mode.NORMAL, Mode.BRAIN):
                 msg = Message.USER_MOVE_DONE(move=move, fen=fen, turn=turn, game=game.copy())
@@ -352,36 +434,35 @@ def main():
             if interaction_mode in (Mode.NORMAL, Mode.BRAIN):
                 if is_not_user_turn(game.turn):
                     stop_search()
-                    game.pop()
+                    positions.pop(game)
                     logging.info('user move in computer turn, reverting to: %s', game.fen())
                 elif done_computer_fen:
                     done_computer_fen = None
                     done_move = chess.Move.null()
-                    game.pop()
+                    positions.pop(game)
                     logging.info('user move while computer move is displayed, reverting to: %s', game.fen())
                 else:
                     handled_fen = False
                     logging.error('last_legal_fens not cleared: %s', game.fen())
             elif interaction_mode == Mode.REMOTE:
                 if is_not_user_turn(game.turn):
-                    game.pop()
+                    positions.pop(game)
                     logging.info('user move in remote turn, reverting to: %s', game.fen())
                 elif done_computer_fen:
                     done_computer_fen = None
                     done_move = chess.Move.null()
-                    game.pop()
+                    positions.pop(game)
                     logging.info('user move while remote move is displayed, reverting to: %s', game.fen())
                 else:
                     handled_fen = False
                     logging.error('last_legal_fens not cleared: %s', game.fen())
             else:
-                game.pop()
+                positions.pop(game)
                 logging.info('wrong color move -> sliding, reverting to: %s', game.fen())
-            legal_moves = list(game.legal_moves)
-            move = legal_moves[last_legal_fens.index(fen)]  # type: chess.Move
+            move = last_legal_fens[fen]  # type: chess.Move
             user_move(move, sliding=True)
             if interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.REMOTE):
-                legal_fens = []
+                legal_fens = {}
             else:
                 legal_fens = compute_legal_fens(game.copy())
 
@@ -389,12 +470,11 @@ def main():
         elif fen in legal_fens:
             logging.info('standard move detected')
             # time_control.add_inc(game.turn)  # deactivated and moved to user_move() cause tc still running :-(
-            legal_moves = list(game.legal_moves)
-            move = legal_moves[legal_fens.index(fen)]  # type: chess.Move
+            move = legal_fens[fen]  # type: chess.Move
             user_move(move, sliding=False)
             last_legal_fens = legal_fens
             if interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.REMOTE):
-                legal_fens = []
+                legal_fens = {}
             else:
                 legal_fens = compute_legal_fens(game.copy())
 
@@ -403,12 +483,12 @@ def main():
             logging.info('done move detected')
             assert interaction_mode in (Mode.NORMAL, Mode.BRAIN, Mode.REMOTE), 'wrong mode: %s' % interaction_mode
             DisplayMsg.show(Message.COMPUTER_MOVE_DONE())
-            game.push(done_move)
+            positions.push(game, done_move)
             done_computer_fen = None
             done_move = chess.Move.null()
             game_end = check_game_state(game, play_mode)
             if game_end:
-                legal_fens = []
+                legal_fens = {}
                 DisplayMsg.show(game_end)
             else:
                 searchmoves.reset()
@@ -418,29 +498,33 @@ def main():
                     brain(game, time_control)
 
                 legal_fens = compute_legal_fens(game.copy())
-            last_legal_fens = []
+            last_legal_fens = {}
+
+        # Player had done the computer or remote move and his reply together before the board settled
+        elif done_computer_fen and fen in done_reply_fens:
+            logging.info('done move and user reply detected')
+            process_fen(done_computer_fen)
+            process_fen(fen)
+            return
 
         # Check if this is a previous legal position and allow user to restart from this position
         else:
-            handled_fen = False
-            game_copy = copy.deepcopy(game)
-            while game_copy.move_stack:
-                game_copy.pop()
-                if game_copy.board_fen() == fen:
-                    handled_fen = True
-                    logging.info('current game fen      : %s', game.fen())
-                    logging.info('undoing game until fen: %s', fen)
-                    stop_search_and_clock()
-                    while len(game_copy.move_stack) < len(game.move_stack):
-                        game.pop()
-
-                    # its a complete new pos, delete safed values
-                    done_computer_fen = None
-                    done_move = pb_move = chess.Move.null()
-                    searchmoves.reset()
+            ply = positions.get_ply(game, fen)
+            if ply is None:
+                handled_fen = False
+            else:
+                logging.info('current game fen      : %s', game.fen())
+                logging.info('undoing game until fen: %s', fen)
+                stop_search_and_clock()
+                while len(game.move_stack) > ply:
+                    positions.pop(game)
 
-                    set_wait_state(Message.TAKE_BACK(game=game.copy()))  # new: force stop no matter if picochess turn
-                    break
+                # its a complete new pos, delete safed values
+                done_computer_fen = None
+                done_move = pb_move = chess.Move.null()
+                searchmoves.reset()
+
+                set_wait_state(Message.TAKE_BACK(game=game.copy()))  # new: force stop no matter if picochess turn
         # doing issue #152
         logging.debug('fen: %s result: %s', fen, handled_fen)
         stop_fen_timer()
@@ -455,7 +539,7 @@ def main():
         if not done_computer_fen:
             nonlocal play_mode, legal_fens, last_legal_fens
             legal_fens = compute_legal_fens(game.copy())
-            last_legal_fens = []
+            last_legal_fens = {}
         if interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # @todo handle Mode.REMOTE too
             if done_computer_fen:
                 logging.debug('best move displayed, dont search and also keep play mode: %s', play_mode)
@@ -557,6 +641,20 @@ def main():
     parser.add_argument('-erk', '--engine-remote-key', type=str, help='key file for the remote engine server')
     parser.add_argument('-erh', '--engine-remote-home', type=str, help='engine home path for the remote engine server',
                         default='')
+    parser.add_argument('-eps', '--engine-pool-size', type=int, default=2,
+                        help='number of former engines kept alive for a fast engine switch (0=off)')
+    parser.add_argument('-epm', '--engine-pool-memory', type=int, default=128,
+                        help='max memory in MB of the former (local) engines kept alive')
+    parser.add_argument('-ac', '--analysis-cache', type=str, default=None,
+                        help='store the engine results by position in this (sqlite) file and show them at once')
+    parser.add_argument('-acs', '--analysis-cache-size', type=int, default=100000,
+                        help='max number of positions inside the analysis cache')
+    parser.add_argument('-acd', '--analysis-cache-depth', type=int, default=0,
+                        help='computer plays a cached best move without search if it has this depth (0=always search)')
+    parser.add_argument('-sy', '--syzygy', action='store_true',
+                        help='play the syzygy tablebase moves without engine search (not at a reduced engine level)')
+    parser.add_argument('-sya', '--syzygy-adjudicate', action='store_true',
+                        help='end the game as draw if the syzygy tablebases say so')
     parser.add_argument('-d', '--dgt-port', type=str,
                         help="enable dgt board on the given serial port such as '/dev/ttyUSB0'")
     parser.add_argument('-b', '--book', type=str, help="path of book such as 'books/b-flank.bin'",
@@ -564,6 +662,10 @@ def main():
     parser.add_argument('-t', '--time', type=str, default='5 0',
                         help="Time settings <FixSec> or <StMin IncSec> like '10'(move) or '5 0'(game) '3 2'(fischer). \
                         All values must be below 100")
+    parser.add_argument('-to', '--time-overhead', type=int, default=0,
+                        help='board & clock latency in ms subtracted from the engine time for each move')
+    parser.add_argument('-tb', '--time-budget', action='store_true',
+                        help='measure the overhead of the engine moves and keep it in reserve (latency-aware timing)')
     parser.add_argument('-norl', '--disable-revelation-leds', action='store_true', help='disable Revelation leds')
     parser.add_argument('-l', '--log-level', choices=['notset', 'debug', 'info', 'warning', 'error', 'critical'],
                         default='warning', help='logging level')
@@ -600,6 +702,8 @@ def main():
     parser.add_argument('-pi', '--dgtpi', action='store_true', help='use the DGTPi hardware')
     parser.add_argument('-pt', '--ponder-interval', type=int, default=3, choices=range(1, 9),
                         help='how long each part of ponder display should be visible (default=3secs)')
+    parser.add_argument('-ir', '--info-rate', type=int, default=2, choices=range(1, 11),
+                        help='how many engine infos (score, pv, depth) per second are processed (default=2)')
     parser.add_argument('-lang', '--language', choices=['en', 'de', 'nl', 'fr', 'es', 'it'], default='en',
                         help='picochess language')
     parser.add_argument('-c', '--enable-console', action='store_true', help='use console interface')
@@ -608,6 +712,12 @@ def main():
     parser.add_argument('-ss', '--slow-slide', type=int, default=0, choices=range(0, 10),
                         help='extra wait time factor for a stable board position (sliding detect)')
     parser.add_argument('-nosn', '--disable-short-notation', action='store_true', help='disable short notation')
+    parser.add_argument('-jf', '--journal-file', type=str, default=None,
+                        help='record all events, messages & dgt commands to this journal file')
+    parser.add_argument('-rf', '--replay-file', type=str, default=None,
+                        help='replay the input events of this journal file (use it together with console mode)')
+    parser.add_argument('-rmax', '--replay-max-speed', action='store_true',
+                        help='replay the journal as fast as possible instead of real time')
 
     args, unknown = parser.parse_known_args()
 
@@ -626,6 +736,12 @@ def main():
     logging.debug('startup parameters: %s', a_copy)
     if unknown:
         logging.warning('invalid parameter given %s', unknown)
+    evt_coalescer.set_interval(1 / args.info_rate)
+    TimeControl.set_overhead(args.time_overhead)
+    time_budget = TimeBudget() if args.time_budget else None
+    TimeControl.set_budget(time_budget)
+    if args.journal_file:
+        Journal(args.journal_file).start()
     # wire some dgt classes
     dgtboard = DgtBoard(args.dgt_port, args.disable_revelation_leds, args.dgtpi, args.disable_et, args.slow_slide)
     dgttranslate = DgtTranslate(args.beep_config, args.beep_some_level, args.language, version)
@@ -688,6 +804,10 @@ def main():
     engine = engine_name = None
     uci_shell = UciShell(hostname=args.engine_remote_server, username=args.engine_remote_user,
                          key_file=args.engine_remote_key, password=args.engine_remote_pass)
+    engine_pool = EnginePool(uci_shell, args.engine_pool_size, args.engine_pool_memory)
+    if args.analysis_cache:
+        UciEngine.set_analysis_cache(AnalysisCache(args.analysis_cache, args.analysis_cache_size))
+    syzygy = Syzygy('tablebases' + os.sep + 'syzygy') if args.syzygy or args.syzygy_adjudicate else None
     while engine_tries < 2:
         if engine_file is None:
             eng_ini = read_engine_ini(uci_shell.get(), engine_home)
@@ -695,7 +815,7 @@ def main():
             engine_tries += 1
         engine_file = os.path.basename(engine_file)
         # Gentlemen, start your engines...
-        engine = UciEngine(file=engine_file, uci_shell=uci_shell, home=engine_home)
+        engine = engine_pool.get(engine_file, home=engine_home)
         try:
             engine_name = engine.get_name()
             break
@@ -711,6 +831,7 @@ def main():
 
     # Startup - internal
     game = chess.Board()  # Create the current game
+    positions = PositionIndex(game)  # Plies of the game positions (for takeback)
     legal_fens = compute_legal_fens(game.copy())  # Compute the legal FENs
     all_books = get_opening_books()
     try:
@@ -718,13 +839,15 @@ def main():
     except ValueError:
         logging.warning('selected book not present, defaulting to %s', all_books[7]['file'])
         book_index = 7
-    bookreader = chess.polyglot.open_reader(all_books[book_index]['file'])
+    opening_books = OpeningBooks(all_books)  # all books mapped once, a book change is just a lookup
+    bookreader = opening_books.get(all_books[book_index]['file'])
     searchmoves = AlternativeMover()
     interaction_mode = Mode.NORMAL
     play_mode = PlayMode.USER_WHITE  # @todo handle Mode.REMOTE too
 
-    last_legal_fens = []
+    last_legal_fens = {}
     done_computer_fen = None
+    done_reply_fens = {}  # legal fens after the (displayed) computer move
     done_move = chess.Move.null()
     game_declared = False  # User declared resignation or draw
 
@@ -751,403 +874,464 @@ def main():
                                            level_index=level_index,
                                            has_960=engine.has_chess960(), has_ponder=engine.has_ponder()))
 
+    # an own thread, since the (web) location lookup can take long - it mustnt block the timer_scheduler workers
     ip_info_thread = threading.Timer(10, display_ip_info)  # give RaspberyPi 10sec time to startup its network devices
     ip_info_thread.start()
 
-    fen_timer = threading.Timer(3, expired_fen_timer)
+    fen_timer = ScheduledTimer(3, expired_fen_timer)
     fen_timer_running = False
     error_fen = None
 
     pb_move = chess.Move.null()  # safes the best ponder move so far (for permanent brain use)
 
-    # Event loop
-    logging.info('evt_queue ready')
-    while True:
-        try:
-            event = evt_queue.get()
-        except queue.Empty:
-            pass
+    event_handlers = HandlerRegistry()  # Event class => handle_xxx() function
+
+    @event_handlers.handles(Event.FEN)
+    def handle_fen(event):
+        process_fen(event.fen)
+
+    @event_handlers.handles(Event.KEYBOARD_MOVE)
+    def handle_keyboard_move(event):
+        move = event.move
+        logging.debug('keyboard move [%s]', move)
+        if move not in game.legal_moves:
+            logging.warning('illegal move. fen: [%s]', game.fen())
         else:
-            logging.debug('received event from evt_queue: %s', event)
-            if False:  # switch-case
-                pass
-            elif isinstance(event, Event.FEN):
-                process_fen(event.fen)
-
-            elif isinstance(event, Event.KEYBOARD_MOVE):
-                move = event.move
-                logging.debug('keyboard move [%s]', move)
-                if move not in game.legal_moves:
-                    logging.warning('illegal move. fen: [%s]', game.fen())
-                else:
-                    game_copy = game.copy()
-                    game_copy.push(move)
-                    fen = game_copy.board_fen()
-                    DisplayMsg.show(Message.DGT_FEN(fen=fen, raw=False))
-
-            elif isinstance(event, Event.LEVEL):
-                if event.options:
-                    engine.startup(event.options, False)
-                DisplayMsg.show(Message.LEVEL(level_text=event.level_text, level_name=event.level_name,
-                                              do_speak=bool(event.options)))
-                stop_fen_timer()
-
-            elif isinstance(event, Event.NEW_ENGINE):
-                old_file = engine.get_file()
-                old_options = {}
-                raw_options = engine.get_options()
-                for name, value in raw_options.items():  # transfer Option to string by using the "default" value
-                    old_options[name] = str(value.default)
-                engine_fallback = False
-                # Stop the old engine cleanly
-                stop_search()
-                # Closeout the engine process and threads
-                if engine.quit():
-                    # Load the new one and send args.
-                    engine = UciEngine(file=event.eng['file'], uci_shell=uci_shell)
-                    try:
-                        engine_name = engine.get_name()
-                    except AttributeError:
-                        # New engine failed to start, restart old engine
-                        logging.error('new engine failed to start, reverting to %s', old_file)
-                        engine_fallback = True
-                        event.options = old_options
-                        engine = UciEngine(file=old_file, uci_shell=uci_shell)
-                        try:
-                            engine_name = engine.get_name()
-                        except AttributeError:
-                            # Help - old engine failed to restart. There is no engine
-                            logging.error('no engines started')
-                            DisplayMsg.show(Message.ENGINE_FAIL())
-                            time.sleep(3)
-                            sys.exit(-1)
-                    engine.startup(event.options)
+            game_copy = game.copy()
+            game_copy.push(move)
+            fen = game_copy.board_fen()
+            DisplayMsg.show(Message.DGT_FEN(fen=fen, raw=False))
+
+    @event_handlers.handles(Event.LEVEL)
+    def handle_level(event):
+        if event.options:
+            engine.startup(event.options, False)
+        DisplayMsg.show(Message.LEVEL(level_text=event.level_text, level_name=event.level_name,
+                                      do_speak=bool(event.options)))
+        stop_fen_timer()
+
+    @event_handlers.handles(Event.NEW_ENGINE)
+    def handle_new_engine(event):
+        nonlocal engine, engine_name
+        old_file = engine.get_file()
+        old_options = {}
+        raw_options = engine.get_options()
+        for name, value in raw_options.items():  # transfer Option to string by using the "default" value
+            old_options[name] = str(value.default)
+        engine_fallback = False
+        options = event.options
+        # Stop the old engine cleanly
+        stop_search()
+        # Park the engine process for a later reuse (or closeout the process and threads)
+        if engine_pool.park(engine):
+            # Load the new one (from the pool) and send args.
+            engine = engine_pool.get(event.eng['file'])
+            try:
+                engine_name = engine.get_name()
+            except AttributeError:
+                # New engine failed to start, restart old engine
+                logging.error('new engine failed to start, reverting to %s', old_file)
+                engine_fallback = True
+                options = old_options
+                engine = engine_pool.get(old_file)
+                try:
+                    engine_name = engine.get_name()
+                except AttributeError:
+                    # Help - old engine failed to restart. There is no engine
+                    logging.error('no engines started')
+                    DisplayMsg.show(Message.ENGINE_FAIL())
+                    engine_pool.quit()
+                    time.sleep(3)
+                    sys.exit(-1)
+            engine.startup(options)
+            engine.newgame(game.copy())
+            # All done - rock'n'roll
+            if interaction_mode == Mode.BRAIN and not engine.has_ponder():
+                logging.debug('new engine doesnt support brain mode, reverting to %s', old_file)
+                engine_fallback = True
+                if engine_pool.park(engine):
+                    engine = engine_pool.get(old_file)
+                    engine.startup(old_options)
                     engine.newgame(game.copy())
-                    # All done - rock'n'roll
-                    if interaction_mode == Mode.BRAIN and not engine.has_ponder():
-                        logging.debug('new engine doesnt support brain mode, reverting to %s', old_file)
-                        engine_fallback = True
-                        if engine.quit():
-                            engine = UciEngine(file=old_file, uci_shell=uci_shell)
-                            engine.startup(old_options)
-                            engine.newgame(game.copy())
-                        else:
-                            logging.error('engine shutdown failure')
-                    engine_mode()
-                    if engine_fallback:
-                        msg = Message.ENGINE_FAIL()
-                    else:
-                        searchmoves.reset()
-                        msg = Message.ENGINE_READY(eng=event.eng, engine_name=engine_name,
-                                                   eng_text=event.eng_text, has_levels=engine.has_levels(),
-                                                   has_960=engine.has_chess960(), has_ponder=engine.has_ponder(),
-                                                   show_ok=event.show_ok)
-                    # Schedule cleanup of old objects
-                    gc.collect()
-                    set_wait_state(msg, not engine_fallback)
-                    if interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # engine isnt started/searching => stop the clock
-                        stop_clock()
                 else:
                     logging.error('engine shutdown failure')
-                    DisplayMsg.show(Message.ENGINE_FAIL())
-                # here dont care if engine supports pondering, cause Mode.NORMAL from startup
-                if not engine_fallback and not args.engine_remote_server:  # dont write engine(_level) if remote engine
-                    write_picochess_ini('engine', event.eng['file'])
-
-            elif isinstance(event, Event.SETUP_POSITION):
-                logging.debug('setting up custom fen: %s', event.fen)
-                uci960 = event.uci960
-
-                if game.move_stack:
-                    if not (game.is_game_over() or game_declared):
-                        result = GameResult.ABORT
-                        DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
-                game = chess.Board(event.fen, uci960)
-                # see new_game
-                stop_search_and_clock()
-                if engine.has_chess960():
-                    engine.option('UCI_Chess960', uci960)
-                    engine.send()
-                engine.newgame(game.copy())
-                done_computer_fen = None
-                done_move = pb_move = chess.Move.null()
-                time_control.reset()
+            engine_mode()
+            if engine_fallback:
+                msg = Message.ENGINE_FAIL()
+            else:
                 searchmoves.reset()
-                game_declared = False
-                set_wait_state(Message.START_NEW_GAME(game=game.copy(), newgame=True))
-
-            elif isinstance(event, Event.NEW_GAME):
-                newgame = game.move_stack or (game.chess960_pos() != event.pos960)
-                if newgame:
-                    logging.debug('starting a new game with code: %s', event.pos960)
-                    uci960 = event.pos960 != 518
-
-                    if not (game.is_game_over() or game_declared):
-                        result = GameResult.ABORT
-                        DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
-
-                    game = chess.Board()
-                    if uci960:
-                        game.set_chess960_pos(event.pos960)
-                    # see setup_position
-                    stop_search_and_clock()
-                    if engine.has_chess960():
-                        engine.option('UCI_Chess960', uci960)
-                        engine.send()
-                    engine.newgame(game.copy())
-                    done_computer_fen = None
-                    done_move = pb_move = chess.Move.null()
-                    time_control.reset()
-                    searchmoves.reset()
-                    game_declared = False
-                    set_wait_state(Message.START_NEW_GAME(game=game.copy(), newgame=newgame))
-                else:
-                    logging.debug('no need to start a new game')
-                    DisplayMsg.show(Message.START_NEW_GAME(game=game.copy(), newgame=newgame))
-
-            elif isinstance(event, Event.PAUSE_RESUME):
-                if engine.is_thinking():
-                    stop_clock()
-                    engine.stop(show_best=True)
-                elif not done_computer_fen:
-                    if time_control.internal_running():
-                        stop_clock()
-                    else:
-                        start_clock()
-                else:
-                    logging.debug('best move displayed, dont start/stop clock')
-
-            elif isinstance(event, Event.ALTERNATIVE_MOVE):
-                if done_computer_fen:
-                    done_computer_fen = None
-                    done_move = chess.Move.null()
-                    if interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # @todo handle Mode.REMOTE too
-                        if time_control.mode == TimeMode.FIXED:
-                            time_control.reset()
-                        # set computer to move - in case the user just changed the engine
-                        play_mode = PlayMode.USER_WHITE if game.turn == chess.BLACK else PlayMode.USER_BLACK
-                        if not check_game_state(game, play_mode):
-                            think(game, time_control, Message.ALTERNATIVE_MOVE(game=game.copy(), play_mode=play_mode))
-                    else:
-                        logging.warning('wrong function call [alternative]! mode: %s', interaction_mode)
-
-            elif isinstance(event, Event.SWITCH_SIDES):
-                if interaction_mode in (Mode.NORMAL, Mode.BRAIN):
-                    if not engine.is_waiting():
-                        stop_search_and_clock()
-
-                    last_legal_fens = []
-                    best_move_displayed = done_computer_fen
-                    if best_move_displayed:
-                        move = done_move
-                        done_computer_fen = None
-                        done_move = pb_move = chess.Move.null()
-                    else:
-                        move = chess.Move.null()  # not really needed
-
-                    play_mode = PlayMode.USER_WHITE if play_mode == PlayMode.USER_BLACK else PlayMode.USER_BLACK
-                    text = play_mode.value  # type: str
-                    msg = Message.PLAY_MODE(play_mode=play_mode, play_mode_text=dgttranslate.text(text))
-
-                    if time_control.mode == TimeMode.FIXED:
-                        time_control.reset()
-
-                    legal_fens = []
-                    game_end = check_game_state(game, play_mode)
-                    if game_end:
-                        DisplayMsg.show(msg)
-                    else:
-                        cond1 = game.turn == chess.WHITE and play_mode == PlayMode.USER_BLACK
-                        cond2 = game.turn == chess.BLACK and play_mode == PlayMode.USER_WHITE
-                        if cond1 or cond2:
-                            time_control.reset_start_time()
-                            think(game, time_control, msg)
-                        else:
-                            DisplayMsg.show(msg)
-                            start_clock()
-                            legal_fens = compute_legal_fens(game.copy())
-
-                    if best_move_displayed:
-                        DisplayMsg.show(Message.SWITCH_SIDES(game=game.copy(), move=move))
-
-            elif isinstance(event, Event.DRAWRESIGN):
-                if not game_declared:  # in case user leaves kings in place while moving other pieces
-                    stop_search_and_clock()
-                    DisplayMsg.show(Message.GAME_ENDS(result=event.result, play_mode=play_mode, game=game.copy()))
-                    game_declared = True
-                    stop_fen_timer()
-
-            elif isinstance(event, Event.REMOTE_MOVE):
-                if interaction_mode == Mode.REMOTE and is_not_user_turn(game.turn):
-                    stop_search_and_clock()
-                    DisplayMsg.show(Message.COMPUTER_MOVE(move=event.move, ponder=chess.Move.null(), game=game.copy(),
-                                                          wait=False))
-                    game_copy = game.copy()
-                    game_copy.push(event.move)
-                    done_computer_fen = game_copy.board_fen()
-                    done_move = event.move
-                    pb_move = chess.Move.null()
-                else:
-                    logging.warning('wrong function call [remote]! mode: %s turn: %s', interaction_mode, game.turn)
-
-            elif isinstance(event, Event.BEST_MOVE):
-                if interaction_mode in (Mode.NORMAL, Mode.BRAIN) and is_not_user_turn(game.turn):
-                    # clock must be stopped BEFORE the "book_move" event cause SetNRun resets the clock display
-                    stop_clock()
-                    # @todo 8/8/R6P/1R6/7k/2B2K1p/8/8 and sliding Ra6 over a5 to a4 - handle this in correct way!!
-                    if game.is_game_over():
-                        logging.warning('illegal move on game_end - sliding? move: %s fen: %s', event.move, game.fen())
-                    else:
-                        if event.inbook:
-                            DisplayMsg.show(Message.BOOK_MOVE())
-                        searchmoves.add(event.move)
-                        DisplayMsg.show(Message.COMPUTER_MOVE(move=event.move, ponder=event.ponder, game=game.copy(),
-                                                              wait=event.inbook))
-                        game_copy = game.copy()
-                        game_copy.push(event.move)
-                        done_computer_fen = game_copy.board_fen()
-                        done_move = event.move
-                        brain_book = interaction_mode == Mode.BRAIN and event.inbook
-                        pb_move = event.ponder if event.ponder and not brain_book else chess.Move.null()
-                else:
-                    logging.warning('wrong function call [best]! mode: %s turn: %s', interaction_mode, game.turn)
-
-            elif isinstance(event, Event.NEW_PV):
-                if interaction_mode == Mode.BRAIN and engine.is_pondering():
-                    logging.debug('in brain mode and pondering ignore pv %s', event.pv[:3])
-                else:
-                    # illegal moves can occur if a pv from the engine arrives at the same time as an user move
-                    if game.is_legal(event.pv[0]):
-                        DisplayMsg.show(Message.NEW_PV(pv=event.pv, mode=interaction_mode, game=game.copy()))
-                    else:
-                        logging.info('illegal move can not be displayed. move: %s fen: %s', event.pv[0], game.fen())
-                        logging.info('engine status: t:%s p:%s', engine.is_thinking(), engine.is_pondering())
-
-            elif isinstance(event, Event.NEW_SCORE):
-                if interaction_mode == Mode.BRAIN and engine.is_pondering():
-                    logging.debug('in brain mode and pondering, ignore score %s', event.score)
-                else:
-                    DisplayMsg.show(Message.NEW_SCORE(score=event.score, mate=event.mate, mode=interaction_mode,
-                                                      turn=game.turn))
-
-            elif isinstance(event, Event.NEW_DEPTH):
-                if interaction_mode == Mode.BRAIN and engine.is_pondering():
-                    logging.debug('in brain mode and pondering, ignore depth %s', event.depth)
-                else:
-                    DisplayMsg.show(Message.NEW_DEPTH(depth=event.depth))
+                msg = Message.ENGINE_READY(eng=event.eng, engine_name=engine_name,
+                                           eng_text=event.eng_text, has_levels=engine.has_levels(),
+                                           has_960=engine.has_chess960(), has_ponder=engine.has_ponder(),
+                                           show_ok=event.show_ok)
+            # Schedule cleanup of old objects
+            gc.collect()
+            set_wait_state(msg, not engine_fallback)
+            if interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # engine isnt started/searching => stop the clock
+                stop_clock()
+        else:
+            logging.error('engine shutdown failure')
+            DisplayMsg.show(Message.ENGINE_FAIL())
+        # here dont care if engine supports pondering, cause Mode.NORMAL from startup
+        if not engine_fallback and not args.engine_remote_server:  # dont write engine(_level) if remote engine
+            write_picochess_ini('engine', event.eng['file'])
+
+    @event_handlers.handles(Event.SETUP_POSITION)
+    def handle_setup_position(event):
+        nonlocal game, done_computer_fen, done_move, pb_move, game_declared
+        logging.debug('setting up custom fen: %s', event.fen)
+        uci960 = event.uci960
+
+        if game.move_stack:
+            if not (game.is_game_over() or game_declared):
+                result = GameResult.ABORT
+                DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
+        game = chess.Board(event.fen, uci960)
+        positions.reset(game)
+        # see new_game
+        stop_search_and_clock()
+        if engine.has_chess960():
+            engine.option('UCI_Chess960', uci960)
+            engine.send()
+        engine.newgame(game.copy())
+        done_computer_fen = None
+        done_move = pb_move = chess.Move.null()
+        time_control.reset()
+        searchmoves.reset()
+        game_declared = False
+        set_wait_state(Message.START_NEW_GAME(game=game.copy(), newgame=True))
+
+    @event_handlers.handles(Event.NEW_GAME)
+    def handle_new_game(event):
+        nonlocal game, done_computer_fen, done_move, pb_move, game_declared
+        newgame = game.move_stack or (game.chess960_pos() != event.pos960)
+        if newgame:
+            logging.debug('starting a new game with code: %s', event.pos960)
+            uci960 = event.pos960 != 518
+
+            if not (game.is_game_over() or game_declared):
+                result = GameResult.ABORT
+                DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
 
-            elif isinstance(event, Event.START_SEARCH):
-                DisplayMsg.show(Message.SEARCH_STARTED())
+            game = chess.Board()
+            if uci960:
+                game.set_chess960_pos(event.pos960)
+            positions.reset(game)
+            # see setup_position
+            stop_search_and_clock()
+            if engine.has_chess960():
+                engine.option('UCI_Chess960', uci960)
+                engine.send()
+            engine.newgame(game.copy())
+            done_computer_fen = None
+            done_move = pb_move = chess.Move.null()
+            time_control.reset()
+            searchmoves.reset()
+            game_declared = False
+            set_wait_state(Message.START_NEW_GAME(game=game.copy(), newgame=newgame))
+        else:
+            logging.debug('no need to start a new game')
+            DisplayMsg.show(Message.START_NEW_GAME(game=game.copy(), newgame=newgame))
 
-            elif isinstance(event, Event.STOP_SEARCH):
-                DisplayMsg.show(Message.SEARCH_STOPPED())
+    @event_handlers.handles(Event.PAUSE_RESUME)
+    def handle_pause_resume(event):
+        if engine.is_thinking():
+            stop_clock()
+            engine.stop(show_best=True)
+        elif not done_computer_fen:
+            if time_control.internal_running():
+                stop_clock()
+            else:
+                start_clock()
+        else:
+            logging.debug('best move displayed, dont start/stop clock')
 
-            elif isinstance(event, Event.SET_INTERACTION_MODE):
-                if event.mode not in (Mode.NORMAL, Mode.REMOTE) and done_computer_fen:  # @todo check why still needed
-                    dgtmenu.set_mode(interaction_mode)  # undo the button4 stuff
-                    logging.warning('mode cant be changed to a pondering mode as long as a move is displayed')
-                    mode_text = dgttranslate.text('Y10_errormode')
-                    msg = Message.INTERACTION_MODE(mode=interaction_mode, mode_text=mode_text, show_ok=False)
-                    DisplayMsg.show(msg)
-                else:
-                    stop_search_and_clock()
-                    interaction_mode = event.mode
-                    engine_mode()
-                    msg = Message.INTERACTION_MODE(mode=event.mode, mode_text=event.mode_text, show_ok=event.show_ok)
-                    set_wait_state(msg)  # dont clear searchmoves here
-
-            elif isinstance(event, Event.SET_OPENING_BOOK):
-                write_picochess_ini('book', event.book['file'])
-                logging.debug('changing opening book [%s]', event.book['file'])
-                bookreader = chess.polyglot.open_reader(event.book['file'])
-                DisplayMsg.show(Message.OPENING_BOOK(book_text=event.book_text, show_ok=event.show_ok))
-                stop_fen_timer()
-
-            elif isinstance(event, Event.SET_TIME_CONTROL):
-                time_control.stop_internal(log=False)
-                tc_init = event.tc_init
-                time_control = TimeControl(**tc_init)
-                if time_control.mode == TimeMode.BLITZ:
-                    write_picochess_ini('time', '{:d} 0'.format(tc_init['blitz']))
-                elif time_control.mode == TimeMode.FISCHER:
-                    write_picochess_ini('time', '{:d} {:d}'.format(tc_init['blitz'], tc_init['fischer']))
-                elif time_control.mode == TimeMode.FIXED:
-                    write_picochess_ini('time', '{:d}'.format(tc_init['fixed']))
-                text = Message.TIME_CONTROL(time_text=event.time_text, show_ok=event.show_ok, tc_init=tc_init)
-                DisplayMsg.show(text)
-                stop_fen_timer()
-
-            elif isinstance(event, Event.CLOCK_TIME):
-                if dgtdispatcher.is_prio_device(event.dev, event.connect):  # transfer only the most prio clock's time
-                    logging.debug('setting tc clock time - prio: %s w:%s b:%s', event.dev,
-                                  hms_time(event.time_white), hms_time(event.time_black))
-                    time_control.set_clock_times(white_time=event.time_white, black_time=event.time_black)
-                    # find out, if we are in bullet time (<=60secs on users clock or lowest time if user side unknown)
-                    time_u = event.time_white
-                    time_c = event.time_black
-                    if interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # @todo handle Mode.REMOTE too
-                        if play_mode == PlayMode.USER_BLACK:
-                            time_u, time_c = time_c, time_u
-                    else:  # here, we use the lowest time
-                        if time_c < time_u:
-                            time_u, time_c = time_c, time_u
-                    low_time = time_u <= 60 and not (time_control.mode == TimeMode.FIXED and time_control.move_time > 2)
-                    dgtboard.low_time = low_time
-                    DisplayMsg.show(Message.CLOCK_TIME(time_white=event.time_white, time_black=event.time_black,
-                                                       low_time=low_time))
-                else:
-                    logging.debug('ignore clock time - too low prio: %s', event.dev)
+    @event_handlers.handles(Event.ALTERNATIVE_MOVE)
+    def handle_alternative_move(event):
+        nonlocal done_computer_fen, done_move, play_mode
+        if done_computer_fen:
+            done_computer_fen = None
+            done_move = chess.Move.null()
+            if interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # @todo handle Mode.REMOTE too
+                if time_control.mode == TimeMode.FIXED:
+                    time_control.reset()
+                # set computer to move - in case the user just changed the engine
+                play_mode = PlayMode.USER_WHITE if game.turn == chess.BLACK else PlayMode.USER_BLACK
+                if not check_game_state(game, play_mode):
+                    think(game, time_control, Message.ALTERNATIVE_MOVE(game=game.copy(), play_mode=play_mode))
+            else:
+                logging.warning('wrong function call [alternative]! mode: %s', interaction_mode)
 
-            elif isinstance(event, Event.OUT_OF_TIME):
+    @event_handlers.handles(Event.SWITCH_SIDES)
+    def handle_switch_sides(event):
+        nonlocal last_legal_fens, legal_fens, done_computer_fen, done_move, pb_move, play_mode
+        if interaction_mode in (Mode.NORMAL, Mode.BRAIN):
+            if not engine.is_waiting():
                 stop_search_and_clock()
-                result = GameResult.OUT_OF_TIME
-                DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
 
-            elif isinstance(event, Event.SHUTDOWN):
-                if uci_shell.get():
-                    uci_shell.get().__exit__(None, None, None)  # force to call __exit__ (close shell connection)
-                result = GameResult.ABORT
-                DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
-                DisplayMsg.show(Message.SYSTEM_SHUTDOWN())
-                shutdown(args.dgtpi and uci_shell.get() is None, dev=event.dev)  # @todo make independant of remote eng
-
-            elif isinstance(event, Event.REBOOT):
-                result = GameResult.ABORT
-                DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
-                DisplayMsg.show(Message.SYSTEM_REBOOT())
-                reboot(args.dgtpi and uci_shell.get() is None, dev=event.dev)  # @todo make independant of remote eng
+            last_legal_fens = {}
+            best_move_displayed = done_computer_fen
+            if best_move_displayed:
+                move = done_move
+                done_computer_fen = None
+                done_move = pb_move = chess.Move.null()
+            else:
+                move = chess.Move.null()  # not really needed
 
-            elif isinstance(event, Event.EMAIL_LOG):
-                email_logger = Emailer(email=args.email, mailgun_key=args.mailgun_key)
-                email_logger.set_smtp(sserver=args.smtp_server, suser=args.smtp_user, spass=args.smtp_pass,
-                                      sencryption=args.smtp_encryption, sfrom=args.smtp_from)
-                body = 'You probably want to forward this file to a picochess developer ;-)'
-                email_logger.send('Picochess LOG', body, '/opt/picochess/logs/{}'.format(args.log_file))
+            play_mode = PlayMode.USER_WHITE if play_mode == PlayMode.USER_BLACK else PlayMode.USER_BLACK
+            text = play_mode.value  # type: str
+            msg = Message.PLAY_MODE(play_mode=play_mode, play_mode_text=dgttranslate.text(text))
 
-            elif isinstance(event, Event.SET_VOICE):
-                DisplayMsg.show(Message.SET_VOICE(type=event.type, lang=event.lang, speaker=event.speaker,
-                                                  speed=event.speed))
+            if time_control.mode == TimeMode.FIXED:
+                time_control.reset()
 
-            elif isinstance(event, Event.KEYBOARD_BUTTON):
-                DisplayMsg.show(Message.DGT_BUTTON(button=event.button, dev=event.dev))
+            legal_fens = {}
+            game_end = check_game_state(game, play_mode)
+            if game_end:
+                DisplayMsg.show(msg)
+            else:
+                cond1 = game.turn == chess.WHITE and play_mode == PlayMode.USER_BLACK
+                cond2 = game.turn == chess.BLACK and play_mode == PlayMode.USER_WHITE
+                if cond1 or cond2:
+                    time_control.reset_start_time()
+                    think(game, time_control, msg)
+                else:
+                    DisplayMsg.show(msg)
+                    start_clock()
+                    legal_fens = compute_legal_fens(game.copy())
+
+            if best_move_displayed:
+                DisplayMsg.show(Message.SWITCH_SIDES(game=game.copy(), move=move))
+
+    @event_handlers.handles(Event.DRAWRESIGN)
+    def handle_drawresign(event):
+        nonlocal game_declared
+        if not game_declared:  # in case user leaves kings in place while moving other pieces
+            stop_search_and_clock()
+            DisplayMsg.show(Message.GAME_ENDS(result=event.result, play_mode=play_mode, game=game.copy()))
+            game_declared = True
+            stop_fen_timer()
+
+    @event_handlers.handles(Event.REMOTE_MOVE)
+    def handle_remote_move(event):
+        nonlocal done_computer_fen, done_reply_fens, done_move, pb_move
+        if interaction_mode == Mode.REMOTE and is_not_user_turn(game.turn):
+            stop_search_and_clock()
+            DisplayMsg.show(Message.COMPUTER_MOVE(move=event.move, ponder=chess.Move.null(), game=game.copy(),
+                                                  wait=False))
+            game_copy = game.copy()
+            game_copy.push(event.move)
+            done_computer_fen = game_copy.board_fen()
+            done_reply_fens = compute_legal_fens(game_copy)  # user might do his reply before the board settles
+            done_move = event.move
+            pb_move = chess.Move.null()
+        else:
+            logging.warning('wrong function call [remote]! mode: %s turn: %s', interaction_mode, game.turn)
+
+    @event_handlers.handles(Event.BEST_MOVE)
+    def handle_best_move(event):
+        nonlocal done_computer_fen, done_reply_fens, done_move, pb_move
+        if interaction_mode in (Mode.NORMAL, Mode.BRAIN) and is_not_user_turn(game.turn):
+            if not game.is_game_over() and not game.is_legal(event.move):
+                # a result of a former search (for an already changed position) - the current search keeps running
+                logging.warning('ignore best move of a former search - move: %s fen: %s', event.move, game.fen())
+                return
+            # clock must be stopped BEFORE the "book_move" event cause SetNRun resets the clock display
+            stop_clock()
+            if time_budget:
+                time_budget.stop_turn(None if event.inbook else engine.search_ns)
+            # @todo 8/8/R6P/1R6/7k/2B2K1p/8/8 and sliding Ra6 over a5 to a4 - handle this in correct way!!
+            if game.is_game_over():
+                logging.warning('illegal move on game_end - sliding? move: %s fen: %s', event.move, game.fen())
+            else:
+                if event.inbook:
+                    DisplayMsg.show(Message.BOOK_MOVE())
+                searchmoves.add(event.move)
+                DisplayMsg.show(Message.COMPUTER_MOVE(move=event.move, ponder=event.ponder, game=game.copy(),
+                                                      wait=event.inbook))
+                game_copy = game.copy()
+                game_copy.push(event.move)
+                done_computer_fen = game_copy.board_fen()
+                done_reply_fens = compute_legal_fens(game_copy)  # user might do his reply before the board settles
+                done_move = event.move
+                brain_book = interaction_mode == Mode.BRAIN and event.inbook
+                pb_move = event.ponder if event.ponder and not brain_book else chess.Move.null()
+        else:
+            logging.warning('wrong function call [best]! mode: %s turn: %s', interaction_mode, game.turn)
 
-            elif isinstance(event, Event.KEYBOARD_FEN):
-                DisplayMsg.show(Message.DGT_FEN(fen=event.fen, raw=False))
+    @event_handlers.handles(Event.NEW_PV)
+    def handle_new_pv(event):
+        if interaction_mode == Mode.BRAIN and engine.is_pondering():
+            logging.debug('in brain mode and pondering ignore pv %s', event.pv[:3])
+        else:
+            # illegal moves can occur if a pv from the engine arrives at the same time as an user move
+            if game.is_legal(event.pv[0]):
+                DisplayMsg.show(Message.NEW_PV(pv=event.pv, mode=interaction_mode, game=game.copy()))
+            else:
+                logging.info('illegal move can not be displayed. move: %s fen: %s', event.pv[0], game.fen())
+                logging.info('engine status: t:%s p:%s', engine.is_thinking(), engine.is_pondering())
 
-            elif isinstance(event, Event.EXIT_MENU):
-                DisplayMsg.show(Message.EXIT_MENU())
+    @event_handlers.handles(Event.NEW_SCORE)
+    def handle_new_score(event):
+        if interaction_mode == Mode.BRAIN and engine.is_pondering():
+            logging.debug('in brain mode and pondering, ignore score %s', event.score)
+        else:
+            DisplayMsg.show(Message.NEW_SCORE(score=event.score, mate=event.mate, mode=interaction_mode,
+                                              turn=game.turn))
 
-            elif isinstance(event, Event.UPDATE_PICO):
-                DisplayMsg.show(Message.UPDATE_PICO())
-                checkout_tag(event.tag)
-                DisplayMsg.show(Message.EXIT_MENU())
+    @event_handlers.handles(Event.NEW_DEPTH)
+    def handle_new_depth(event):
+        if interaction_mode == Mode.BRAIN and engine.is_pondering():
+            logging.debug('in brain mode and pondering, ignore depth %s', event.depth)
+        else:
+            DisplayMsg.show(Message.NEW_DEPTH(depth=event.depth))
+
+    @event_handlers.handles(Event.START_SEARCH)
+    def handle_start_search(event):
+        DisplayMsg.show(Message.SEARCH_STARTED())
+
+    @event_handlers.handles(Event.STOP_SEARCH)
+    def handle_stop_search(event):
+        DisplayMsg.show(Message.SEARCH_STOPPED())
+
+    @event_handlers.handles(Event.SET_INTERACTION_MODE)
+    def handle_set_interaction_mode(event):
+        nonlocal interaction_mode
+        if event.mode not in (Mode.NORMAL, Mode.REMOTE) and done_computer_fen:  # @todo check why still needed
+            dgtmenu.set_mode(interaction_mode)  # undo the button4 stuff
+            logging.warning('mode cant be changed to a pondering mode as long as a move is displayed')
+            mode_text = dgttranslate.text('Y10_errormode')
+            msg = Message.INTERACTION_MODE(mode=interaction_mode, mode_text=mode_text, show_ok=False)
+            DisplayMsg.show(msg)
+        else:
+            stop_search_and_clock()
+            interaction_mode = event.mode
+            engine_mode()
+            msg = Message.INTERACTION_MODE(mode=event.mode, mode_text=event.mode_text, show_ok=event.show_ok)
+            set_wait_state(msg)  # dont clear searchmoves here
+
+    @event_handlers.handles(Event.SET_OPENING_BOOK)
+    def handle_set_opening_book(event):
+        nonlocal bookreader
+        write_picochess_ini('book', event.book['file'])
+        logging.debug('changing opening book [%s]', event.book['file'])
+        bookreader = opening_books.get(event.book['file'])
+        DisplayMsg.show(Message.OPENING_BOOK(book_text=event.book_text, show_ok=event.show_ok))
+        stop_fen_timer()
 
-            elif isinstance(event, Event.REMOTE_ROOM):
-                DisplayMsg.show(Message.REMOTE_ROOM(inside=event.inside))
+    @event_handlers.handles(Event.SET_TIME_CONTROL)
+    def handle_set_time_control(event):
+        nonlocal time_control
+        time_control.stop_internal(log=False)
+        tc_init = event.tc_init
+        time_control = TimeControl(**tc_init)
+        if time_control.mode == TimeMode.BLITZ:
+            write_picochess_ini('time', '{:d} 0'.format(tc_init['blitz']))
+        elif time_control.mode == TimeMode.FISCHER:
+            write_picochess_ini('time', '{:d} {:d}'.format(tc_init['blitz'], tc_init['fischer']))
+        elif time_control.mode == TimeMode.FIXED:
+            write_picochess_ini('time', '{:d}'.format(tc_init['fixed']))
+        text = Message.TIME_CONTROL(time_text=event.time_text, show_ok=event.show_ok, tc_init=tc_init)
+        DisplayMsg.show(text)
+        stop_fen_timer()
 
-            else:  # Default
-                logging.warning('event not handled : [%s]', event)
+    @event_handlers.handles(Event.CLOCK_TIME)
+    def handle_clock_time(event):
+        if dgtdispatcher.is_prio_device(event.dev, event.connect):  # transfer only the most prio clock's time
+            logging.debug('setting tc clock time - prio: %s w:%s b:%s', event.dev,
+                          hms_time(event.time_white), hms_time(event.time_black))
+            time_control.set_clock_times(white_time=event.time_white, black_time=event.time_black)
+            # find out, if we are in bullet time (<=60secs on users clock or lowest time if user side unknown)
+            time_u = event.time_white
+            time_c = event.time_black
+            if interaction_mode in (Mode.NORMAL, Mode.BRAIN):  # @todo handle Mode.REMOTE too
+                if play_mode == PlayMode.USER_BLACK:
+                    time_u, time_c = time_c, time_u
+            else:  # here, we use the lowest time
+                if time_c < time_u:
+                    time_u, time_c = time_c, time_u
+            low_time = time_u <= 60 and not (time_control.mode == TimeMode.FIXED and time_control.move_time > 2)
+            dgtboard.low_time = low_time
+            DisplayMsg.show(Message.CLOCK_TIME(time_white=event.time_white, time_black=event.time_black,
+                                               low_time=low_time))
+        else:
+            logging.debug('ignore clock time - too low prio: %s', event.dev)
+
+    @event_handlers.handles(Event.OUT_OF_TIME)
+    def handle_out_of_time(event):
+        stop_search_and_clock()
+        result = GameResult.OUT_OF_TIME
+        DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
+
+    @event_handlers.handles(Event.SHUTDOWN)
+    def handle_shutdown(event):
+        if uci_shell.get():
+            uci_shell.get().__exit__(None, None, None)  # force to call __exit__ (close shell connection)
+        result = GameResult.ABORT
+        DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
+        DisplayMsg.show(Message.SYSTEM_SHUTDOWN())
+        engine_pool.quit()  # the parked engines - their processes arent needed anymore
+        shutdown(args.dgtpi and uci_shell.get() is None, dev=event.dev)  # @todo make independant of remote eng
+
+    @event_handlers.handles(Event.REBOOT)
+    def handle_reboot(event):
+        result = GameResult.ABORT
+        DisplayMsg.show(Message.GAME_ENDS(result=result, play_mode=play_mode, game=game.copy()))
+        DisplayMsg.show(Message.SYSTEM_REBOOT())
+        engine_pool.quit()  # the parked engines - their processes arent needed anymore
+        reboot(args.dgtpi and uci_shell.get() is None, dev=event.dev)  # @todo make independant of remote eng
+
+    @event_handlers.handles(Event.EMAIL_LOG)
+    def handle_email_log(event):
+        email_logger = Emailer(email=args.email, mailgun_key=args.mailgun_key)
+        email_logger.set_smtp(sserver=args.smtp_server, suser=args.smtp_user, spass=args.smtp_pass,
+                              sencryption=args.smtp_encryption, sfrom=args.smtp_from)
+        body = 'You probably want to forward this file to a picochess developer ;-)'
+        email_logger.send('Picochess LOG', body, '/opt/picochess/logs/{}'.format(args.log_file))
+
+    @event_handlers.handles(Event.SET_VOICE)
+    def handle_set_voice(event):
+        DisplayMsg.show(Message.SET_VOICE(type=event.type, lang=event.lang, speaker=event.speaker,
+                                          speed=event.speed))
+
+    @event_handlers.handles(Event.KEYBOARD_BUTTON)
+    def handle_keyboard_button(event):
+        DisplayMsg.show(Message.DGT_BUTTON(button=event.button, dev=event.dev))
+
+    @event_handlers.handles(Event.KEYBOARD_FEN)
+    def handle_keyboard_fen(event):
+        DisplayMsg.show(Message.DGT_FEN(fen=event.fen, raw=False))
+
+    @event_handlers.handles(Event.EXIT_MENU)
+    def handle_exit_menu(event):
+        DisplayMsg.show(Message.EXIT_MENU())
+
+    @event_handlers.handles(Event.UPDATE_PICO)
+    def handle_update_pico(event):
+        DisplayMsg.show(Message.UPDATE_PICO())
+        checkout_tag(event.tag)
+        DisplayMsg.show(Message.EXIT_MENU())
+
+    @event_handlers.handles(Event.REMOTE_ROOM)
+    def handle_remote_room(event):
+        DisplayMsg.show(Message.REMOTE_ROOM(inside=event.inside))
+
+    if args.replay_file:
+        # the engine must play the same moves again, otherwise the replayed session runs out of sync
+        JournalReplay(args.replay_file, args.replay_max_speed).start()
 
+    # Event loop
+    logging.info('evt_queue ready')
+    while True:
+        try:
+            event = evt_queue.get()
+        except queue.Empty:
+            pass
+        else:
+            logging.debug('received event from evt_queue: %s', event)
+            with bus_monitor.measure('picochess', event, evt_queue.last_put_time):
+                if not event_handlers.dispatch(event):
+                    logging.warning('event not handled : [%s]', event)
             evt_queue.task_done()
 
 
@@ -0,0 +1,90 @@
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+from collections import OrderedDict
+
+import chess
+import chess.syzygy
+
+
+class Syzygy(object):
+
+    """Probe the syzygy tablebases (opened once) and keep the results in a LRU cache."""
+
+    def __init__(self, directory: str, cache_size=4096):
+        super(Syzygy, self).__init__()
+        self.tablebases = chess.syzygy.Tablebases()
+        try:
+            tables = self.tablebases.open_directory(directory)
+        except OSError:
+            logging.warning('cant open syzygy tablebases in %s', directory)
+            tables = 0
+        # table names like "KBNvK" => piece count is the length without the "v"
+        self.max_pieces = max((len(name) - 1 for name in self.tablebases.wdl), default=0)
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        logging.debug('opened %i syzygy tables (max %i pieces) in %s', tables, self.max_pieces, directory)
+
+    def _probe(self, game: chess.Board):
+        """Return the (wdl, dtz) of the position for the side to move or None if its not inside the tablebases."""
+        key = game.epd()
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        result = None
+        if chess.popcount(game.occupied) <= self.max_pieces:
+            wdl = self.tablebases.get_wdl(game)
+            dtz = self.tablebases.get_dtz(game)
+            if wdl is not None and dtz is not None:
+                result = wdl, dtz
+        self.cache[key] = result
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return result
+
+    def probe_wdl(self, game: chess.Board):
+        """Return the win/draw/loss (2..-2) of the position for the side to move or None."""
+        result = self._probe(game)
+        return result[0] if result else None
+
+    def best_move(self, game: chess.Board, moves=None):
+        """Return the dtz optimal move (out of the given moves) or None if the position isnt inside the tablebases."""
+        if self._probe(game) is None:
+            return None
+        best_move = best_rank = None
+        game = game.copy(stack=False)
+        for move in (game.legal_moves if moves is None else moves):
+            zeroing = game.is_zeroing(move)
+            game.push(move)
+            mate = game.is_checkmate()
+            result = self._probe(game)
+            game.pop()
+            if mate:
+                return move
+            if result is None:
+                return None  # missing table
+            wdl, dtz = -result[0], abs(result[1])
+            if wdl > 0:  # win: zeroing moves first, then the shortest way to the next zeroing move
+                rank = (wdl, zeroing, -dtz)
+            elif wdl < 0:  # loss: avoid zeroing moves and take the longest way
+                rank = (wdl, not zeroing, dtz)
+            else:
+                rank = (wdl, False, 0)
+            if best_rank is None or rank > best_rank:
+                best_move, best_rank = move, rank
+        return best_move
@@ -27,7 +27,7 @@ from pathlib import Path
 from shutil import which
 
 import chess
-from utilities import DisplayMsg
+from utilities import DisplayMsg, HandlerRegistry, bus_monitor
 from timecontrol import TimeControl
 from dgt.api import Message
 from dgt.util import GameResult, PlayMode, Voice
@@ -91,6 +91,8 @@ class PicoTalkerDisplay(DisplayMsg, threading.Thread):
     COMPUTER = 'computer'
     SYSTEM = 'system'
 
+    handlers = HandlerRegistry()  # Message class => _process_xxx() method
+
     def __init__(self, user_voice: str, computer_voice: str, speed_factor: int, setpieces_voice: bool):
         """
         Initialize a PicoTalkerDisplay with voices for the user and/or computer players.
@@ -99,12 +101,14 @@ class PicoTalkerDisplay(DisplayMsg, threading.Thread):
         :param computer_voice: The voice to use for the computer (eg. en:christina).
         """
         super(PicoTalkerDisplay, self).__init__()
+        self.subscribe(self.handlers.api_classes())
         self.user_picotalker = None  # type: PicoTalker
         self.computer_picotalker = None  # type: PicoTalker
         self.speed_factor = (90 + (speed_factor % 10) * 5) / 100
         self.play_mode = PlayMode.USER_WHITE
         self.low_time = False
         self.play_game = None  # saves the game after a computer move - used for "setpieces" to speak the move again
+        self.previous_move = chess.Move.null()  # Ignore repeated broadcasts of a move
         self.setpieces_voice = setpieces_voice
 
         if user_voice:
@@ -147,157 +151,173 @@ class PicoTalkerDisplay(DisplayMsg, threading.Thread):
             if self.user_picotalker:
                 self.user_picotalker.talk(sounds)
 
+    @handlers.handles(Message.ENGINE_FAIL)
+    def _process_engine_fail(self, message):
+        logging.debug('announcing ENGINE_FAIL')
+        self.talk(['error.ogg'])
+
+    @handlers.handles(Message.START_NEW_GAME)
+    def _process_start_new_game(self, message):
+        if message.newgame:
+            logging.debug('announcing START_NEW_GAME')
+            self.talk(['newgame.ogg'])
+            self.play_game = None
+
+    @handlers.handles(Message.COMPUTER_MOVE)
+    def _process_computer_move(self, message):
+        if message.move and message.game and message.move != self.previous_move:
+            logging.debug('announcing COMPUTER_MOVE [%s]', message.move)
+            game_copy = message.game.copy()
+            game_copy.push(message.move)
+            self.talk(self.say_last_move(game_copy), self.COMPUTER)
+            self.previous_move = message.move
+            self.play_game = game_copy
+
+    @handlers.handles(Message.COMPUTER_MOVE_DONE)
+    def _process_computer_move_done(self, message):
+        self.play_game = None
+
+    @handlers.handles(Message.USER_MOVE_DONE)
+    def _process_user_move_done(self, message):
+        if message.move and message.game and message.move != self.previous_move:
+            logging.debug('announcing USER_MOVE_DONE [%s]', message.move)
+            self.talk(self.say_last_move(message.game), self.USER)
+            self.previous_move = message.move
+            self.play_game = None
+
+    @handlers.handles(Message.REVIEW_MOVE_DONE)
+    def _process_review_move_done(self, message):
+        if message.move and message.game and message.move != self.previous_move:
+            logging.debug('announcing REVIEW_MOVE_DONE [%s]', message.move)
+            self.talk(self.say_last_move(message.game), self.USER)
+            self.previous_move = message.move
+            self.play_game = None  # @todo why thats not set in dgtdisplay?
+
+    @handlers.handles(Message.GAME_ENDS)
+    def _process_game_ends(self, message):
+        if message.result == GameResult.OUT_OF_TIME:
+            logging.debug('announcing GAME_ENDS/TIME_CONTROL')
+            wins = 'whitewins.ogg' if message.game.turn == chess.BLACK else 'blackwins.ogg'
+            self.talk(['timelost.ogg', wins])
+        elif message.result == GameResult.INSUFFICIENT_MATERIAL:
+            logging.debug('announcing GAME_ENDS/INSUFFICIENT_MATERIAL')
+            self.talk(['material.ogg', 'draw.ogg'])
+        elif message.result == GameResult.MATE:
+            logging.debug('announcing GAME_ENDS/MATE')
+            self.talk(['checkmate.ogg'])
+        elif message.result == GameResult.STALEMATE:
+            logging.debug('announcing GAME_ENDS/STALEMATE')
+            self.talk(['stalemate.ogg'])
+        elif message.result == GameResult.ABORT:
+            logging.debug('announcing GAME_ENDS/ABORT')
+            self.talk(['abort.ogg'])
+        elif message.result == GameResult.DRAW:
+            logging.debug('announcing GAME_ENDS/DRAW')
+            self.talk(['draw.ogg'])
+        elif message.result == GameResult.WIN_WHITE:
+            logging.debug('announcing GAME_ENDS/WHITE_WIN')
+            self.talk(['whitewins.ogg'])
+        elif message.result == GameResult.WIN_BLACK:
+            logging.debug('announcing GAME_ENDS/BLACK_WIN')
+            self.talk(['blackwins.ogg'])
+        elif message.result == GameResult.FIVEFOLD_REPETITION:
+            logging.debug('announcing GAME_ENDS/FIVEFOLD_REPETITION')
+            self.talk(['repetition.ogg', 'draw.ogg'])
+
+    @handlers.handles(Message.TAKE_BACK)
+    def _process_take_back(self, message):
+        logging.debug('announcing TAKE_BACK')
+        self.talk(['takeback.ogg'])
+        self.play_game = None
+        self.previous_move = chess.Move.null()
+
+    @handlers.handles(Message.TIME_CONTROL)
+    def _process_time_control(self, message):
+        logging.debug('announcing TIME_CONTROL')
+        self.talk(['oktime.ogg'])
+
+    @handlers.handles(Message.INTERACTION_MODE)
+    def _process_interaction_mode(self, message):
+        logging.debug('announcing INTERACTION_MODE')
+        self.talk(['okmode.ogg'])
+
+    @handlers.handles(Message.LEVEL)
+    def _process_level(self, message):
+        if message.do_speak:
+            logging.debug('announcing LEVEL')
+            self.talk(['oklevel.ogg'])
+        else:
+            logging.debug('dont announce LEVEL cause its also an engine message')
+
+    @handlers.handles(Message.OPENING_BOOK)
+    def _process_opening_book(self, message):
+        logging.debug('announcing OPENING_BOOK')
+        self.talk(['okbook.ogg'])
+
+    @handlers.handles(Message.ENGINE_READY)
+    def _process_engine_ready(self, message):
+        logging.debug('announcing ENGINE_READY')
+        self.talk(['okengine.ogg'])
+
+    @handlers.handles(Message.PLAY_MODE)
+    def _process_play_mode(self, message):
+        logging.debug('announcing PLAY_MODE')
+        self.play_mode = message.play_mode
+        userplay = 'userblack.ogg' if message.play_mode == PlayMode.USER_BLACK else 'userwhite.ogg'
+        self.talk([userplay])
+
+    @handlers.handles(Message.STARTUP_INFO)
+    def _process_startup_info(self, message):
+        self.play_mode = message.info['play_mode']
+        logging.debug('announcing PICOCHESS')
+        self.talk(['picoChess.ogg'])
+
+    @handlers.handles(Message.CLOCK_TIME)
+    def _process_clock_time(self, message):
+        self.low_time = message.low_time
+        if self.low_time:
+            logging.debug('time too low, disable voice - w: %i, b: %i', message.time_white, message.time_black)
+
+    @handlers.handles(Message.ALTERNATIVE_MOVE)
+    def _process_alternative_move(self, message):
+        self.play_mode = message.play_mode
+        self.play_game = None
+
+    @handlers.handles(Message.SYSTEM_SHUTDOWN)
+    def _process_system_shutdown(self, message):
+        logging.debug('announcing SHUTDOWN')
+        self.talk(['goodbye.ogg'])
+
+    @handlers.handles(Message.SYSTEM_REBOOT)
+    def _process_system_reboot(self, message):
+        logging.debug('announcing REBOOT')
+        self.talk(['pleasewait.ogg'])
+
+    @handlers.handles(Message.SET_VOICE)
+    def _process_set_voice(self, message):
+        self.speed_factor = (90 + (message.speed % 10) * 5) / 100
+        localisation_id_voice = message.lang + ':' + message.speaker
+        if message.type == Voice.USER:
+            self.set_user(PicoTalker(localisation_id_voice, self.speed_factor))
+        if message.type == Voice.COMP:
+            self.set_computer(PicoTalker(localisation_id_voice, self.speed_factor))
+        if message.type == Voice.SPEED:
+            self.set_factor(self.speed_factor)
+
+    @handlers.handles(Message.WRONG_FEN)
+    def _process_wrong_fen(self, message):
+        if self.play_game and self.setpieces_voice:
+            self.talk(self.say_last_move(self.play_game), self.COMPUTER)
+
     def run(self):
         """Start listening for Messages on our queue and generate speech as appropriate."""
-        previous_move = chess.Move.null()  # Ignore repeated broadcasts of a move
         logging.info('msg_queue ready')
         while True:
             try:
                 # Check if we have something to say
                 message = self.msg_queue.get()
-
-                if False:  # switch-case
-                    pass
-                elif isinstance(message, Message.ENGINE_FAIL):
-                    logging.debug('announcing ENGINE_FAIL')
-                    self.talk(['error.ogg'])
-
-                elif isinstance(message, Message.START_NEW_GAME):
-                    if message.newgame:
-                        logging.debug('announcing START_NEW_GAME')
-                        self.talk(['newgame.ogg'])
-                        self.play_game = None
-
-                elif isinstance(message, Message.COMPUTER_MOVE):
-                    if message.move and message.game and message.move != previous_move:
-                        logging.debug('announcing COMPUTER_MOVE [%s]', message.move)
-                        game_copy = message.game.copy()
-                        game_copy.push(message.move)
-                        self.talk(self.say_last_move(game_copy), self.COMPUTER)
-                        previous_move = message.move
-                        self.play_game = game_copy
-
-                elif isinstance(message, Message.COMPUTER_MOVE_DONE):
-                    self.play_game = None
-
-                elif isinstance(message, Message.USER_MOVE_DONE):
-                    if message.move and message.game and message.move != previous_move:
-                        logging.debug('announcing USER_MOVE_DONE [%s]', message.move)
-                        self.talk(self.say_last_move(message.game), self.USER)
-                        previous_move = message.move
-                        self.play_game = None
-
-                elif isinstance(message, Message.REVIEW_MOVE_DONE):
-                    if message.move and message.game and message.move != previous_move:
-                        logging.debug('announcing REVIEW_MOVE_DONE [%s]', message.move)
-                        self.talk(self.say_last_move(message.game), self.USER)
-                        previous_move = message.move
-                        self.play_game = None  # @todo why thats not set in dgtdisplay?
-
-                elif isinstance(message, Message.GAME_ENDS):
-                    if message.result == GameResult.OUT_OF_TIME:
-                        logging.debug('announcing GAME_ENDS/TIME_CONTROL')
-                        wins = 'whitewins.ogg' if message.game.turn == chess.BLACK else 'blackwins.ogg'
-                        self.talk(['timelost.ogg', wins])
-                    elif message.result == GameResult.INSUFFICIENT_MATERIAL:
-                        logging.debug('announcing GAME_ENDS/INSUFFICIENT_MATERIAL')
-                        self.talk(['material.ogg', 'draw.ogg'])
-                    elif message.result == GameResult.MATE:
-                        logging.debug('announcing GAME_ENDS/MATE')
-                        self.talk(['checkmate.ogg'])
-                    elif message.result == GameResult.STALEMATE:
-                        logging.debug('announcing GAME_ENDS/STALEMATE')
-                        self.talk(['stalemate.ogg'])
-                    elif message.result == GameResult.ABORT:
-                        logging.debug('announcing GAME_ENDS/ABORT')
-                        self.talk(['abort.ogg'])
-                    elif message.result == GameResult.DRAW:
-                        logging.debug('announcing GAME_ENDS/DRAW')
-                        self.talk(['draw.ogg'])
-                    elif message.result == GameResult.WIN_WHITE:
-                        logging.debug('announcing GAME_ENDS/WHITE_WIN')
-                        self.talk(['whitewins.ogg'])
-                    elif message.result == GameResult.WIN_BLACK:
-                        logging.debug('announcing GAME_ENDS/BLACK_WIN')
-                        self.talk(['blackwins.ogg'])
-                    elif message.result == GameResult.FIVEFOLD_REPETITION:
-                        logging.debug('announcing GAME_ENDS/FIVEFOLD_REPETITION')
-                        self.talk(['repetition.ogg', 'draw.ogg'])
-
-                elif isinstance(message, Message.TAKE_BACK):
-                    logging.debug('announcing TAKE_BACK')
-                    self.talk(['takeback.ogg'])
-                    self.play_game = None
-                    previous_move = chess.Move.null()
-
-                elif isinstance(message, Message.TIME_CONTROL):
-                    logging.debug('announcing TIME_CONTROL')
-                    self.talk(['oktime.ogg'])
-
-                elif isinstance(message, Message.INTERACTION_MODE):
-                    logging.debug('announcing INTERACTION_MODE')
-                    self.talk(['okmode.ogg'])
-
-                elif isinstance(message, Message.LEVEL):
-                    if message.do_speak:
-                        logging.debug('announcing LEVEL')
-                        self.talk(['oklevel.ogg'])
-                    else:
-                        logging.debug('dont announce LEVEL cause its also an engine message')
-
-                elif isinstance(message, Message.OPENING_BOOK):
-                    logging.debug('announcing OPENING_BOOK')
-                    self.talk(['okbook.ogg'])
-
-                elif isinstance(message, Message.ENGINE_READY):
-                    logging.debug('announcing ENGINE_READY')
-                    self.talk(['okengine.ogg'])
-
-                elif isinstance(message, Message.PLAY_MODE):
-                    logging.debug('announcing PLAY_MODE')
-                    self.play_mode = message.play_mode
-                    userplay = 'userblack.ogg' if message.play_mode == PlayMode.USER_BLACK else 'userwhite.ogg'
-                    self.talk([userplay])
-
-                elif isinstance(message, Message.STARTUP_INFO):
-                    self.play_mode = message.info['play_mode']
-                    logging.debug('announcing PICOCHESS')
-                    self.talk(['picoChess.ogg'])
-
-                elif isinstance(message, Message.CLOCK_TIME):
-                    self.low_time = message.low_time
-                    if self.low_time:
-                        logging.debug('time too low, disable voice - w: %i, b: %i', message.time_white,
-                                      message.time_black)
-
-                elif isinstance(message, Message.ALTERNATIVE_MOVE):
-                    self.play_mode = message.play_mode
-                    self.play_game = None
-
-                elif isinstance(message, Message.SYSTEM_SHUTDOWN):
-                    logging.debug('announcing SHUTDOWN')
-                    self.talk(['goodbye.ogg'])
-
-                elif isinstance(message, Message.SYSTEM_REBOOT):
-                    logging.debug('announcing REBOOT')
-                    self.talk(['pleasewait.ogg'])
-
-                elif isinstance(message, Message.SET_VOICE):
-                    self.speed_factor = (90 + (message.speed % 10) * 5) / 100
-                    localisation_id_voice = message.lang + ':' + message.speaker
-                    if message.type == Voice.USER:
-                        self.set_user(PicoTalker(localisation_id_voice, self.speed_factor))
-                    if message.type == Voice.COMP:
-                        self.set_computer(PicoTalker(localisation_id_voice, self.speed_factor))
-                    if message.type == Voice.SPEED:
-                        self.set_factor(self.speed_factor)
-
-                elif isinstance(message, Message.WRONG_FEN):
-                    if self.play_game and self.setpieces_voice:
-                        self.talk(self.say_last_move(self.play_game), self.COMPUTER)
-
-                else:  # Default
-                    pass
+                with bus_monitor.measure(self.__class__.__name__, message, self.msg_queue.last_put_time):
+                    self.handlers.dispatch(message, self)
             except queue.Empty:
                 pass
 
@@ -352,25 +372,27 @@ class PicoTalkerDisplay(DisplayMsg, threading.Thread):
                 if sound_file:
                     voice_parts += [sound_file]
 
-        if game.is_game_over():
-            if game.is_checkmate():
-                wins = 'whitewins.ogg' if game.turn == chess.BLACK else 'blackwins.ogg'
+        en_passant = bit_board.is_en_passant(move)
+        bit_board.push(move)  # the message game is shared, so only query (push/pop based) the local copy
+        if bit_board.is_game_over():
+            if bit_board.is_checkmate():
+                wins = 'whitewins.ogg' if bit_board.turn == chess.BLACK else 'blackwins.ogg'
                 voice_parts += ['checkmate.ogg', wins]
-            elif game.is_stalemate():
+            elif bit_board.is_stalemate():
                 voice_parts += ['stalemate.ogg']
             else:
-                if game.is_seventyfive_moves():
+                if bit_board.is_seventyfive_moves():
                     voice_parts += ['75moves.ogg', 'draw.ogg']
-                elif game.is_insufficient_material():
+                elif bit_board.is_insufficient_material():
                     voice_parts += ['material.ogg', 'draw.ogg']
-                elif game.is_fivefold_repetition():
+                elif bit_board.is_fivefold_repetition():
                     voice_parts += ['repetition.ogg', 'draw.ogg']
                 else:
                     voice_parts += ['draw.ogg']
-        elif game.is_check():
+        elif bit_board.is_check():
             voice_parts += ['check.ogg']
 
-        if bit_board.is_en_passant(move):
+        if en_passant:
             voice_parts += ['enpassant.ogg']
 
         return voice_parts
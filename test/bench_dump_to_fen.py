@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the board dump decoding: the old char loop vs the translation tables (uncached & cached)."""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dgt.board import _dump_to_fen, _DUMP_TO_DEBUG  # noqa: E402
+
+START_DUMP = bytes([0x02, 0x03, 0x04, 0x06, 0x05, 0x04, 0x03, 0x02] + [0x01] * 8 + [0x00] * 32 +
+                   [0x07] * 8 + [0x08, 0x09, 0x0a, 0x0c, 0x0b, 0x0a, 0x09, 0x08])
+
+
+def dump_to_fen_loop(message: bytes):
+    """Old DGT_MSG_BOARD_DUMP handling: return the debug board and fen built char by char."""
+    piece_to_char = {
+        0x01: 'P', 0x02: 'R', 0x03: 'N', 0x04: 'B', 0x05: 'K', 0x06: 'Q',
+        0x07: 'p', 0x08: 'r', 0x09: 'n', 0x0a: 'b', 0x0b: 'k', 0x0c: 'q',
+        0x0d: '$', 0x0e: '%', 0x0f: '&', 0x00: '.'
+    }
+    board = ''
+    for character in message:
+        board += piece_to_char[character & 0x0f]
+    fen = ''
+    empty = 0
+    for square in range(0, 64):
+        if message[square] != 0 and message[square] < 0x0d:
+            if empty > 0:
+                fen += str(empty)
+                empty = 0
+            fen += piece_to_char[message[square] & 0x0f]
+        else:
+            empty += 1
+        if (square + 1) % 8 == 0:
+            if empty > 0:
+                fen += str(empty)
+                empty = 0
+            if square < 63:
+                fen += '/'
+    return board, fen
+
+
+def dump_to_fen_tables(dump: bytes, decode_fen=_dump_to_fen):
+    """New DGT_MSG_BOARD_DUMP handling: return the debug board and fen by the translation tables."""
+    return dump.translate(_DUMP_TO_DEBUG).decode(), decode_fen(dump)
+
+
+def main():
+    rand = random.Random(4711)
+    codes = list(range(0x10)) + [0x00] * 16  # mostly empty squares, all pieces & the special ones
+    for _ in range(20000):
+        dump = bytes(rand.choice(codes) | rand.choice((0x00, 0x00, 0x00, 0x30)) for _ in range(64))
+        assert dump_to_fen_loop(dump) == dump_to_fen_tables(dump, _dump_to_fen.__wrapped__), dump
+
+    number = 20000
+    old = timeit.timeit(lambda: dump_to_fen_loop(START_DUMP), number=number) / number
+    uncached = timeit.timeit(lambda: dump_to_fen_tables(START_DUMP, _dump_to_fen.__wrapped__), number=number) / number
+    cached = timeit.timeit(lambda: dump_to_fen_tables(START_DUMP), number=number) / number
+    print('start position: loop {:.1f}us  tables {:.1f}us  tables cached {:.1f}us'.format(
+        old * 1e6, uncached * 1e6, cached * 1e6))
+
+
+if __name__ == '__main__':
+    main()
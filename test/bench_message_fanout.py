@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the message fan-out to the displays: deepcopy per display (old) vs one shared frozen instance (new)."""
+
+import copy
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess  # noqa: E402
+from dgt.api import Message, Dgt  # noqa: E402
+from dgt.util import ClockSide  # noqa: E402
+
+DISPLAYS = 6  # dgt display, pgn, server, talker, journal, webdisplay
+MOVES = 'e2e4 e7e5 g1f3 b8c6 f1b5 a7a6 b5a4 g8f6 e1g1 f8e7 f1e1 b7b5 a4b3 d7d6 c2c3 e8g8 h2h3 c6b8 d2d4 b8d7'
+
+
+def _game():
+    game = chess.Board()
+    for move in MOVES.split():
+        game.push_uci(move)
+    return game
+
+
+def fanout_deepcopy(factory):
+    """Old DisplayMsg.show: every display gets its own deep copy."""
+    message = factory()
+    return [copy.deepcopy(message) for _ in range(DISPLAYS)]
+
+
+def fanout_frozen(factory):
+    """New DisplayMsg.show: freeze once (a single board snapshot) and share the instance."""
+    message = factory().freeze()
+    return [message for _ in range(DISPLAYS)]
+
+
+def main():
+    game = _game()
+    move = game.pop()
+    messages = {
+        'COMPUTER_MOVE': lambda: Message.COMPUTER_MOVE(move=move, ponder=None, game=game, wait=False),
+        'DISPLAY_TEXT': lambda: Dgt.DISPLAY_TEXT(l='hello world', m='hello', s='hi', wait=False, beep=False,
+                                                 maxtime=1, devs={'ser', 'i2c', 'web'}, ld=None, rd=ClockSide.NONE),
+    }
+    number = 2000
+    for name, factory in messages.items():
+        old = timeit.timeit(lambda: fanout_deepcopy(factory), number=number) / number
+        new = timeit.timeit(lambda: fanout_frozen(factory), number=number) / number
+        print('{:14} {} displays: deepcopy {:8.1f}us  frozen {:8.1f}us  ({:.0f}x)'.format(
+            name, DISPLAYS, old * 1e6, new * 1e6, old / new))
+
+
+if __name__ == '__main__':
+    main()
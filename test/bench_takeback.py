@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmark the takeback search of process_fen on a long game: replaying the game (old) vs PositionIndex (new)."""
+
+import copy
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import chess  # noqa: E402
+from picochess import PositionIndex  # noqa: E402
+
+PLIES = 160
+
+
+def _game(plies: int):
+    """Return a random (seeded) game with the given plies - ends earlier if the game is over."""
+    rand = random.Random(4711)
+    game = chess.Board()
+    while len(game.move_stack) < plies and not game.is_game_over():
+        game.push(rand.choice(list(game.legal_moves)))
+    return game
+
+
+def find_ply_replay(game: chess.Board, fen: str):
+    """Old process_fen: deepcopy the game and pop it back until the fen is found."""
+    game_copy = copy.deepcopy(game)
+    while game_copy.move_stack:
+        game_copy.pop()
+        if game_copy.board_fen() == fen:
+            return len(game_copy.move_stack)
+    return None
+
+
+def main():
+    game = _game(PLIES)
+    positions = PositionIndex(game)
+    fens = [positions.fens[ply] for ply in range(0, len(game.move_stack), 7)]
+    for fen in fens:
+        assert find_ply_replay(game, fen) == positions.get_ply(game, fen), fen
+    unknown = '8/8/8/8/8/8/8/8'  # a board fen not inside the game (e.g. a stray piece)
+
+    number = 200
+    for name, fen in (('unknown fen', unknown), ('first ply', fens[0]), ('middle ply', fens[len(fens) // 2])):
+        old = timeit.timeit(lambda: find_ply_replay(game, fen), number=number) / number
+        new = timeit.timeit(lambda: positions.get_ply(game, fen), number=number) / number
+        print('{:12} {} plies: replay {:8.3f}ms  index {:8.3f}ms  ({:.0f}x)'.format(
+            name, len(game.move_stack), old * 1e3, new * 1e3, old / new))
+
+
+if __name__ == '__main__':
+    main()
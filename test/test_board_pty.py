@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+"""Feed DGT board frames through a pty into the buffered serial parser of DgtBoard and check what arrives."""
+
+import os
+import random
+import sys
+import threading
+import time
+import tty
+import unittest
+
+from serial import Serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dgt.board import DgtBoard  # noqa: E402
+from dgt.util import DgtMsg  # noqa: E402
+
+FRAMES = 3000
+
+
+def _frame(message_id: int, data: bytes):
+    size = len(data) + 3
+    return bytes([message_id, size >> 7, size & 0x7f]) + data
+
+
+class _RecordingBoard(DgtBoard):
+
+    """A DgtBoard which only records the parsed messages."""
+
+    def __init__(self, serial: Serial):
+        super(_RecordingBoard, self).__init__('pty', disable_revelation_leds=True, is_pi=False, disable_end=True)
+        self.serial = serial
+        self.messages = []
+
+    def _process_board_message(self, message_id: int, message: tuple, message_length: int):
+        self.messages.append((message_id, message))
+
+
+class TestBoardPty(unittest.TestCase):
+
+    """Split frames, garbage bytes, partial headers and broken dumps - all complete frames must arrive unchanged."""
+
+    def setUp(self):
+        self.master, slave = os.openpty()
+        tty.setraw(slave)
+        self.serial = Serial(os.ttyname(slave), timeout=0.5)
+        os.close(slave)
+        self.board = _RecordingBoard(self.serial)
+
+    def tearDown(self):
+        self.serial.close()
+        os.close(self.master)
+
+    @staticmethod
+    def _build_stream(rand: random.Random):
+        """Return the bytes to send and the messages the parser must deliver."""
+        stream = bytearray()
+        expected = []
+        for count in range(FRAMES):
+            kind = count % 3
+            if kind == 0:
+                message_id, data = DgtMsg.DGT_MSG_BOARD_DUMP, bytes(rand.randrange(0x0d) for _ in range(64))
+            elif kind == 1:
+                message_id, data = DgtMsg.DGT_MSG_FIELD_UPDATE, bytes([rand.randrange(64), rand.randrange(0x0d)])
+            else:
+                message_id, data = DgtMsg.DGT_MSG_SERIALNR, str(rand.randrange(10000, 99999)).encode()
+            if count % 97 == 0:  # garbage (no message id inside) between the frames
+                stream += bytes(rand.randrange(0x80) for _ in range(rand.randrange(1, 20)))
+            if count % 301 == 0:  # a broken dump - cut off by the next message id
+                stream += _frame(DgtMsg.DGT_MSG_BOARD_DUMP, bytes(64))[:rand.randrange(3, 40)]
+            if count % 211 == 0:  # a partial header (1 or 2 bytes) - cut off by the next message id
+                stream += _frame(DgtMsg.DGT_MSG_BOARD_DUMP, bytes(64))[:rand.randrange(1, 3)]
+            stream += _frame(message_id, data)
+            expected.append((message_id.value, tuple(data)))
+        return bytes(stream), expected
+
+    def _write(self, stream: bytes, rand: random.Random, max_chunk: int):
+        """Write the stream in random chunks (frames get split), sometimes pausing to force partial reads."""
+        pos = 0
+        while pos < len(stream):
+            chunk = rand.randrange(1, max_chunk + 1)
+            pos += os.write(self.master, stream[pos:pos + chunk])
+            if rand.random() < 0.01:
+                time.sleep(0.002)
+
+    def _run(self, max_chunk: int):
+        rand = random.Random(4711 + max_chunk)
+        stream, expected = self._build_stream(rand)
+        writer = threading.Thread(target=self._write, args=(stream, rand, max_chunk), daemon=True)
+        start = time.monotonic()
+        writer.start()
+        while len(self.board.messages) < len(expected) and time.monotonic() - start < 30:
+            data = self.board._read_serial()
+            if data:
+                self.board.read_buffer += data
+                self.board._parse_board_messages()
+        secs = time.monotonic() - start
+        writer.join()
+        self.assertEqual(self.board.messages, expected)
+        self.assertFalse(self.board.read_buffer)
+        print('\nchunks <= {:3} bytes: {} frames, {} bytes in {:.3f} secs ({:.0f} KB/s)'.format(
+            max_chunk, len(expected), len(stream), secs, len(stream) / secs / 1024), end=' ')
+
+    def test_partial_header(self):
+        """A stale message id must not eat the header of the next frame."""
+        serialnr, field = _frame(DgtMsg.DGT_MSG_SERIALNR, b'12345'), _frame(DgtMsg.DGT_MSG_FIELD_UPDATE, b'\x0c\x01')
+        for stale in (bytes([DgtMsg.DGT_MSG_BOARD_DUMP]), bytes([DgtMsg.DGT_MSG_BOARD_DUMP, 0])):
+            self.board.messages = []
+            self.board.read_buffer += stale + serialnr + field
+            self.board._parse_board_messages()
+            self.assertEqual(self.board.messages, [(DgtMsg.DGT_MSG_SERIALNR.value, tuple(b'12345')),
+                                                   (DgtMsg.DGT_MSG_FIELD_UPDATE.value, (0x0c, 0x01))])
+            self.assertFalse(self.board.read_buffer)
+
+    def test_single_bytes(self):
+        self._run(max_chunk=1)
+
+    def test_split_frames(self):
+        self._run(max_chunk=100)
+
+    def test_bulk(self):
+        self._run(max_chunk=4096)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,34 +16,80 @@
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
 import time
-import threading
 import logging
 import copy
-from math import floor
+from collections import deque
 
-from utilities import Observable, hms_time
+from utilities import Observable, ScheduledTimer, hms_time
 import chess
 from dgt.api import Event
 from dgt.util import TimeMode
 
+BUDGET_MOVES = 20  # in sudden death keep the measured overhead for this many engine moves in reserve
+
+
+class TimeBudget(object):
+
+    """Measure the overhead of the computer turns (clock running, but engine not searching)."""
+
+    def __init__(self, window=10):
+        super(TimeBudget, self).__init__()
+        self.overheads = deque(maxlen=window)
+        self.turn_start = None
+        self.moves = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def start_turn(self):
+        """Remember the (monotonic) time the computer clock started."""
+        self.turn_start = time.monotonic_ns()
+
+    def stop_turn(self, search_ns):
+        """Add the overhead of the finished computer turn. Turns without engine search (search_ns=None) are ignored."""
+        turn_start, self.turn_start = self.turn_start, None
+        if turn_start is None or search_ns is None:
+            return
+        turn_ns = time.monotonic_ns() - turn_start
+        overhead_ns = max(0, turn_ns - search_ns)
+        self.overheads.append(overhead_ns)
+        self.moves += 1
+        self.total_ns += overhead_ns
+        self.max_ns = max(self.max_ns, overhead_ns)
+        logging.info('time budget: turn %.3f search %.3f overhead %.3f secs - stats: %s',
+                     turn_ns / 1e9, search_ns / 1e9, overhead_ns / 1e9, self.get_stats())
+
+    def get_overhead_ns(self):
+        """Return the overhead (of the recent turns) to keep in reserve for the next engine move."""
+        return max(self.overheads) if self.overheads else 0
+
+    def get_stats(self):
+        """Return the overhead statistics (in ms) of this session."""
+        mean_ms = self.total_ns / self.moves / 1e6 if self.moves else 0.0
+        return {'moves': self.moves, 'mean': round(mean_ms, 1), 'max': round(self.max_ns / 1e6, 1),
+                'reserve': round(self.get_overhead_ns() / 1e6, 1)}
+
 
 class TimeControl(object):
 
     """Control the picochess internal clock."""
 
+    overhead_ns = 0  # board & clock latency (per move) subtracted from the times send to the engine
+    budget = None  # TimeBudget measuring the overhead of the engine moves (latency-aware time management)
+
     def __init__(self, mode=TimeMode.FIXED, fixed=0, blitz=0, fischer=0, internal_time=None):
         super(TimeControl, self).__init__()
         self.mode = mode
         self.move_time = fixed
         self.game_time = blitz
         self.fisch_inc = fischer
-        self.internal_time = internal_time
+        self.internal_time = dict(internal_time) if internal_time else internal_time
 
         self.clock_time = {chess.WHITE: 0, chess.BLACK: 0}  # saves the sended clock time for white/black
         self.timer = None
         self.run_color = None
         self.active_color = None
         self.start_time = None
+        self.used_ns = {chess.WHITE: 0, chess.BLACK: 0}  # exact time used by white/black since the reset
 
         if internal_time:  # preset the clock (received) time already
             self.clock_time[chess.WHITE] = int(internal_time[chess.WHITE])
@@ -62,10 +108,21 @@ class TimeControl(object):
         value = str(self.mode) + str(self.move_time) + str(self.game_time) + str(self.fisch_inc)
         return hash(value)
 
+    @classmethod
+    def set_overhead(cls, overhead_ms: int):
+        """Set the board & clock latency (in ms) the engine should keep in reserve for each move."""
+        cls.overhead_ns = max(0, overhead_ms) * 1000000
+
+    @classmethod
+    def set_budget(cls, budget: TimeBudget):
+        """Set the time budget whose measured overhead is kept in reserve (None switches it off)."""
+        cls.budget = budget
+
     def get_parameters(self):
         """Return the state of this class for generating a new instance."""
+        internal_time = dict(self.internal_time) if self.internal_time else self.internal_time
         return {'mode': self.mode, 'fixed': self.move_time, 'blitz': self.game_time,
-                'fischer': self.fisch_inc, 'internal_time': self.internal_time}
+                'fischer': self.fisch_inc, 'internal_time': internal_time}
 
     def get_list_text(self):
         """Get the clock list text for the current time setting."""
@@ -90,6 +147,7 @@ class TimeControl(object):
 
         self.internal_time = {chess.WHITE: float(self.clock_time[chess.WHITE]),
                               chess.BLACK: float(self.clock_time[chess.BLACK])}
+        self.used_ns = {chess.WHITE: 0, chess.BLACK: 0}
         self.active_color = None
 
     def _log_time(self):
@@ -110,8 +168,8 @@ class TimeControl(object):
         self.clock_time[chess.BLACK] = black_time
 
     def reset_start_time(self):
-        """Set the start time to the current time."""
-        self.start_time = time.time()
+        """Set the start time to the current (monotonic) time."""
+        self.start_time = time.monotonic_ns()
 
     def _out_of_time(self, time_start):
         """Fire an OUT_OF_TIME event."""
@@ -160,8 +218,8 @@ class TimeControl(object):
 
             # Only start thread if not already started for same color, and the player has not already lost on time
             if self.internal_time[color] > 0 and self.active_color is not None and self.run_color != self.active_color:
-                self.timer = threading.Timer(copy.copy(self.internal_time[color]), self._out_of_time,
-                                             [copy.copy(self.internal_time[color])])
+                self.timer = ScheduledTimer(copy.copy(self.internal_time[color]), self._out_of_time,
+                                            [copy.copy(self.internal_time[color])])
                 self.timer.start()
                 logging.debug('internal timer started - color: %s run: %s active: %s',
                               color, self.run_color, self.active_color)
@@ -179,10 +237,12 @@ class TimeControl(object):
                 self.timer.join()
             else:
                 logging.warning('time=%s', self.internal_time)
-            used_time = floor((time.time() - self.start_time) * 10) / 10
+            used_ns = time.monotonic_ns() - self.start_time
+            self.used_ns[self.active_color] += used_ns
             if log:
-                logging.info('used time: %s secs', used_time)
-            self.internal_time[self.active_color] -= used_time
+                logging.info('used time: %.3f secs (total w:%.3f b:%.3f)', used_ns / 1e9,
+                             self.used_ns[chess.WHITE] / 1e9, self.used_ns[chess.BLACK] / 1e9)
+            self.internal_time[self.active_color] -= used_ns / 1e9
             if self.internal_time[self.active_color] < 0:
                 self.internal_time[self.active_color] = 0
 
@@ -195,17 +255,29 @@ class TimeControl(object):
         """Return if the internal clock is running."""
         return self.active_color is not None
 
+    def _uci_time(self, color, reserve_ns=0):
+        """Return the remaining time (in ms) of the color less the overhead compensation & (max half) reserve."""
+        remaining_ns = int(self.internal_time[color] * 1e9) - self.overhead_ns
+        remaining_ns -= min(reserve_ns, remaining_ns // 2)
+        return max(1, remaining_ns // 1000000)
+
     def uci(self):
         """Return remaining time for both players in an UCI dict."""
         uci_dict = {}
+        budget_ns = self.budget.get_overhead_ns() if self.budget else 0
         if self.mode in (TimeMode.BLITZ, TimeMode.FISCHER):
-            uci_dict['wtime'] = str(int(self.internal_time[chess.WHITE] * 1000))
-            uci_dict['btime'] = str(int(self.internal_time[chess.BLACK] * 1000))
+            # the increment pays the overhead first, the rest is taken from the remaining time
+            inc_ns = self.fisch_inc * 1000000000 if self.mode == TimeMode.FISCHER else 0
+            inc_reserve_ns = min(budget_ns, inc_ns)
+            reserve_ns = (budget_ns - inc_reserve_ns) * BUDGET_MOVES
+            uci_dict['wtime'] = str(self._uci_time(chess.WHITE, reserve_ns))
+            uci_dict['btime'] = str(self._uci_time(chess.BLACK, reserve_ns))
 
             if self.mode == TimeMode.FISCHER:
-                uci_dict['winc'] = str(self.fisch_inc * 1000)
-                uci_dict['binc'] = str(self.fisch_inc * 1000)
+                uci_dict['winc'] = str((inc_ns - inc_reserve_ns) // 1000000)
+                uci_dict['binc'] = str((inc_ns - inc_reserve_ns) // 1000000)
         elif self.mode == TimeMode.FIXED:
-            uci_dict['movetime'] = str(self.move_time * 1000)
+            move_ns = self.move_time * 1000000000
+            uci_dict['movetime'] = str((move_ns - min(budget_ns, move_ns // 2)) // 1000000)
 
         return uci_dict
@@ -0,0 +1,95 @@
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import sqlite3
+from threading import Lock
+
+import chess
+import chess.polyglot
+
+_CREATE = '''CREATE TABLE IF NOT EXISTS analysis (
+    hash TEXT, engine TEXT, level TEXT, depth INTEGER, bestmove TEXT, ponder TEXT, score INTEGER, mate INTEGER,
+    pv TEXT, used INTEGER, PRIMARY KEY (hash, engine, level))'''
+
+
+class AnalysisCache(object):
+
+    """Engine results (best move, score, depth, pv) by position, engine & level - stored in a sqlite file."""
+
+    def __init__(self, file_name: str, max_entries=100000):
+        super(AnalysisCache, self).__init__()
+        self.max_entries = max_entries
+        self.lock = Lock()  # filled by the engine threads, read by the main thread
+        self.db = sqlite3.connect(file_name, check_same_thread=False)
+        self.db.execute('PRAGMA synchronous=OFF')  # its only a cache, no need to wait for the (sd card) disk
+        self.db.execute(_CREATE)
+        self.db.execute('CREATE INDEX IF NOT EXISTS analysis_used ON analysis (used)')
+        self.count, self.used = self.db.execute('SELECT COUNT(*), MAX(used) FROM analysis').fetchone()
+        self.used = self.used or 0
+        logging.debug('analysis cache %s has %i positions', file_name, self.count)
+
+    @staticmethod
+    def _hash(game: chess.Board):
+        return '{:016x}'.format(chess.polyglot.zobrist_hash(game))
+
+    def get(self, game: chess.Board, engine: str, level: str):
+        """Return the stored result of the position or None."""
+        key = (self._hash(game), engine, level)
+        with self.lock:
+            row = self.db.execute('SELECT depth, bestmove, ponder, score, mate, pv FROM analysis '
+                                  'WHERE hash=? AND engine=? AND level=?', key).fetchone()
+            if row is None:
+                return None
+            self.used += 1
+            self.db.execute('UPDATE analysis SET used=? WHERE hash=? AND engine=? AND level=?', (self.used,) + key)
+            self.db.commit()
+        depth, bestmove, ponder, score, mate, pv = row
+        pv_moves = [chess.Move.from_uci(move) for move in pv.split()]
+        if not pv_moves or not game.is_legal(pv_moves[0]):  # a (very) rare zobrist collision
+            return None
+        return {'depth': depth, 'bestmove': chess.Move.from_uci(bestmove),
+                'ponder': chess.Move.from_uci(ponder) if ponder else None, 'score': score, 'mate': mate,
+                'pv': pv_moves}
+
+    def put(self, game: chess.Board, engine: str, level: str, result: dict):
+        """Store the result of the position, if it isnt less deep than the stored one."""
+        key = (self._hash(game), engine, level)
+        ponder = result['ponder'].uci() if result['ponder'] else None
+        pv_text = ' '.join(move.uci() for move in result['pv'])
+        with self.lock:
+            self.used += 1
+            values = (result['depth'], result['bestmove'].uci(), ponder, result['score'], result['mate'], pv_text,
+                      self.used)
+            cursor = self.db.execute('UPDATE analysis SET depth=?, bestmove=?, ponder=?, score=?, mate=?, pv=?, '
+                                     'used=? WHERE hash=? AND engine=? AND level=? AND depth<=?',
+                                     values + key + (result['depth'],))
+            if cursor.rowcount == 0:
+                cursor = self.db.execute('INSERT OR IGNORE INTO analysis VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                                         key + values)
+                self.count += cursor.rowcount
+            if self.count > self.max_entries:
+                self._evict()
+            self.db.commit()
+
+    def _evict(self):
+        """Delete the least recently used positions (10% of the maximum)."""
+        evict = self.count - self.max_entries + self.max_entries // 10
+        self.db.execute('DELETE FROM analysis WHERE rowid IN (SELECT rowid FROM analysis ORDER BY used LIMIT ?)',
+                        (evict,))
+        self.count -= evict
+        logging.debug('analysis cache evicted %i positions', evict)
@@ -0,0 +1,112 @@
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import configparser
+import hashlib
+import json
+import logging
+import os
+from threading import Lock
+
+from chess.uci import Option, OptionMap
+
+_hashes = {}  # file fingerprints already hashed by this process
+_configs = {}  # parsed ini files by name, with their (size, mtime) at parsing
+
+
+def _file_stat(file_name: str):
+    """Return the (size, mtime) of the file or None if it doesnt exist."""
+    try:
+        stat = os.stat(file_name)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def file_fingerprint(file_name: str):
+    """Return the (size, mtime, sha1) fingerprint of the file or None if it doesnt exist."""
+    stat = _file_stat(file_name)
+    if stat is None:
+        return None
+    key = (file_name,) + stat
+    if key not in _hashes:
+        sha1 = hashlib.sha1()
+        with open(file_name, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 16), b''):
+                sha1.update(chunk)
+        _hashes[key] = sha1.hexdigest()
+    return stat + (_hashes[key],)
+
+
+def read_config(file_name: str):
+    """Return the sections of the ini file as dict - reparsed only when the file changed."""
+    stat = _file_stat(file_name)
+    if stat is None:
+        return None
+    cached = _configs.get(file_name)
+    if cached and cached[0] == stat:
+        return cached[1]
+    parser = configparser.ConfigParser()
+    parser.optionxform = str
+    parser.read(file_name)
+    sections = {section: dict(parser[section]) for section in parser.sections()}
+    _configs[file_name] = (stat, sections)
+    return sections
+
+
+class EngineCache(object):
+
+    """Persistent engine metadata (name & options) keyed by the fingerprint of the engine binary."""
+
+    def __init__(self, engine_path: str):
+        super(EngineCache, self).__init__()
+        self.file_name = engine_path + os.sep + 'engines.cache'
+        self.lock = Lock()
+        self.changed = False
+        try:
+            with open(self.file_name) as file:
+                self.entries = json.load(file)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def get(self, engine_file: str):
+        """Return the (name, options) of the engine or None if the binary is unknown or changed."""
+        entry = self.entries.get(engine_file)
+        if entry is None or tuple(entry['fingerprint']) != file_fingerprint(engine_file):
+            return None
+        options = OptionMap((values[0], Option(*values)) for values in entry['options'])
+        return entry['name'], options
+
+    def put(self, engine_file: str, name: str, options: OptionMap):
+        """Store the name & options (the python-chess Option values) of the engine."""
+        entry = {'fingerprint': file_fingerprint(engine_file), 'name': name,
+                 'options': [list(option) for option in options.values()]}
+        with self.lock:
+            self.entries[engine_file] = entry
+            self.changed = True
+
+    def save(self):
+        """Write the cache file, if something changed."""
+        with self.lock:
+            if not self.changed:
+                return
+            try:
+                with open(self.file_name, 'w') as file:
+                    json.dump(self.entries, file, indent=1, sort_keys=True)
+                self.changed = False
+            except OSError:
+                logging.warning('cant write engine cache %s', self.file_name)
@@ -17,12 +17,15 @@
 
 import logging
 import os
+import time
+from threading import Condition
 import configparser
 import spur
 import paramiko
 
 from subprocess import DEVNULL
 from dgt.api import Event
+from dgt.util import EngineState
 from utilities import Observable
 import chess.uci
 from chess import Board
@@ -55,6 +58,8 @@ class UciEngine(object):
 
     """Handle the uci engine communication."""
 
+    analysis_cache = None  # AnalysisCache filled with the search results of all engines
+
     def __init__(self, file: str, uci_shell: UciShell,  home=''):
         super(UciEngine, self).__init__()
         try:
@@ -67,8 +72,10 @@ class UciEngine(object):
                 self.engine = chess.uci.popen_engine(file, stderr=DEVNULL)
 
             self.file = file
+            self.state = EngineState.IDLE
+            self.state_changed = Condition()
             if self.engine:
-                handler = Informer()
+                handler = Informer(self)
                 self.engine.info_handlers.append(handler)
                 self.engine.uci()
             else:
@@ -76,6 +83,12 @@ class UciEngine(object):
             self.options = {}
             self.future = None
             self.show_best = True
+            self.go_time = None  # monotonic time of the last (timed) go command
+            self.search_ns = None  # search time of the last (timed) go command
+            self.game = None  # position of the (last) search
+            self.restricted = False  # search is restricted by searchmoves
+            self.search_game = None  # position of the running search (None if its result isnt cacheable)
+            self.search_level = None  # level of the running search
 
             self.res = None
             self.level_support = False
@@ -86,6 +99,11 @@ class UciEngine(object):
         except TypeError:
             logging.exception('engine executable not found')
 
+    @classmethod
+    def set_analysis_cache(cls, analysis_cache):
+        """Set the cache for the search results (None switches it off)."""
+        cls.analysis_cache = analysis_cache
+
     def get_name(self):
         """Get engine name."""
         return self.engine.name
@@ -107,6 +125,15 @@ class UciEngine(object):
         has_lv = self.has_skill_level() or self.has_handicap_level() or self.has_limit_strength() or self.has_strength()
         return self.level_support or has_lv
 
+    def has_limited_level(self):
+        """Return if the engine plays at a reduced strength (a level option differs from the engine default)."""
+        for name, value in self.options.items():
+            if name.lower() in ('uci_limitstrength', 'skill level', 'handicap level', 'strength'):
+                option = self.engine.options.get(name)  # case insensitive like the uci option names
+                if option and str(value).lower() != str(option.default).lower():
+                    return True
+        return False
+
     def has_skill_level(self):
         """Return engine skill level support."""
         return 'Skill Level' in self.engine.options
@@ -135,14 +162,42 @@ class UciEngine(object):
         """Get File."""
         return self.file
 
+    def get_pid(self):
+        """Get the process id of a local engine (None for a remote engine)."""
+        return None if self.shell else self.engine.process.process.pid
+
+    def is_alive(self):
+        """Return if the engine process is still running."""
+        return bool(self.engine) and not self.engine.terminated.is_set()
+
     def get_installed_engines(self):
         """Get installed engines."""
         return self.installed_engines
 
     def position(self, game: Board):
         """Set position."""
+        self.game = game
         self.engine.position(game)
 
+    def _get_level(self):
+        return ','.join('{}={}'.format(name, value) for name, value in sorted(self.options.items()))
+
+    def get_analysis(self, game: Board):
+        """Return the cached search result of this engine & level for the position or None."""
+        if self.analysis_cache is None:
+            return None
+        return self.analysis_cache.get(game, self.get_name(), self._get_level())
+
+    def store_analysis(self, bestmove, ponder, depth: int, score, pv: list):
+        """Call by the informer with the final result of a search."""
+        if self.analysis_cache is None or self.search_game is None:
+            return
+        if bestmove is None or depth is None or score is None or not pv or pv[0] != bestmove:
+            return  # not a completed iteration (or a search stopped before the first pv)
+        result = {'depth': depth, 'bestmove': bestmove, 'ponder': ponder, 'score': score.cp, 'mate': score.mate,
+                  'pv': pv}
+        self.analysis_cache.put(self.search_game, self.get_name(), self.search_level, result)
+
     def quit(self):
         """Quit engine."""
         if self.engine.quit():  # Ask nicely
@@ -174,6 +229,10 @@ class UciEngine(object):
         time_dict['async_callback'] = self.callback
 
         # Observable.fire(Event.START_SEARCH())
+        searchmoves = time_dict.get('searchmoves')
+        self.restricted = bool(searchmoves) and set(searchmoves) != set(self.game.legal_moves)
+        self.search_ns = None
+        self.go_time = time.monotonic_ns()
         self.future = self.engine.go(**time_dict)
         return self.future
 
@@ -182,6 +241,8 @@ class UciEngine(object):
         self.show_best = False
 
         # Observable.fire(Event.START_SEARCH())
+        self.restricted = False
+        self.search_ns = self.go_time = None
         self.future = self.engine.go(ponder=True, infinite=True, async_callback=self.callback)
         return self.future
 
@@ -192,6 +253,8 @@ class UciEngine(object):
         time_dict['async_callback'] = self.callback3
 
         # Observable.fire(Event.START_SEARCH())
+        self.restricted = False
+        self.search_ns = self.go_time = None
         self.future = self.engine.go(**time_dict)
         return self.future
 
@@ -199,15 +262,42 @@ class UciEngine(object):
         """Send a ponder hit."""
         logging.info('show_best: %s', self.show_best)
         self.engine.ponderhit()
+        self._set_state(EngineState.THINKING)
         self.show_best = True
 
+    def _set_state(self, state: EngineState):
+        with self.state_changed:
+            self.state = state
+            self.state_changed.notify_all()
+
+    def search_started(self):
+        """Call by the informer when the go command is sent."""
+        # this runs in the thread sending the go command - the result arrives in the engine thread, when this
+        # one can already have sent the next position (or level), so store the result under this snapshot
+        self.search_game = self.game.copy(stack=False) if self.game is not None and not self.restricted else None
+        self.search_level = self._get_level()
+        self._set_state(EngineState.PONDERING if self.engine.pondering else EngineState.THINKING)
+
+    def _search_finished(self):
+        with self.engine.state_changed:  # a following go command cant overtake us
+            if self.engine.idle:
+                self._set_state(EngineState.IDLE)
+
+    def wait_idle(self, timeout=None):
+        """Wait till the engine is waiting for a new go command. Return False in case of a timeout."""
+        with self.state_changed:
+            return self.state_changed.wait_for(lambda: self.state == EngineState.IDLE, timeout)
+
     def callback(self, command):
         """Callback function."""
+        if self.go_time is not None:
+            self.search_ns = time.monotonic_ns() - self.go_time
         try:
             self.res = command.result()
         except chess.uci.EngineTerminatedException:
             logging.error('Engine terminated')  # @todo find out, why this can happen!
             self.show_best = False
+        self._search_finished()
         logging.info('res: %s', self.res)
         # Observable.fire(Event.STOP_SEARCH())
         if self.show_best and self.res:
@@ -222,6 +312,7 @@ class UciEngine(object):
         except chess.uci.EngineTerminatedException:
             logging.error('Engine terminated')  # @todo find out, why this can happen!
             self.show_best = False
+        self._search_finished()
         logging.info('res: %s', self.res)
         # Observable.fire(Event.STOP_SEARCH())
         if self.show_best and self.res:
@@ -231,20 +322,20 @@ class UciEngine(object):
 
     def is_thinking(self):
         """Engine thinking."""
-        return not self.engine.idle and not self.engine.pondering
+        return self.state == EngineState.THINKING
 
     def is_pondering(self):
         """Engine pondering."""
-        return not self.engine.idle and self.engine.pondering
+        return self.state == EngineState.PONDERING
 
     def is_waiting(self):
         """Engine waiting."""
-        return self.engine.idle
+        return self.state == EngineState.IDLE
 
     def newgame(self, game: Board):
         """Engine sometimes need this to setup internal values."""
         self.engine.ucinewgame()
-        self.engine.position(game)
+        self.position(game)
 
     def mode(self, ponder: bool, analyse: bool):
         """Set engine mode."""
@@ -271,7 +362,7 @@ class UciEngine(object):
         self.level_support = bool(options)
 
         logging.debug('setting engine with options %s', options)
-        self.options = options
+        self.options = dict(options)  # options can come from a shared (read-only) event
         self.send()
         if show:
             logging.debug('Loaded engine [%s]', self.get_name())
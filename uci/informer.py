@@ -15,9 +15,7 @@
 # You should have received a copy of the GNU General Public License
 # along with this program. If not, see <http://www.gnu.org/licenses/>.
 
-from threading import Timer
-
-from utilities import Observable
+from utilities import Observable, evt_coalescer
 from dgt.api import Event
 import chess.uci
 
@@ -26,71 +24,39 @@ class Informer(chess.uci.InfoHandler):
 
     """Internal uci engine info handler."""
 
-    def __init__(self):
+    def __init__(self, uci_engine):
         super(Informer, self).__init__()
-        self.allow_score = True
-        self.allow_pv = True
-        self.allow_depth = True
+        self.uci_engine = uci_engine
+        self.pv_depth = None  # depth of the last pv (the last depth can be an unfinished iteration)
 
     def on_go(self):
         """Engine sends GO."""
-        self.allow_score = True
-        self.allow_pv = True
-        self.allow_depth = True
+        evt_coalescer.discard()  # still pending infos belong to the former search
+        self.uci_engine.search_started()
+        self.pv_depth = None
         Observable.fire(Event.START_SEARCH())
         super().on_go()
 
     def on_bestmove(self, bestmove, ponder):
+        evt_coalescer.flush()  # send the last infos infront of the STOP_SEARCH
         Observable.fire(Event.STOP_SEARCH())
+        self.uci_engine.store_analysis(bestmove, ponder, self.pv_depth, self.info['score'].get(1),
+                                       self.info['pv'].get(1))
         super().on_bestmove(bestmove, ponder)
 
-    def _reset_allow_score(self):
-        self.allow_score = True
-
-    def _reset_allow_pv(self):
-        self.allow_pv = True
-
-    def _reset_allow_depth(self):
-        self.allow_depth = True
-
-    def _allow_fire_score(self):
-        if self.allow_score:
-            self.allow_score = False
-            Timer(0.5, self._reset_allow_score).start()
-            return True
-        else:
-            return False
-
-    def _allow_fire_pv(self):
-        if self.allow_pv:
-            self.allow_pv = False
-            Timer(0.5, self._reset_allow_pv).start()
-            return True
-        else:
-            return False
-
-    def _allow_fire_depth(self):
-        if self.allow_depth:
-            self.allow_depth = False
-            Timer(0.5, self._reset_allow_depth).start()
-            return True
-        else:
-            return False
-
     def score(self, cp, mate, lowerbound, upperbound):
         """Engine sends SCORE."""
-        if self._allow_fire_score():
-            Observable.fire(Event.NEW_SCORE(score=cp, mate=mate))
+        Observable.fire_latest(Event.NEW_SCORE(score=cp, mate=mate))
         super().score(cp, mate, lowerbound, upperbound)
 
     def pv(self, moves):
         """Call when engine sends PV."""
-        if self._allow_fire_pv() and moves:
-            Observable.fire(Event.NEW_PV(pv=moves))
+        if moves:
+            Observable.fire_latest(Event.NEW_PV(pv=moves))
+            self.pv_depth = self.info.get('depth')
         super().pv(moves)
 
     def depth(self, dep):
         """Engine sends DEPTH."""
-        if self._allow_fire_depth():
-            Observable.fire(Event.NEW_DEPTH(depth=dep))
+        Observable.fire_latest(Event.NEW_DEPTH(depth=dep))
         super().depth(dep)
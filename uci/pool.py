@@ -0,0 +1,89 @@
+# Copyright (C) 2013-2018 Jean-Francois Romang (jromang@posteo.de)
+#                         Shivkumar Shivaji ()
+#                         Jürgen Précour (LocutusOfPenguin@posteo.de)
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import os
+from collections import OrderedDict
+
+from uci.engine import UciShell, UciEngine
+
+
+class EnginePool(object):
+
+    """Keep the recently used engines alive (idle) so that a switch back is an attach instead of a cold start."""
+
+    def __init__(self, uci_shell: UciShell, max_engines=2, max_memory=128):
+        super(EnginePool, self).__init__()
+        self.uci_shell = uci_shell
+        self.max_engines = max_engines
+        self.max_memory = max_memory * 1024 * 1024  # in bytes
+        self.engines = OrderedDict()  # parked engines by file - the least recently used first
+
+    @staticmethod
+    def _get_memory(engine: UciEngine):
+        """Return the resident memory (in bytes) of a local engine process (0 if unknown)."""
+        pid = engine.get_pid()
+        if pid is None:
+            return 0
+        try:
+            with open('/proc/{}/statm'.format(pid)) as file:
+                return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+        except (OSError, IndexError, ValueError):
+            return 0
+
+    def get_memory(self):
+        """Return the memory used by the parked engines."""
+        return sum(self._get_memory(engine) for engine in self.engines.values())
+
+    def get(self, file: str, home=''):
+        """Return the parked engine of the file or start a new one."""
+        key = home + os.sep + file if home else file
+        engine = self.engines.pop(key, None)
+        if engine:
+            if engine.is_alive():
+                logging.debug('attaching parked engine %s', key)
+                return engine
+            logging.warning('parked engine %s terminated - restarting it', key)
+        return UciEngine(file=file, uci_shell=self.uci_shell, home=home)
+
+    def park(self, engine: UciEngine):
+        """Park the (idle) engine for later use. Return False if it should quit, but failed."""
+        if self.max_engines < 1 or not engine.is_alive():
+            return engine.quit()
+        key = engine.get_file()
+        other = self.engines.pop(key, None)
+        if other:
+            other.quit()
+        self.engines[key] = engine
+        logging.debug('parked engine %s', key)
+        self._evict()
+        return True
+
+    def _evict(self):
+        """Quit the least recently used engines till the pool is inside its limits again."""
+        while self.engines:
+            if len(self.engines) <= self.max_engines and self.get_memory() <= self.max_memory:
+                break
+            key, engine = self.engines.popitem(last=False)
+            logging.debug('evicting parked engine %s', key)
+            if not engine.quit():
+                logging.warning('engine %s shutdown failure', key)
+
+    def quit(self):
+        """Quit all parked engines."""
+        while self.engines:
+            self.engines.popitem()[1].quit()
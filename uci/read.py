@@ -19,46 +19,39 @@ import platform
 import configparser
 import os
 from dgt.api import Dgt
+from uci.cache import read_config
 
 
-def read_engine_ini(engine_shell=None, engine_path=None):
-    """Read engine.ini and creates a library list out of it."""
-    config = configparser.ConfigParser()
-    config.optionxform = str
+def _read_remote_config(engine_shell, file_name: str):
+    """Return the sections of the (remote) ini file as dict or None if it doesnt exist."""
+    parser = configparser.ConfigParser()
+    parser.optionxform = str
     try:
-        if engine_shell is None:
-            if not engine_path:
-                program_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
-                engine_path = program_path + os.sep + 'engines' + os.sep + platform.machine()
-            config.read(engine_path + os.sep + 'engines.ini')
-        else:
-            with engine_shell.open(engine_path + os.sep + 'engines.ini', 'r') as file:
-                config.read_file(file)
+        with engine_shell.open(file_name, 'r') as file:
+            parser.read_file(file)
     except FileNotFoundError:
-        pass
+        return None
+    return {section: dict(parser[section]) for section in parser.sections()}
 
-    library = []
-    for section in config.sections():
-        parser = configparser.ConfigParser()
-        parser.optionxform = str
 
-        level_dict = {}
+def read_engine_ini(engine_shell=None, engine_path=None):
+    """Read engine.ini and creates a library list out of it."""
+    if engine_shell is None:
+        if not engine_path:
+            program_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+            engine_path = program_path + os.sep + 'engines' + os.sep + platform.machine()
+        config = read_config(engine_path + os.sep + 'engines.ini')  # unchanged files are not parsed again
+    else:
+        config = _read_remote_config(engine_shell, engine_path + os.sep + 'engines.ini')
+
+    library = []
+    for section, confsect in (config or {}).items():
         if engine_shell is None:
-            success = parser.read(engine_path + os.sep + section + '.uci')
+            levels = read_config(engine_path + os.sep + section + '.uci')
         else:
-            try:
-                with engine_shell.open(engine_path + os.sep + section + '.uci', 'r') as file:
-                    parser.read_file(file)
-                success = True
-            except FileNotFoundError:
-                success = False
-        if success:
-            for p_section in parser.sections():
-                level_dict[p_section] = {}
-                for option in parser.options(p_section):
-                    level_dict[p_section][option] = parser[p_section][option]
+            levels = _read_remote_config(engine_shell, engine_path + os.sep + section + '.uci')
+        level_dict = {p_section: dict(options) for p_section, options in (levels or {}).items()}
 
-        confsect = config[section]
         text = Dgt.DISPLAY_TEXT(l=confsect['large'], m=confsect['medium'], s=confsect['small'], wait=True, beep=False,
                                 maxtime=0, devs={'ser', 'i2c', 'web'})
         library.append(
@@ -18,12 +18,19 @@
 import platform
 import configparser
 import os
-from uci.engine import UciShell, UciEngine
+import signal
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from subprocess import DEVNULL
+from uci.cache import EngineCache
+import chess.uci
+from chess.uci import OptionMap
 
+LEVEL_OPTIONS = ('UCI_LimitStrength', 'Skill Level', 'Handicap Level', 'Strength')  # see UciEngine.has_levels()
 
-def write_engine_ini(engine_path=None):
+
+def write_engine_ini(engine_path=None, max_workers=4, timeout=30):
     """Read the engine folder and create the engine.ini file."""
-    def write_level_ini(engine_filename: str):
+    def write_level_ini(engine_filename: str, options: OptionMap):
         """Write the level part for the engine.ini file."""
         def calc_inc(diflevel: int):
             """Calculate the increment for (max 20) levels."""
@@ -38,8 +45,7 @@ def write_engine_ini(engine_path=None):
         parser = configparser.ConfigParser()
         parser.optionxform = str
         if not parser.read(engine_path + os.sep + engine_filename + '.uci'):
-            options = engine.get_options()
-            if engine.has_limit_strength():
+            if 'UCI_LimitStrength' in options:
                 uelevel = options['UCI_Elo']
                 minelo = uelevel.min
                 maxelo = uelevel.max
@@ -50,21 +56,21 @@ def write_engine_ini(engine_path=None):
                     parser['Elo@{:04d}'.format(level)] = {'UCI_LimitStrength': 'true', 'UCI_Elo': str(level)}
                     level += lvl_inc
                 parser['Elo@{:04d}'.format(maxlevel)] = {'UCI_LimitStrength': 'false', 'UCI_Elo': str(maxlevel)}
-            if engine.has_skill_level():
+            if 'Skill Level' in options:
                 sklevel = options['Skill Level']
                 minlevel = sklevel.min
                 maxlevel = sklevel.max
                 minlevel, maxlevel = min(minlevel, maxlevel), max(minlevel, maxlevel)
                 for level in range(minlevel, maxlevel + 1):
                     parser['Level@{:02d}'.format(level)] = {'Skill Level': str(level)}
-            if engine.has_handicap_level():
+            if 'Handicap Level' in options:
                 sklevel = options['Handicap Level']
                 minlevel = sklevel.min
                 maxlevel = sklevel.max
                 minlevel, maxlevel = min(minlevel, maxlevel), max(minlevel, maxlevel)
                 for level in range(minlevel, maxlevel + 1):
                     parser['Level@{:02d}'.format(level)] = {'Handicap Level': str(level)}
-            if engine.has_strength():
+            if 'Strength' in options:
                 sklevel = options['Strength']
                 minlevel = sklevel.min
                 maxlevel = sklevel.max
@@ -80,6 +86,32 @@ def write_engine_ini(engine_path=None):
             with open(engine_path + os.sep + engine_filename + '.uci', 'w') as configfile:
                 parser.write(configfile)
 
+    def probe_engine(engine_file: str):
+        """Return the (name, options) of the engine - from the cache if the binary didnt change."""
+        result = cache.get(engine_file)
+        if result is None:
+            try:
+                # an own process group, so a hanging engine can be killed together with its children (shell wrapper)
+                engine = chess.uci.popen_engine(engine_file, setpgrp=True, stderr=DEVNULL)
+            except OSError:
+                return None
+            try:
+                engine.uci(async_callback=True).result(timeout)
+                result = engine.name, engine.options
+                cache.put(engine_file, *result)
+                engine.quit(async_callback=True).result(timeout)
+            except TimeoutError:
+                print('{} doesnt answer in {} secs'.format(os.path.basename(engine_file), timeout))
+            except chess.uci.EngineTerminatedException:
+                pass
+            if not engine.terminated.is_set():
+                try:
+                    os.killpg(engine.process.pid(), signal.SIGKILL)
+                except OSError:
+                    pass
+                engine.kill(async_callback=True)  # dont wait for the termination
+        return result
+
     def is_exe(fpath: str):
         """Check if fpath is an executable."""
         return os.path.isfile(fpath) and os.access(fpath, os.X_OK)
@@ -96,48 +128,48 @@ def write_engine_ini(engine_path=None):
     if not engine_path:
         program_path = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
         engine_path = program_path + os.sep + 'engines' + os.sep + platform.machine()
-    engine_list = sorted(os.listdir(engine_path))
+    engine_list = [name for name in sorted(os.listdir(engine_path)) if is_exe(engine_path + os.sep + name)]
     config = configparser.ConfigParser()
     config.optionxform = str
-    uci_shell = UciShell()
-    for engine_file_name in engine_list:
-        if is_exe(engine_path + os.sep + engine_file_name):
-            engine = UciEngine(file=engine_path + os.sep + engine_file_name, uci_shell=uci_shell)
-            if engine:
-                print(engine_file_name)
-                try:
-                    if engine.has_levels():
-                        write_level_ini(engine_file_name)
-                    engine_name = engine.get_name()
+    cache = EngineCache(engine_path)
+    # probe the engines parallel, but merge the results in (sorted) file order
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(probe_engine, [engine_path + os.sep + name for name in engine_list]))
+    for engine_file_name, result in zip(engine_list, results):
+        if result:
+            print(engine_file_name)
+            engine_name, engine_options = result
+            try:
+                if any(name in engine_options for name in LEVEL_OPTIONS):
+                    write_level_ini(engine_file_name, engine_options)
 
-                    name_parts = engine_name.replace('.', '').split(' ')
-                    name_small = name_build(name_parts, 6, engine_file_name[2:])
-                    name_medium = name_build(name_parts, 8, name_small)
-                    name_large = name_build(name_parts, 11, name_medium)
+                name_parts = engine_name.replace('.', '').split(' ')
+                name_small = name_build(name_parts, 6, engine_file_name[2:])
+                name_medium = name_build(name_parts, 8, name_small)
+                name_large = name_build(name_parts, 11, name_medium)
 
-                    config[engine_file_name] = {}
+                config[engine_file_name] = {}
 
-                    # config[engine_file_name][';available options'] = 'itsDefaultValue'
-                    engine_options = engine.get_options()
-                    for option in engine_options:
-                        config[engine_file_name][str(';' + option)] = str(engine_options[option].default)
+                # config[engine_file_name][';available options'] = 'itsDefaultValue'
+                for option in engine_options:
+                    config[engine_file_name][str(';' + option)] = str(engine_options[option].default)
 
-                    comp_elo = 2500
-                    engine_elo = {'stockfish': 3360, 'texel': 3050, 'rodent': 2920,
-                                  'zurichess': 2790, 'wyld': 2630, 'sayuri': 1850}
-                    for name, elo in engine_elo.items():
-                        if engine_name.lower().startswith(name):
-                            comp_elo = elo
-                            break
+                comp_elo = 2500
+                engine_elo = {'stockfish': 3360, 'texel': 3050, 'rodent': 2920,
+                              'zurichess': 2790, 'wyld': 2630, 'sayuri': 1850}
+                for name, elo in engine_elo.items():
+                    if engine_name.lower().startswith(name):
+                        comp_elo = elo
+                        break
 
-                    config[engine_file_name]['name'] = engine_name
-                    config[engine_file_name]['small'] = name_small
-                    config[engine_file_name]['medium'] = name_medium
-                    config[engine_file_name]['large'] = name_large
-                    config[engine_file_name]['elo'] = str(comp_elo)
+                config[engine_file_name]['name'] = engine_name
+                config[engine_file_name]['small'] = name_small
+                config[engine_file_name]['medium'] = name_medium
+                config[engine_file_name]['large'] = name_large
+                config[engine_file_name]['elo'] = str(comp_elo)
 
-                except AttributeError:
-                    pass
-                engine.quit()
+            except AttributeError:
+                pass
+    cache.save()
     with open(engine_path + os.sep + 'engines.ini', 'w') as configfile:
         config.write(configfile)
@@ -23,25 +23,215 @@ import urllib.request
 import socket
 import json
 import time
-import copy
 import configparser
+import heapq
 
-from threading import Timer
+from threading import Lock, Condition, Thread, current_thread
+from concurrent.futures import ThreadPoolExecutor, wait
+from collections import deque
+from contextlib import contextmanager
+from bisect import bisect_left
 from subprocess import Popen, PIPE
 
 from dgt.translate import DgtTranslate
-from dgt.api import Dgt
+from dgt.api import Dgt, Event
+from dgt.util import EventLane
 
 from configobj import ConfigObj, ConfigObjError, DuplicateError
 
 # picochess version
 version = '09n'
 
-evt_queue = queue.Queue()
-dispatch_queue = queue.Queue()
+
+class TimedQueue(queue.Queue):
+
+    """A FIFO queue remembering when the last taken item was put into it."""
+
+    def _init(self, maxsize):
+        super(TimedQueue, self)._init(maxsize)
+        self.last_put_time = time.monotonic()
+
+    def _put(self, item):
+        self.queue.append((time.monotonic(), item))
+
+    def _get(self):
+        self.last_put_time, item = self.queue.popleft()
+        return item
+
+
+class BusMonitor(object):
+
+    """Count the items per consumer & type and collect histograms of their wait and handle times."""
+
+    BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)  # upper bounds (msecs) - last bucket is open
+
+    def __init__(self):
+        super(BusMonitor, self).__init__()
+        self.lock = Lock()
+        self.queues = {}  # name => queue
+        self.counters = {}  # consumer => type => [count, wait_sum, handle_sum, wait_hist, handle_hist]
+
+    def register_queue(self, name: str, que: queue.Queue):
+        """Add a queue for reporting its depth."""
+        with self.lock:
+            self.queues[name] = que
+
+    def _record(self, consumer: str, item_type: str, wait: float, handle: float):
+        with self.lock:
+            types = self.counters.setdefault(consumer, {})
+            if item_type not in types:
+                types[item_type] = [0, 0.0, 0.0, [0] * (len(self.BUCKETS) + 1), [0] * (len(self.BUCKETS) + 1)]
+            counter = types[item_type]
+            counter[0] += 1
+            counter[1] += wait
+            counter[2] += handle
+            counter[3][bisect_left(self.BUCKETS, wait * 1000)] += 1
+            counter[4][bisect_left(self.BUCKETS, handle * 1000)] += 1
+
+    @contextmanager
+    def measure(self, consumer: str, item, put_time: float):
+        """Time the handling of an item taken from a queue (at put_time) by the consumer."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self._record(consumer, repr(item), start - put_time, time.monotonic() - start)
+
+    def get_count(self, consumer: str, item_type: str):
+        """Return how many items of that type the consumer handled."""
+        with self.lock:
+            return self.counters.get(consumer, {}).get(item_type, [0])[0]
+
+    def get_stats(self):
+        """Return the collected values as a (json ready) dict."""
+        with self.lock:
+            consumers = {}
+            for consumer, types in self.counters.items():
+                consumers[consumer] = {
+                    item_type: {'count': count, 'wait_avg_ms': wait_sum * 1000 / count,
+                                'handle_avg_ms': handle_sum * 1000 / count,
+                                'wait_hist': list(wait_hist), 'handle_hist': list(handle_hist)}
+                    for item_type, (count, wait_sum, handle_sum, wait_hist, handle_hist) in types.items()
+                }
+            queues = {name: que.qsize() for name, que in self.queues.items()}
+        return {'buckets_ms': list(self.BUCKETS), 'queues': queues, 'lanes': evt_queue.get_wait_times(),
+                'consumers': consumers}
+
+
+class EventQueue(TimedQueue):
+
+    """A FIFO lane per EventLane - get() takes the event of the most important lane first."""
+
+    lane_of = {Event.CLOCK_TIME: EventLane.CLOCK, Event.OUT_OF_TIME: EventLane.CLOCK,
+               Event.BEST_MOVE: EventLane.ENGINE, Event.REMOTE_MOVE: EventLane.ENGINE,
+               Event.START_SEARCH: EventLane.ENGINE, Event.STOP_SEARCH: EventLane.ENGINE,
+               Event.NEW_PV: EventLane.INFO, Event.NEW_SCORE: EventLane.INFO, Event.NEW_DEPTH: EventLane.INFO}
+
+    def _init(self, maxsize):
+        super(EventQueue, self)._init(maxsize)
+        self.lanes = [deque() for _ in EventLane]
+        self.waited = [[0, 0.0, 0.0] for _ in EventLane]  # count, total & max secs the events waited per lane
+
+    def _qsize(self):
+        return sum(len(lane) for lane in self.lanes)
+
+    def _put(self, item):
+        lane = self.lane_of.get(item.__class__, EventLane.USER)
+        queue_lane = lane
+        if lane == EventLane.ENGINE and self.lanes[EventLane.INFO]:
+            # the waiting infos belong to this engine result - it must not overtake them
+            queue_lane = EventLane.INFO
+        self.lanes[queue_lane].append((time.monotonic(), lane, item))
+
+    def _get(self):
+        for events in self.lanes:
+            if events:
+                put_time, lane, item = events.popleft()
+                self.last_put_time = put_time
+                waited = time.monotonic() - put_time
+                stats = self.waited[lane]
+                stats[0] += 1
+                stats[1] += waited
+                stats[2] = max(stats[2], waited)
+                return item
+
+    def get_wait_times(self):
+        """Return the count, average and maximum secs the events waited inside each lane."""
+        with self.mutex:
+            return {lane.name: {'count': count, 'avg': total / count if count else 0.0, 'max': maxi}
+                    for lane, (count, total, maxi) in zip(EventLane, self.waited)}
+
+
+evt_queue = EventQueue()
+dispatch_queue = TimedQueue()
+
+bus_monitor = BusMonitor()
+bus_monitor.register_queue('evt_queue', evt_queue)
+bus_monitor.register_queue('dispatch_queue', dispatch_queue)
 
 msgdisplay_devices = []
 dgtdisplay_devices = []
+bus_recorders = []  # recorders of the bus traffic (see journal.py)
+
+
+class EventCoalescer(Thread):
+
+    """Keep only the latest event of each type and forward them to the evt_queue at a limited rate."""
+
+    def __init__(self, interval=0.5):
+        super(EventCoalescer, self).__init__(daemon=True)
+        self.interval = interval
+        self.pending = {}  # event class => latest event
+        self.last_forward = 0.0
+        self.condition = Condition()
+
+    def set_interval(self, interval: float):
+        """Set the minimal time (secs) between two forwards of the events."""
+        with self.condition:
+            self.interval = interval
+            self.condition.notify()
+
+    def put(self, event):
+        """Store the event - a still pending one of the same type gets replaced."""
+        with self.condition:
+            if not self.is_alive():
+                self.start()
+            if not self.pending:
+                self.condition.notify()
+            self.pending[event.__class__] = event
+
+    def _forward(self):
+        for event in self.pending.values():
+            for recorder in bus_recorders:
+                recorder.record('evt', event)
+            evt_queue.put(event)
+        self.pending.clear()
+        self.last_forward = time.monotonic()
+
+    def flush(self):
+        """Forward the pending events now."""
+        with self.condition:
+            self._forward()
+
+    def discard(self):
+        """Delete the pending events."""
+        with self.condition:
+            self.pending.clear()
+
+    def run(self):
+        """Call by threading.Thread start() function."""
+        with self.condition:
+            while True:
+                while not self.pending:
+                    self.condition.wait()
+                delay = self.last_forward + self.interval - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)  # meanwhile newer events only replace the pending ones
+                else:
+                    self._forward()
+
+
+evt_coalescer = EventCoalescer()
 
 
 class Observable(object):
@@ -54,7 +244,15 @@ class Observable(object):
     @staticmethod
     def fire(event):
         """Put an event on the Queue."""
-        evt_queue.put(copy.deepcopy(event))
+        event.freeze()
+        for recorder in bus_recorders:
+            recorder.record('evt', event)
+        evt_queue.put(event)
+
+    @staticmethod
+    def fire_latest(event):
+        """Put an event on the Queue, but replace a still waiting event of the same type (rate limited)."""
+        evt_coalescer.put(event.freeze())
 
 
 class DispatchDgt(object):
@@ -67,23 +265,55 @@ class DispatchDgt(object):
     @staticmethod
     def fire(dgt):
         """Put an event on the Queue."""
-        dispatch_queue.put(copy.deepcopy(dgt))
+        dgt.freeze()
+        for recorder in bus_recorders:
+            recorder.record('dgt', dgt)
+        dispatch_queue.put(dgt)
 
 
 class DisplayMsg(object):
 
     """Display devices (DGT XL clock, Piface LCD, pgn file...)."""
 
+    routes = {}  # Message class => list of subscribed displays (rebuild on demand)
+    routes_lock = Lock()
+
     def __init__(self):
         super(DisplayMsg, self).__init__()
-        self.msg_queue = queue.Queue()
-        msgdisplay_devices.append(self)
+        self.msg_queue = TimedQueue()
+        bus_monitor.register_queue(self.__class__.__name__, self.msg_queue)
+        self.msg_classes = None  # None => receive all messages
+        with DisplayMsg.routes_lock:
+            msgdisplay_devices.append(self)
+            DisplayMsg.routes = {}
+
+    def subscribe(self, msg_classes):
+        """Only receive the given Message classes from now on."""
+        with DisplayMsg.routes_lock:
+            self.msg_classes = frozenset(msg_classes)
+            DisplayMsg.routes = {}
+
+    @staticmethod
+    def _get_route(msg_class):
+        with DisplayMsg.routes_lock:
+            displays = DisplayMsg.routes.get(msg_class)
+            if displays is None:
+                displays = [display for display in msgdisplay_devices
+                            if display.msg_classes is None or msg_class in display.msg_classes]
+                DisplayMsg.routes[msg_class] = displays
+            return displays
 
     @staticmethod
     def show(message):
-        """Send a message on each display device."""
-        for display in msgdisplay_devices:
-            display.msg_queue.put(copy.deepcopy(message))
+        """Send a message on each (subscribed) display device."""
+        message.freeze()  # all displays share the same (read-only) instance
+        for recorder in bus_recorders:
+            recorder.record('msg', message)
+        displays = DisplayMsg.routes.get(message.__class__)
+        if displays is None:
+            displays = DisplayMsg._get_route(message.__class__)
+        for display in displays:
+            display.msg_queue.put(message)
 
 
 class DisplayDgt(object):
@@ -92,14 +322,129 @@ class DisplayDgt(object):
 
     def __init__(self):
         super(DisplayDgt, self).__init__()
-        self.dgt_queue = queue.Queue()
+        self.dgt_queue = TimedQueue()
+        bus_monitor.register_queue(self.__class__.__name__, self.dgt_queue)
         dgtdisplay_devices.append(self)
 
     @staticmethod
     def show(message):
         """Send a message on each display device."""
+        message.freeze()  # all displays share the same (read-only) instance
         for display in dgtdisplay_devices:
-            display.dgt_queue.put(copy.deepcopy(message))
+            display.dgt_queue.put(message)
+
+
+class HandlerRegistry(object):
+
+    """Map the api classes (Event, Message, Dgt) to their handler function."""
+
+    def __init__(self):
+        super(HandlerRegistry, self).__init__()
+        self.handlers = {}
+        self.unhandled = {}  # counter of the api types without a handler
+
+    def handles(self, *api_classes):
+        """Register the decorated function as handler for the given api classes."""
+        def _register(func):
+            for api_class in api_classes:
+                if api_class in self.handlers:
+                    raise ValueError('handler for {} already registered'.format(api_class.__name__))
+                self.handlers[api_class] = func
+            return func
+        return _register
+
+    def api_classes(self):
+        """Return the api classes having a handler."""
+        return set(self.handlers)
+
+    def dispatch(self, obj, *args):
+        """Call the handler of obj with (*args, obj) - return False if nobody handles it."""
+        handler = self.handlers.get(obj.__class__)
+        if handler is None:
+            self.unhandled[repr(obj)] = self.unhandled.get(repr(obj), 0) + 1
+            return False
+        handler(*args, obj)
+        return True
+
+
+class TimerScheduler(Thread):
+
+    """One thread serving all timers (monotonic time) - the callbacks run on a small pool of worker threads."""
+
+    # the callbacks share these few workers, so they must not block (network, waiting for a serial port...) -
+    # otherwise time critical timers like the clock flag or the display maxtimers get delayed
+
+    def __init__(self, workers=4):
+        super(TimerScheduler, self).__init__(daemon=True)
+        self.heap = []  # (deadline, sequence nr, timer)
+        self.sequence = 0
+        self.condition = Condition()
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def schedule(self, timer, deadline: float):
+        """Call the timer's function at the (monotonic) deadline."""
+        with self.condition:
+            if not self.is_alive():
+                self.start()
+            self.sequence += 1
+            heapq.heappush(self.heap, (deadline, self.sequence, timer))
+            if self.heap[0][2] is timer:
+                self.condition.notify()  # new first deadline
+
+    def run(self):
+        """Call by threading.Thread start() function."""
+        with self.condition:
+            while True:
+                if not self.heap:
+                    self.condition.wait()
+                    continue
+                deadline, _, timer = self.heap[0]
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                heapq.heappop(self.heap)
+                if not timer.cancelled:
+                    timer.future = self.pool.submit(timer.run)
+
+
+timer_scheduler = TimerScheduler()
+
+
+class ScheduledTimer(object):
+
+    """Call a function after a given interval - like threading.Timer but without an own thread (dont block)."""
+
+    def __init__(self, interval, function, args=None, kwargs=None):
+        super(ScheduledTimer, self).__init__()
+        self.interval = interval
+        self.function = function
+        self.args = args if args is not None else []
+        self.kwargs = kwargs if kwargs is not None else {}
+        self.cancelled = False
+        self.future = None  # set when the function is (about to be) called
+        self.thread = None  # thread calling the function
+
+    def start(self):
+        """Start the timer."""
+        timer_scheduler.schedule(self, time.monotonic() + self.interval)
+
+    def cancel(self):
+        """Stop the timer if its function isnt called yet."""
+        with timer_scheduler.condition:
+            self.cancelled = True
+
+    def run(self):
+        """Call the function (done by a worker thread of the timer_scheduler)."""
+        self.thread = current_thread()
+        self.function(*self.args, **self.kwargs)
+
+    def join(self, timeout=None):
+        """Wait till the (already called) function is finished."""
+        with timer_scheduler.condition:
+            future = self.future
+        if future is not None and self.thread is not current_thread():
+            wait([future], timeout)
 
 
 class RepeatedTimer(object):
@@ -113,11 +458,17 @@ class RepeatedTimer(object):
         self.args = args
         self.kwargs = kwargs
         self.timer_running = False
-
-    def _run(self):
-        self.timer_running = False
-        self.start()
-        self.function(*self.args, **self.kwargs)
+        self.deadline = 0
+
+    def _run(self, timer: ScheduledTimer):
+        try:
+            self.function(*self.args, **self.kwargs)
+        finally:
+            with timer_scheduler.condition:
+                if timer is self._timer and not timer.cancelled:
+                    # keep the rate, but skip the calls missed while the function was running
+                    self.deadline = max(self.deadline + self.interval, time.monotonic())
+                    timer_scheduler.schedule(timer, self.deadline)
 
     def is_running(self):
         """Return the running status."""
@@ -126,9 +477,11 @@ class RepeatedTimer(object):
     def start(self):
         """Start the RepeatedTimer."""
         if not self.timer_running:
-            self._timer = Timer(self.interval, self._run)
-            self._timer.start()
+            self._timer = ScheduledTimer(self.interval, self._run)
+            self._timer.args = [self._timer]
+            self.deadline = time.monotonic() + self.interval
             self.timer_running = True
+            timer_scheduler.schedule(self._timer, self.deadline)
         else:
             logging.info('repeated timer already running - strange!')
 
@@ -262,7 +615,7 @@ def get_location():
         int_ip = sock.getsockname()[0]
         sock.close()
 
-        response = urllib.request.urlopen('http://will6.de/freegeoip')
+        response = urllib.request.urlopen('http://will6.de/freegeoip', timeout=10)
         j = json.loads(response.read().decode())
         country_name = j['country_name'] + ' ' if 'country_name' in j else ''
         country_code = j['country_code'] + ' ' if 'country_code' in j else ''